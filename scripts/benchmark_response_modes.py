@@ -0,0 +1,88 @@
+"""Script to compare output tokens and latency of the verbose and terse triage modes."""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.agents.triage_agent import TriageAgent
+from src.models.triage import ResponseMode, Symptom, TriageRequest
+
+SAMPLE_CASES = [
+    (
+        TriageRequest(
+            patient_id="BENCH-001",
+            symptoms=[
+                Symptom(name="Dolor de pecho", severity=8, duration_hours=2),
+                Symptom(name="Dificultad para respirar", severity=7, duration_hours=1),
+            ],
+            vital_signs={"blood_pressure": "140/90", "heart_rate": 95, "oxygen_saturation": 94},
+            additional_context="El paciente tiene antecedentes de hipertensión",
+        ),
+        {"age": 58, "chronic_conditions": ["Hipertensión"], "current_medications": ["Enalapril"]},
+    ),
+    (
+        TriageRequest(
+            patient_id="BENCH-002",
+            symptoms=[Symptom(name="Dolor de garganta", severity=3, duration_hours=48)],
+            vital_signs={"temperature": 37.8},
+        ),
+        {"age": 24},
+    ),
+    (
+        TriageRequest(
+            patient_id="BENCH-003",
+            symptoms=[
+                Symptom(name="Dolor abdominal", severity=6, duration_hours=6),
+                Symptom(name="Vómitos", severity=5, duration_hours=4),
+            ],
+            vital_signs={"temperature": 38.4, "heart_rate": 105},
+        ),
+        {"age": 35, "allergies": ["Penicilina"]},
+    ),
+]
+
+
+def benchmark(runs: int):
+    """Run every sample case in both modes and print output tokens and latency."""
+    agent = TriageAgent()
+    print(f"⏱️  Benchmarking {agent.model_id}, {runs} runs per case and mode\n")
+
+    results = {}
+    for mode in ResponseMode:
+        latencies, output_tokens = [], []
+        for request, history in SAMPLE_CASES:
+            request = request.model_copy(update={"response_mode": mode})
+            prompt = agent.prompt_templates[mode].format_messages(
+                input=agent._build_input(request, history)
+            )
+            for _ in range(runs):
+                started = time.perf_counter()
+                response = agent._invoke_tier("large", agent.llm, prompt, agent._max_tokens(mode))
+                latencies.append(time.perf_counter() - started)
+                output_tokens.append(
+                    response.additional_kwargs.get("usage", {}).get("completion_tokens", 0)
+                )
+                agent._parse_response(response.content, request)
+        results[mode] = (latencies, output_tokens)
+
+    print(f"{'Mode':<10}{'Out tokens':>12}{'p50 (s)':>10}{'p95 (s)':>10}{'Mean (s)':>10}")
+    for mode, (latencies, output_tokens) in results.items():
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(
+            f"{mode.value:<10}{statistics.mean(output_tokens):>12.0f}"
+            f"{statistics.median(latencies):>10.2f}{p95:>10.2f}{statistics.mean(latencies):>10.2f}"
+        )
+
+    verbose_latency = statistics.mean(results[ResponseMode.VERBOSE][0])
+    terse_latency = statistics.mean(results[ResponseMode.TERSE][0])
+    print(f"\n✅ Terse mode is {1 - terse_latency / verbose_latency:.0%} faster on average")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per case and mode")
+    args = parser.parse_args()
+    benchmark(args.runs)
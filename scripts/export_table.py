@@ -0,0 +1,44 @@
+"""Script to export a DynamoDB table to JSON Lines using a parallel scan."""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.dynamodb_service import DynamoDBService
+
+
+def export_table(table_name: str, output: str, segments: int = None, workers: int = None):
+    """Export every item in a table to a JSON Lines file."""
+    db_service = DynamoDBService()
+
+    def report(progress):
+        if progress.done:
+            print(
+                f"✅ Segment {progress.segment + 1}/{progress.total_segments}: "
+                f"{progress.items} items, {progress.throttled} throttled retries"
+            )
+
+    print(f"📦 Exporting {table_name} to {output}...")
+
+    count = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for page in db_service.parallel_scan(
+            table_name, segments=segments, workers=workers, on_progress=report
+        ):
+            for item in page:
+                f.write(json.dumps(item, default=str, ensure_ascii=False) + "\n")
+            count += len(page)
+
+    print(f"\n✅ Exported {count} items")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("table_name")
+    parser.add_argument("output")
+    parser.add_argument("--segments", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    export_table(args.table_name, args.output, args.segments, args.workers)
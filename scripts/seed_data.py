@@ -52,12 +52,11 @@ def seed_patients():
     
     print("🌱 Seeding database with sample patients...")
     
-    for patient_data in sample_patients:
-        try:
-            patient = patient_service.create_patient(patient_data)
+    try:
+        for patient in patient_service.create_patients(sample_patients):
             print(f"✅ Created patient: {patient.patient_id} - {patient.first_name} {patient.last_name}")
-        except Exception as e:
-            print(f"❌ Error creating patient: {e}")
+    except Exception as e:
+        print(f"❌ Error creating patients: {e}")
     
     print("\n✅ Database seeding completed!")
 
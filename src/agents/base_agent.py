@@ -1,12 +1,51 @@
 """Base agent class with AWS Bedrock integration."""
+import asyncio
+import itertools
 import logging
-from typing import Optional
-import boto3
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from langchain_aws import ChatBedrock
+from langchain_core.messages import BaseMessage
 from src.config import get_settings
+from src.services.aws_clients import get_client_registry
+from src.services.deadline import remaining
+from src.services.hedging import HedgedCaller, get_hedged_caller
+from src.services.rate_limiter import get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# Output token limit of calls that don't set their own
+DEFAULT_MAX_TOKENS = 2048
+
+# Rough conversion used when Bedrock does not report input token counts
+CHARS_PER_TOKEN = 4
+
+# Names of the Bedrock targets calls are hedged across
+PRIMARY_TARGET = "primary"
+SECONDARY_TARGET = "secondary"
+
+
+async def _next_chunk(chunks: Iterator, timeout: Optional[float] = None) -> Any:
+    """Pull the next chunk of a synchronous stream on a worker thread, or None at its end.
+
+    If the wait is cancelled or times out, the stream is closed once the pull finishes.
+    """
+    pulled = asyncio.get_running_loop().run_in_executor(None, next, chunks, None)
+    try:
+        return await asyncio.wait_for(asyncio.shield(pulled), timeout)
+    except BaseException:
+        pulled.add_done_callback(lambda _: chunks.close())
+        raise
+
 
 class BaseAgent:
     """Base class for all agents."""
@@ -16,32 +55,222 @@ class BaseAgent:
         self.settings = get_settings()
         self.model_id = model_id or self.settings.bedrock_model_id
 
-        # Initialize Bedrock client
-        self.bedrock_client = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=self.settings.bedrock_region,
-            aws_access_key_id=self.settings.aws_access_key_id,
-            aws_secret_access_key=self.settings.aws_secret_access_key,
+        # Shared Bedrock clients for the primary and the optional secondary target
+        registry = get_client_registry()
+        self.bedrock_client = registry.client(
+            "bedrock-runtime",
+            self.settings.bedrock_region,
+            endpoint_url=self.settings.bedrock_endpoint_url or None,
+        )
+        self.secondary_bedrock_client = (
+            registry.client(
+                "bedrock-runtime",
+                self.settings.bedrock_secondary_region,
+                endpoint_url=self.settings.bedrock_secondary_endpoint_url or None,
+            )
+            if self.settings.bedrock_secondary_region
+            else None
         )
+        self._secondary_llms = {}
 
         # Initialize LangChain Bedrock LLM
-        self.llm = ChatBedrock(
-            client=self.bedrock_client,
-            model_id=self.model_id,
+        self.temperature = temperature
+        self.llm = self._build_llm(self.model_id)
+
+        logger.info(f"Initialized {self.__class__.__name__} with model {self.model_id}")
+
+    def _build_llm(self, model_id: str, client=None) -> ChatBedrock:
+        """Build a Bedrock chat model on a shared client, the primary one by default."""
+        return ChatBedrock(
+            client=client or self.bedrock_client,
+            model_id=model_id,
             model_kwargs={
-                "temperature": temperature,
+                "temperature": self.temperature,
                 "top_p": 0.9,
-                "max_tokens": 2048,
+                "max_tokens": DEFAULT_MAX_TOKENS,
             },
         )
 
-        logger.info(f"Initialized {self.__class__.__name__} with model {self.model_id}")
+    def invoke(self, prompt: str, priority: int = 0) -> str:
+        """Invoke the LLM with a prompt, waiting for rate limit capacity by ``priority``.
 
-    def invoke(self, prompt: str) -> str:
-        """Invoke the LLM with a prompt."""
+        The call is hedged across Bedrock targets and bounded by the request deadline.
+        """
         try:
-            response = self.llm.invoke(prompt)
+            self._acquire_quota(self.model_id, prompt, priority=priority)
+            response = self._hedged(self.model_id).call(
+                self._quota_per_attempt(
+                    lambda target: self._target_llm(self.llm, target).invoke(prompt),
+                    self.model_id,
+                    prompt,
+                    priority=priority,
+                ),
+                timeout=remaining(),
+            )
             return response.content
         except Exception as e:
             logger.error(f"Error invoking LLM: {e}")
             raise
+
+    async def ainvoke(self, prompt: str, priority: int = 0) -> str:
+        """Invoke the LLM with a prompt without blocking the event loop."""
+        try:
+            await self._aacquire_quota(self.model_id, prompt, priority=priority)
+            response = await self._hedged(self.model_id).acall(
+                self._aquota_per_attempt(
+                    lambda target: self._target_llm(self.llm, target).ainvoke(prompt),
+                    self.model_id,
+                    prompt,
+                    priority=priority,
+                ),
+                timeout=remaining(),
+            )
+            return response.content
+        except Exception as e:
+            logger.error(f"Error invoking LLM: {e}")
+            raise
+
+    async def astream(self, prompt, priority: int = 0, **kwargs) -> AsyncIterator[str]:
+        """Stream the LLM's answer text chunk by chunk without blocking the event loop."""
+        async for text in self._astream_hedged(
+            self.model_id,
+            self.llm,
+            prompt,
+            kwargs.pop("max_tokens", DEFAULT_MAX_TOKENS),
+            priority,
+            **kwargs,
+        ):
+            yield text
+
+    async def _astream_hedged(
+        self,
+        model_id: str,
+        llm,
+        prompt: Union[str, List[BaseMessage]],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        priority: int = 0,
+        **kwargs,
+    ) -> AsyncIterator[str]:
+        """Stream ``llm``'s answer text once its rate limiter admits the call.
+
+        Waiting for the first chunk is hedged across Bedrock targets like
+        ``ainvoke``, and every chunk must arrive before the request deadline.
+        ChatBedrock only streams synchronously, so chunks are pulled from its
+        stream on a worker thread.
+        """
+        await self._aacquire_quota(model_id, prompt, max_tokens, priority)
+
+        async def open_stream(target: str) -> Tuple[Any, Iterator]:
+            chunks = iter(
+                self._target_llm(llm, target).stream(prompt, max_tokens=max_tokens, **kwargs)
+            )
+            return await _next_chunk(chunks), chunks
+
+        try:
+            chunk, chunks = await self._hedged(model_id).acall(
+                self._aquota_per_attempt(open_stream, model_id, prompt, max_tokens, priority),
+                timeout=remaining(),
+            )
+            idle = True
+            try:
+                while chunk is not None:
+                    yield chunk.content
+                    idle = False
+                    chunk = await _next_chunk(chunks, remaining())
+                    idle = True
+            finally:
+                if idle:
+                    chunks.close()
+        except Exception as e:
+            logger.error(f"Error streaming from LLM: {e!r}")
+            raise
+
+    def _hedged(self, model_id: str) -> HedgedCaller:
+        """Get the hedged caller of a model across the configured Bedrock targets."""
+        targets: Tuple[str, ...] = (PRIMARY_TARGET,)
+        if self.secondary_bedrock_client is not None:
+            targets += (SECONDARY_TARGET,)
+        return get_hedged_caller(model_id, targets)
+
+    def _target_client(self, target: str):
+        """Bedrock client of a target."""
+        return self.bedrock_client if target == PRIMARY_TARGET else self.secondary_bedrock_client
+
+    def _target_llm(self, llm, target: str):
+        """The chat model ``llm`` on a target's client."""
+        if target == PRIMARY_TARGET:
+            return llm
+        if llm.model_id not in self._secondary_llms:
+            self._secondary_llms[llm.model_id] = self._build_llm(
+                llm.model_id, self.secondary_bedrock_client
+            )
+        return self._secondary_llms[llm.model_id]
+
+    def _acquire_quota(
+        self,
+        model_id: str,
+        prompt: Union[str, List[BaseMessage]],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        priority: int = 0,
+    ):
+        """Wait for the model's rate limiter to admit a call; higher priorities go first."""
+        limiter = get_rate_limiter(model_id)
+        if limiter:
+            limiter.acquire(self._estimate_tokens(prompt, max_tokens), priority)
+
+    async def _aacquire_quota(
+        self,
+        model_id: str,
+        prompt: Union[str, List[BaseMessage]],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        priority: int = 0,
+    ):
+        """Wait without blocking the event loop for the model's rate limiter to admit a call."""
+        limiter = get_rate_limiter(model_id)
+        if limiter:
+            await limiter.aacquire(self._estimate_tokens(prompt, max_tokens), priority)
+
+    def _quota_per_attempt(
+        self,
+        fn: Callable[[str], Any],
+        model_id: str,
+        prompt: Union[str, List[BaseMessage]],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        priority: int = 0,
+    ) -> Callable[[str], Any]:
+        """Wrap a hedged call so every attempt after the first also waits for rate limit quota.
+
+        The first attempt is charged by the caller before the call is hedged.
+        """
+        attempts = itertools.count()
+
+        def charged(target: str) -> Any:
+            if next(attempts):
+                self._acquire_quota(model_id, prompt, max_tokens, priority)
+            return fn(target)
+
+        return charged
+
+    def _aquota_per_attempt(
+        self,
+        fn: Callable[[str], Awaitable[Any]],
+        model_id: str,
+        prompt: Union[str, List[BaseMessage]],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        priority: int = 0,
+    ) -> Callable[[str], Awaitable[Any]]:
+        """Wrap a hedged async call so every attempt after the first also awaits quota."""
+        attempts = itertools.count()
+
+        async def charged(target: str) -> Any:
+            if next(attempts):
+                await self._aacquire_quota(model_id, prompt, max_tokens, priority)
+            return await fn(target)
+
+        return charged
+
+    @staticmethod
+    def _estimate_tokens(prompt: Union[str, List[BaseMessage]], max_tokens: int) -> float:
+        """Estimate the quota tokens a call uses: its input plus the output it may generate."""
+        text = prompt if isinstance(prompt, str) else "".join(str(m.content) for m in prompt)
+        return len(text) / CHARS_PER_TOKEN + max_tokens
@@ -0,0 +1,94 @@
+"""Direct Bedrock Messages API calls with a cacheable system prompt.
+
+ChatBedrock only accepts a plain-string system prompt and drops the usage
+details of the response body, so calls that mark the system prompt with
+``cache_control`` go through the Bedrock runtime client directly.
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, List
+from langchain_core.messages import AIMessage, BaseMessage
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_VERSION = "bedrock-2023-05-31"
+
+# Fragments of the Bedrock model IDs that support prompt caching
+PROMPT_CACHING_MODELS = (
+    "claude-3-5-haiku",
+    "claude-3-7-sonnet",
+    "claude-sonnet-4",
+    "claude-opus-4",
+    "claude-haiku-4",
+)
+
+ROLES = {"human": "user", "ai": "assistant"}
+
+
+def supports_prompt_caching(model_id: str) -> bool:
+    """Whether a Bedrock model supports prompt caching."""
+    return any(fragment in model_id for fragment in PROMPT_CACHING_MODELS)
+
+
+def build_request_body(messages: List[BaseMessage], model_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a Messages API request whose system prompt is marked as cacheable."""
+    system = [
+        {"type": "text", "text": message.content, "cache_control": {"type": "ephemeral"}}
+        for message in messages
+        if message.type == "system"
+    ]
+    return {
+        "anthropic_version": ANTHROPIC_VERSION,
+        **model_kwargs,
+        "system": system,
+        "messages": [
+            {"role": ROLES[message.type], "content": message.content}
+            for message in messages
+            if message.type != "system"
+        ],
+    }
+
+
+def invoke_with_prompt_cache(
+    client, model_id: str, messages: List[BaseMessage], model_kwargs: Dict[str, Any]
+) -> AIMessage:
+    """Invoke a model with a cacheable system prompt, streaming to time the first token.
+
+    The returned message carries the token usage, including cache reads and
+    writes, and the time to first token in ``additional_kwargs["usage"]``.
+    """
+    started = time.perf_counter()
+    response = client.invoke_model_with_response_stream(
+        modelId=model_id, body=json.dumps(build_request_body(messages, model_kwargs))
+    )
+
+    parts = []
+    usage = {}
+    time_to_first_token = None
+    for event in response["body"]:
+        chunk = json.loads(event["chunk"]["bytes"])
+        if chunk["type"] == "message_start":
+            usage.update(chunk["message"].get("usage", {}))
+        elif chunk["type"] == "content_block_delta":
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - started
+            parts.append(chunk["delta"].get("text", ""))
+        elif chunk["type"] == "message_delta":
+            usage.update(chunk.get("usage", {}))
+
+    cache_read = usage.get("cache_read_input_tokens") or 0
+    cache_write = usage.get("cache_creation_input_tokens") or 0
+    uncached = usage.get("input_tokens") or 0
+    return AIMessage(
+        content="".join(parts),
+        additional_kwargs={
+            "usage": {
+                "prompt_tokens": uncached + cache_read + cache_write,
+                "completion_tokens": usage.get("output_tokens") or 0,
+                "cache_read_input_tokens": cache_read,
+                "cache_creation_input_tokens": cache_write,
+                "time_to_first_token": time_to_first_token,
+            }
+        },
+    )
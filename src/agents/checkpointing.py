@@ -0,0 +1,178 @@
+"""Durable LangGraph checkpoints so interrupted workflow runs resume where they stopped."""
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Optional
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.pydantic_v1 import PrivateAttr
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.utils import ConfigurableFieldSpec
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, CheckpointAt
+from pydantic import BaseModel
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Only models from this package are rebuilt from stored checkpoints
+MODELS_PACKAGE = "src.models."
+
+
+def _encode_value(value: Any) -> Any:
+    """Encode a model or message in a checkpoint as tagged JSON."""
+    if isinstance(value, BaseModel):
+        model = type(value)
+        return {
+            "__model__": f"{model.__module__}.{model.__qualname__}",
+            "data": value.model_dump(mode="json"),
+        }
+    if isinstance(value, BaseMessage):
+        return {"__message__": message_to_dict(value)}
+    raise TypeError(f"Cannot store {type(value).__name__} in a checkpoint")
+
+
+def _decode_value(value: dict) -> Any:
+    """Rebuild a model or message encoded by ``_encode_value``."""
+    if "__message__" in value:
+        return messages_from_dict([value["__message__"]])[0]
+    if "__model__" in value:
+        module_name, _, class_name = value["__model__"].rpartition(".")
+        if not module_name.startswith(MODELS_PACKAGE):
+            raise ValueError(f"Refusing to load {value['__model__']} from a checkpoint")
+        return getattr(importlib.import_module(module_name), class_name).model_validate(
+            value["data"]
+        )
+    return value
+
+
+def _seen_dict() -> defaultdict:
+    """Versions of channels seen by a node, defaulting to 0."""
+    return defaultdict(int)
+
+
+def dumps_checkpoint(checkpoint: Checkpoint) -> str:
+    """Serialize a checkpoint to JSON."""
+    return json.dumps(checkpoint, default=_encode_value)
+
+
+def loads_checkpoint(payload: str) -> Checkpoint:
+    """Deserialize a checkpoint serialized by ``dumps_checkpoint``."""
+    data = json.loads(payload, object_hook=_decode_value)
+    return Checkpoint(
+        v=data["v"],
+        ts=data["ts"],
+        channel_values=data["channel_values"],
+        channel_versions=defaultdict(int, data["channel_versions"]),
+        versions_seen=defaultdict(
+            _seen_dict,
+            {node: defaultdict(int, seen) for node, seen in data["versions_seen"].items()},
+        ),
+    )
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver):
+    """Checkpoint saver storing the latest checkpoint of each thread in a SQLite file in WAL mode.
+
+    Checkpoints are written as JSON at the end of every step, so a run that
+    fails or is interrupted resumes after its last completed node. Checkpoints
+    older than ``ttl_seconds`` are ignored, so a much later run starts over.
+    """
+
+    path: str
+    ttl_seconds: float = 900.0
+    at: CheckpointAt = CheckpointAt.END_OF_STEP
+
+    PURGE_EVERY = 1000
+
+    _conn: Any = PrivateAttr()
+    _lock: Any = PrivateAttr()
+    _writes: int = PrivateAttr(default=0)
+
+    def __init__(self, **kwargs: Any):
+        """Open (and create if needed) the checkpoint store at ``path``."""
+        super().__init__(**kwargs)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints "
+            "(thread_id TEXT PRIMARY KEY, checkpoint TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    @property
+    def config_specs(self) -> list[ConfigurableFieldSpec]:
+        """Runs are configured with the ``thread_id`` whose checkpoint they resume."""
+        return [
+            ConfigurableFieldSpec(
+                id="thread_id",
+                annotation=str,
+                name="Thread ID",
+                description=None,
+                default="",
+                is_shared=True,
+            ),
+        ]
+
+    def get(self, config: RunnableConfig) -> Optional[Checkpoint]:
+        """Get the thread's latest checkpoint, or None if there is none or it expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checkpoint FROM checkpoints WHERE thread_id = ? AND updated_at > ?",
+                (config["configurable"]["thread_id"], time.time() - self.ttl_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return loads_checkpoint(row[0])
+        except (KeyError, TypeError, ValueError) as e:
+            thread_id = config["configurable"]["thread_id"]
+            logger.warning(f"Ignoring unreadable checkpoint of thread {thread_id}: {e}")
+            return None
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint) -> None:
+        """Store the thread's latest checkpoint."""
+        payload = dumps_checkpoint(checkpoint)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint, updated_at) "
+                "VALUES (?, ?, ?)",
+                (config["configurable"]["thread_id"], payload, time.time()),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM checkpoints WHERE updated_at <= ?",
+                    (time.time() - self.ttl_seconds,),
+                )
+
+
+@lru_cache()
+def get_sqlite_checkpointer(path: str, ttl_seconds: float) -> SQLiteCheckpointSaver:
+    """Get the process-wide SQLite checkpoint saver stored at ``path``."""
+    return SQLiteCheckpointSaver(path=path, ttl_seconds=ttl_seconds)
+
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Get the configured checkpoint saver for the triage workflow, or None if disabled."""
+    settings = get_settings()
+    if settings.triage_checkpoint_backend == "sqlite":
+        return get_sqlite_checkpointer(
+            settings.triage_checkpoint_path, settings.triage_checkpoint_ttl_seconds
+        )
+    if settings.triage_checkpoint_backend != "none":
+        logger.warning(
+            f"Unknown checkpoint backend {settings.triage_checkpoint_backend}, "
+            "running the triage workflow without checkpoints"
+        )
+    return None
@@ -1,19 +1,41 @@
 """Coordinator agent using LangGraph for multi-agent orchestration."""
+import asyncio
 import logging
-from typing import TypedDict, Annotated, Sequence
+from typing import Any, AsyncIterator, TypedDict, Annotated, Dict, List, Optional, Sequence, Tuple
+from langgraph.checkpoint.base import BaseCheckpointSaver, Checkpoint, empty_checkpoint
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 import operator
 from src.agents.base_agent import BaseAgent
-from src.agents.triage_agent import TriageAgent
-from src.models.triage import TriageRequest, TriageResponse
+from src.agents.checkpointing import get_checkpointer
+from src.agents.triage_agent import RESPONSE_FIELD_NAMES, TriageAgent
+from src.agents.triage_cache import TriageIdempotencyStore, request_fingerprint
+from src.agents.triage_rules import get_rule_engine
+from src.models.triage import (
+    AssessmentStatus,
+    ResponseMode,
+    TriageLevel,
+    TriageRequest,
+    TriageResponse,
+    TriageBatchItem,
+)
 from src.services.patient_service import PatientService
 from src.services.dynamodb_service import DynamoDBService
+from src.services.async_dynamodb_service import AsyncDynamoDBService
+from src.services.deadline import set_deadline
+from src.services.outbox import OutboxFlusher, get_outbox
+from src.services.single_flight import SingleFlight
 from src.config import get_settings
+from src.metrics import TRIAGE_GRAPH_RESUMES, TRIAGE_RESUME_LLM_CALLS_AVOIDED
 
 logger = logging.getLogger(__name__)
 
 
+class TriageNotSavedError(RuntimeError):
+    """The triage result could not be saved; retrying the request resumes at the save."""
+
+
 class AgentState(TypedDict):
     """State for the agent graph."""
 
@@ -27,56 +49,128 @@ class AgentState(TypedDict):
 class CoordinatorAgent:
     """Coordinator agent that orchestrates multiple specialized agents using LangGraph."""
 
-    def __init__(self):
-        """Initialize coordinator agent."""
+    def __init__(self, checkpointer: Optional[BaseCheckpointSaver] = None):
+        """Initialize coordinator agent.
+
+        Runs with an idempotency key are checkpointed with ``checkpointer``, or
+        the configured saver if omitted; other runs are not checkpointed.
+        """
         self.settings = get_settings()
+        self.checkpointer = checkpointer if checkpointer is not None else get_checkpointer()
         self.patient_service = PatientService()
         self.triage_agent = TriageAgent()
         self.db_service = DynamoDBService()
+        self.async_db_service = AsyncDynamoDBService()
+        self.rule_engine = get_rule_engine()
+        self.single_flight = SingleFlight("triage")
+        self.idempotency_store = TriageIdempotencyStore()
+        self._background_tasks = set()
+        self._phase_two_events: Dict[str, asyncio.Event] = {}
+        self.outbox = (
+            get_outbox(self.settings.triage_outbox_path)
+            if self.settings.triage_outbox_enabled
+            else None
+        )
+        self.outbox_flusher = (
+            OutboxFlusher(
+                self.outbox,
+                self._write_batch,
+                self._write_batch_async,
+                batch_size=self.settings.triage_outbox_batch_size,
+                interval_seconds=self.settings.triage_outbox_flush_interval_seconds,
+            )
+            if self.outbox
+            else None
+        )
         self.graph = self._build_graph()
+        self.checkpointed_graph = (
+            self._build_graph(self.checkpointer) if self.checkpointer else None
+        )
+
+    def _build_graph(self, checkpointer: Optional[BaseCheckpointSaver] = None) -> StateGraph:
+        """Build the LangGraph workflow, checkpointed with ``checkpointer`` if given.
 
-    def _build_graph(self) -> StateGraph:
-        """Build the LangGraph workflow."""
+        Each node has a sync and an async implementation, so the same graph
+        serves both ``invoke`` and ``ainvoke``.
+        """
         workflow = StateGraph(AgentState)
 
         # Define nodes
-        workflow.add_node("fetch_patient_history", self._fetch_patient_history)
-        workflow.add_node("perform_triage", self._perform_triage)
-        workflow.add_node("save_results", self._save_results)
+        workflow.add_node(
+            "pre_triage", RunnableLambda(self._pre_triage, afunc=self._pre_triage_async)
+        )
+        workflow.add_node(
+            "fetch_patient_history",
+            RunnableLambda(self._fetch_patient_history, afunc=self._fetch_patient_history_async),
+        )
+        workflow.add_node(
+            "perform_triage",
+            RunnableLambda(self._perform_triage, afunc=self._perform_triage_async),
+        )
+        workflow.add_node(
+            "save_results",
+            RunnableLambda(self._save_results, afunc=self._save_results_async),
+        )
 
         # Define edges
-        workflow.set_entry_point("fetch_patient_history")
+        workflow.set_entry_point("pre_triage")
+        workflow.add_conditional_edges(
+            "pre_triage",
+            lambda state: state["next_action"],
+            {"fetch_patient_history": "fetch_patient_history", "save_results": "save_results"},
+        )
         workflow.add_edge("fetch_patient_history", "perform_triage")
         workflow.add_edge("perform_triage", "save_results")
         workflow.add_edge("save_results", END)
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+
+    def _pre_triage(self, state: AgentState) -> AgentState:
+        """Node: Decide the triage from hard clinical rules, skipping the LLM when one matches."""
+        state["next_action"] = "fetch_patient_history"
+        if not self.settings.triage_rules_enabled:
+            return state
+
+        triage_result = self.rule_engine.hard_response(state["triage_request"])
+        if triage_result:
+            logger.info(
+                f"Pre-triage rules decided {triage_result.triage_level.value} "
+                f"for patient {triage_result.patient_id}"
+            )
+            self._apply_triage_result(state, triage_result)
+            state["next_action"] = "save_results"
+        return state
+
+    async def _pre_triage_async(self, state: AgentState) -> AgentState:
+        """Node: Async entry for the pre-triage rules, which run inline."""
+        return self._pre_triage(state)
 
     def _fetch_patient_history(self, state: AgentState) -> AgentState:
         """Node: Fetch patient medical history."""
         logger.info(f"Fetching history for patient {state['triage_request'].patient_id}")
 
         try:
-            patient_history = self.patient_service.get_patient_medical_history(
+            patient_history = self.patient_service.get_patient_clinical_history(
                 state["triage_request"].patient_id
             )
+            self._apply_patient_history(state, patient_history)
+
+        except Exception as e:
+            logger.error(f"Error fetching patient history: {e}")
+            state["patient_history"] = {}
+            state["messages"].append(AIMessage(content=f"Error al recuperar historial: {str(e)}"))
 
-            if not patient_history:
-                # Create a default history if patient not found
-                patient_history = {
-                    "patient_id": state["triage_request"].patient_id,
-                    "name": "Paciente Desconocido",
-                    "age": 0,
-                    "allergies": [],
-                    "chronic_conditions": [],
-                    "current_medications": [],
-                }
-                logger.warning(f"Patient {state['triage_request'].patient_id} not found, using defaults")
+        return state
 
-            state["patient_history"] = patient_history
-            state["messages"].append(
-                AIMessage(content=f"Historial del paciente recuperado: {patient_history.get('name')}")
+    async def _fetch_patient_history_async(self, state: AgentState) -> AgentState:
+        """Node: Fetch patient medical history without blocking the event loop."""
+        logger.info(f"Fetching history for patient {state['triage_request'].patient_id}")
+
+        try:
+            patient_history = await self.patient_service.get_patient_clinical_history_async(
+                state["triage_request"].patient_id
             )
+            self._apply_patient_history(state, patient_history)
 
         except Exception as e:
             logger.error(f"Error fetching patient history: {e}")
@@ -85,6 +179,31 @@ class CoordinatorAgent:
 
         return state
 
+    def _apply_patient_history(self, state: AgentState, patient_history: dict):
+        """Store the fetched history in the state, defaulting it if the patient is unknown."""
+        if not patient_history:
+            patient_history = self._default_history(state["triage_request"].patient_id)
+
+        state["patient_history"] = patient_history
+        state["messages"].append(
+            AIMessage(
+                content=f"Historial del paciente recuperado: {patient_history.get('patient_id')}"
+            )
+        )
+
+    @staticmethod
+    def _default_history(patient_id: str) -> dict:
+        """Build the default history used when a patient is not found."""
+        logger.warning(f"Patient {patient_id} not found, using defaults")
+        return {
+            "patient_id": patient_id,
+            "name": "Paciente Desconocido",
+            "age": 0,
+            "allergies": [],
+            "chronic_conditions": [],
+            "current_medications": [],
+        }
+
     def _perform_triage(self, state: AgentState) -> AgentState:
         """Node: Perform triage assessment."""
         logger.info("Performing triage assessment")
@@ -93,13 +212,23 @@ class CoordinatorAgent:
             triage_result = self.triage_agent.assess_triage(
                 state["triage_request"], state["patient_history"]
             )
+            self._apply_triage_result(state, triage_result)
 
-            state["triage_result"] = triage_result
-            state["messages"].append(
-                AIMessage(
-                    content=f"Triaje completado: Nivel {triage_result.triage_level.value}, Prioridad {triage_result.priority_score}"
-                )
+        except Exception as e:
+            logger.error(f"Error performing triage: {e}")
+            state["messages"].append(AIMessage(content=f"Error en triaje: {str(e)}"))
+
+        return state
+
+    async def _perform_triage_async(self, state: AgentState) -> AgentState:
+        """Node: Perform triage assessment without blocking the event loop."""
+        logger.info("Performing triage assessment")
+
+        try:
+            triage_result = await self.triage_agent.assess_triage_async(
+                state["triage_request"], state["patient_history"]
             )
+            self._apply_triage_result(state, triage_result)
 
         except Exception as e:
             logger.error(f"Error performing triage: {e}")
@@ -107,35 +236,586 @@ class CoordinatorAgent:
 
         return state
 
-    def _save_results(self, state: AgentState) -> AgentState:
+    @staticmethod
+    def _apply_triage_result(state: AgentState, triage_result: TriageResponse):
+        """Store the triage result in the state."""
+        state["triage_result"] = triage_result
+        state["messages"].append(
+            AIMessage(
+                content=f"Triaje completado: Nivel {triage_result.triage_level.value}, Prioridad {triage_result.priority_score}"
+            )
+        )
+
+    def _save_results(self, state: AgentState, config: RunnableConfig) -> AgentState:
         """Node: Save triage results to database."""
+        self._require_saved(self._store_results(state), config)
+        return state
+
+    async def _save_results_async(self, state: AgentState, config: RunnableConfig) -> AgentState:
+        """Node: Save triage results to database without blocking the event loop."""
+        self._require_saved(await self._store_results_async(state), config)
+        return state
+
+    @staticmethod
+    def _require_saved(saved: bool, config: RunnableConfig):
+        """Fail the run if the result was not saved and the run is checkpointed.
+
+        The checkpoint then stays before ``save_results``, so a retry saves the
+        result it already has instead of running the triage again.
+        """
+        if not saved and config.get("configurable", {}).get("thread_id"):
+            raise TriageNotSavedError("Triage result could not be saved, retry to save it")
+
+    def _store_results(self, state: AgentState) -> bool:
+        """Save the state's triage result, recording the outcome in its messages."""
         logger.info("Saving triage results")
 
         try:
-            triage_data = state["triage_result"].model_dump()
-            success = self.db_service.put_item(
-                self.settings.dynamodb_triage_table, triage_data
-            )
-
-            if success:
-                state["messages"].append(
-                    AIMessage(content=f"Resultados guardados: {state['triage_result'].triage_id}")
-                )
+            if self._enqueue_result(state["triage_result"]):
+                success = True
             else:
-                state["messages"].append(AIMessage(content="Error al guardar resultados"))
+                success = self.db_service.put_item(
+                    self.settings.dynamodb_triage_table, state["triage_result"].model_dump()
+                )
+            self._apply_save_result(state, success)
+            return success
 
         except Exception as e:
             logger.error(f"Error saving results: {e}")
             state["messages"].append(AIMessage(content=f"Error al guardar: {str(e)}"))
+            return False
 
-        return state
+    async def _store_results_async(self, state: AgentState) -> bool:
+        """Save the state's triage result without blocking, recording the outcome."""
+        logger.info("Saving triage results")
+
+        try:
+            success = await self._persist_result_async(state["triage_result"])
+            self._apply_save_result(state, success)
+            return success
+
+        except Exception as e:
+            logger.error(f"Error saving results: {e}")
+            state["messages"].append(AIMessage(content=f"Error al guardar: {str(e)}"))
+            return False
+
+    async def _persist_result_async(self, triage_result: TriageResponse) -> bool:
+        """Queue a triage result in the outbox, or write it to the triage table if that fails."""
+        if await self._enqueue_result_async(triage_result):
+            return True
+        return await self.async_db_service.put_item(
+            self.settings.dynamodb_triage_table, triage_result.model_dump()
+        )
+
+    def _enqueue_result(self, triage_result: TriageResponse) -> bool:
+        """Append a triage result to the outbox and wake the flusher; False without an outbox."""
+        if not self.outbox:
+            return False
+        queued = self.outbox.append(
+            self.settings.dynamodb_triage_table,
+            {"triage_id": triage_result.triage_id},
+            triage_result.model_dump(mode="json"),
+        )
+        if queued:
+            self.outbox_flusher.start()
+        return queued
+
+    async def _enqueue_result_async(self, triage_result: TriageResponse) -> bool:
+        """Append a triage result to the outbox off the event loop and wake the flusher."""
+        if not self.outbox:
+            return False
+        queued = await asyncio.to_thread(
+            self.outbox.append,
+            self.settings.dynamodb_triage_table,
+            {"triage_id": triage_result.triage_id},
+            triage_result.model_dump(mode="json"),
+        )
+        if queued:
+            self.outbox_flusher.start()
+        return queued
+
+    def _write_batch(self, table_name: str, items: List[dict]) -> List[dict]:
+        """Write outbox items to a table, returning those that failed."""
+        return self.db_service.batch_put_items(table_name, items)
+
+    async def _write_batch_async(self, table_name: str, items: List[dict]) -> List[dict]:
+        """Write outbox items to a table without blocking, returning those that failed."""
+        return await self.async_db_service.batch_put_items(table_name, items)
+
+    async def _update_result_async(self, triage_id: str, updates: dict) -> Optional[dict]:
+        """Apply updates to a stored triage result, merging them into its put if still queued.
+
+        Returns the updated item, or None if it could not be updated.
+        """
+        key = {"triage_id": triage_id}
+        table_name = self.settings.dynamodb_triage_table
+        if self.outbox and await asyncio.to_thread(self.outbox.update, table_name, key, updates):
+            self.outbox_flusher.start()
+            return await asyncio.to_thread(self.outbox.get, table_name, key) or {**key, **updates}
+        return await self.async_db_service.update_item(table_name, key, updates)
+
+    async def _get_result_async(self, triage_id: str) -> Optional[dict]:
+        """Get a triage result, including one whose put is still queued in the outbox."""
+        key = {"triage_id": triage_id}
+        if self.outbox:
+            item = await asyncio.to_thread(
+                self.outbox.get, self.settings.dynamodb_triage_table, key
+            )
+            if item is not None:
+                return item
+        return await self.async_db_service.get_item(self.settings.dynamodb_triage_table, key)
+
+    @staticmethod
+    def _apply_save_result(state: AgentState, success: bool):
+        """Record the outcome of saving the triage result."""
+        if success:
+            state["messages"].append(
+                AIMessage(content=f"Resultados guardados: {state['triage_result'].triage_id}")
+            )
+        else:
+            state["messages"].append(AIMessage(content="Error al guardar resultados"))
 
     def process_triage(self, triage_request: TriageRequest) -> TriageResponse:
-        """Process a triage request through the agent graph."""
+        """Process a triage request through the agent graph.
+
+        Identical requests submitted while one is in flight share its result.
+        Rule-based results are not enriched by the LLM on this synchronous path.
+        """
+        if not self.settings.triage_single_flight_enabled:
+            return self._run_triage(triage_request)
+        return self.single_flight.do(
+            request_fingerprint(triage_request), lambda: self._run_triage(triage_request)
+        )
+
+    async def process_triage_async(
+        self, triage_request: TriageRequest, idempotency_key: Optional[str] = None
+    ) -> TriageResponse:
+        """Process a triage request through the agent graph without blocking the event loop.
+
+        Identical requests submitted while one is in flight share its result.
+        With an ``idempotency_key``, repeats within ``triage_idempotency_ttl_seconds``
+        get the stored response; reusing the key for another request raises
+        IdempotencyConflictError.
+        """
+        if idempotency_key:
+            stored = await self.idempotency_store.aget(idempotency_key, triage_request)
+            if stored:
+                return stored
+
+        if self.settings.triage_single_flight_enabled:
+            triage_result = await self.single_flight.ado(
+                request_fingerprint(triage_request),
+                lambda: self._run_triage_async(triage_request, idempotency_key),
+            )
+        else:
+            triage_result = await self._run_triage_async(triage_request, idempotency_key)
+
+        if idempotency_key:
+            await self.idempotency_store.aset(idempotency_key, triage_request, triage_result)
+        return triage_result
+
+    def _run_triage(self, triage_request: TriageRequest) -> TriageResponse:
+        """Run the agent graph for a request."""
+        logger.info(f"Processing triage request for patient {triage_request.patient_id}")
+
+        # Execute graph
+        final_state = self.graph.invoke(self._initial_state(triage_request))
+
+        logger.info("Triage process completed")
+        return final_state["triage_result"]
+
+    async def _run_triage_async(
+        self, triage_request: TriageRequest, idempotency_key: Optional[str] = None
+    ) -> TriageResponse:
+        """Run the agent graph for a request.
+
+        With an ``idempotency_key`` each node is checkpointed, and a retry with
+        the same key resumes an interrupted run after its last completed node.
+        Enrichment of rule-based results is scheduled once the graph completes.
+        """
         logger.info(f"Processing triage request for patient {triage_request.patient_id}")
+        if not idempotency_key or self.checkpointed_graph is None:
+            final_state = await self.graph.ainvoke(self._initial_state(triage_request))
+        else:
+            config = self._thread_config(triage_request, idempotency_key)
+            checkpoint = await self.checkpointer.aget(config)
+            final_state = await self.checkpointed_graph.ainvoke(
+                self._graph_input(triage_request, checkpoint), config
+            )
+            await self.checkpointer.aput(config, empty_checkpoint())
+            final_state = final_state or checkpoint["channel_values"]
+        if final_state["next_action"] == "save_results":
+            self._schedule_enrichment(triage_request, final_state["triage_result"])
+
+        logger.info("Triage process completed")
+        return final_state["triage_result"]
+
+    async def process_triage_two_phase_async(self, triage_request: TriageRequest) -> TriageResponse:
+        """Return a preliminary triage fast and complete the same record in the background.
+
+        Phase 1 takes the level from hard rules or a minimal LLM call and
+        persists it as ``preliminary``; phase 2 generates the full assessment
+        and updates the record. Use ``wait_for_triage_async`` to await phase 2.
+        """
+        logger.info(f"Processing two-phase triage request for patient {triage_request.patient_id}")
+        state = self._pre_triage(self._initial_state(triage_request))
+        if state["next_action"] == "save_results":
+            state["triage_result"].assessment_status = AssessmentStatus.PRELIMINARY
+        else:
+            state = await self._fetch_patient_history_async(state)
+            self._apply_triage_result(
+                state,
+                await self.triage_agent.assess_level_async(
+                    triage_request, state["patient_history"]
+                ),
+            )
+        await self._store_results_async(state)
+
+        triage_result = state["triage_result"]
+        self._phase_two_events[triage_result.triage_id] = asyncio.Event()
+        self._run_in_background(self._complete_phase_two_async(triage_request, triage_result))
 
-        # Initialize state
-        initial_state = AgentState(
+        logger.info(f"Preliminary triage {triage_result.triage_id} returned, phase 2 scheduled")
+        return triage_result
+
+    async def wait_for_triage_async(
+        self, triage_id: str, timeout: float = 0.0
+    ) -> Optional[TriageResponse]:
+        """Get a stored triage, waiting up to ``timeout`` seconds while it is preliminary.
+
+        Phase 2 runs started by this process wake the waiter as soon as they
+        finish; records completed by other workers are re-read every
+        ``triage_phase2_poll_interval_seconds``. Returns None for unknown IDs.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            item = await self._get_result_async(triage_id)
+            if item is None:
+                return None
+            triage_result = TriageResponse(**item)
+            remaining = deadline - loop.time()
+            if triage_result.assessment_status != AssessmentStatus.PRELIMINARY or remaining <= 0:
+                return triage_result
+
+            event = self._phase_two_events.get(triage_id)
+            try:
+                if event:
+                    await asyncio.wait_for(event.wait(), timeout=remaining)
+                else:
+                    await asyncio.sleep(
+                        min(self.settings.triage_phase2_poll_interval_seconds, remaining)
+                    )
+            except asyncio.TimeoutError:
+                pass
+
+    async def astream_triage(
+        self, triage_request: TriageRequest
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Run the triage workflow, streaming fields of the assessment as the LLM produces them.
+
+        Yields ``(field, value)`` pairs from the triage agent and finally
+        ``("complete", {"result": TriageResponse, "saved": bool})`` once the
+        result has been persisted.
+        """
+        logger.info(f"Streaming triage request for patient {triage_request.patient_id}")
+        state = self._pre_triage(self._initial_state(triage_request))
+
+        if state["next_action"] == "save_results":
+            for field in RESPONSE_FIELD_NAMES:
+                yield field, getattr(state["triage_result"], field)
+        else:
+            state = await self._fetch_patient_history_async(state)
+            async for field, value in self.triage_agent.astream_triage(
+                triage_request, state["patient_history"]
+            ):
+                if field == "result":
+                    self._apply_triage_result(state, value)
+                else:
+                    yield field, value
+
+        try:
+            saved = await self._persist_result_async(state["triage_result"])
+        except Exception as e:
+            logger.error(f"Error saving results: {e}")
+            saved = False
+        self._apply_save_result(state, saved)
+        if state["next_action"] == "save_results":
+            self._schedule_enrichment(triage_request, state["triage_result"])
+
+        logger.info("Streamed triage process completed")
+        yield "complete", {"result": state["triage_result"], "saved": saved}
+
+    async def process_triage_batch_async(
+        self, triage_requests: List[TriageRequest]
+    ) -> List[TriageBatchItem]:
+        """Process several triage requests concurrently, returning items in request order.
+
+        Requests a hard rule decides skip the LLM. For the rest, patient
+        histories are read in one batch up front and at most
+        ``triage_batch_concurrency`` assessments run at a time. Results are
+        written in one batch at the end.
+        """
+        logger.info(f"Processing batch of {len(triage_requests)} triage requests")
+        hard_results = self._hard_responses(triage_requests)
+        histories = await self._fetch_histories_async(
+            [request for request, hard in zip(triage_requests, hard_results) if hard is None]
+        )
+        semaphore = asyncio.Semaphore(max(1, self.settings.triage_batch_concurrency))
+
+        async def assess(request: TriageRequest, hard: Optional[TriageResponse]) -> TriageResponse:
+            if hard:
+                return hard
+            async with semaphore:
+                return await self.triage_agent.assess_triage_async(
+                    request, histories[request.patient_id]
+                )
+
+        outcomes = await asyncio.gather(
+            *(assess(request, hard) for request, hard in zip(triage_requests, hard_results)),
+            return_exceptions=True,
+        )
+        items = await self._save_batch_async(triage_requests, outcomes)
+        self._enrich_hard_results(triage_requests, hard_results, items)
+
+        logger.info("Batch triage process completed")
+        return items
+
+    async def process_retriage_packed_async(
+        self, triage_requests: List[TriageRequest]
+    ) -> List[TriageBatchItem]:
+        """Re-triage several patients packing up to ``triage_packed_max_patients`` per LLM call.
+
+        Meant for periodic re-triage of a waiting room: the system prompt and
+        per-call overhead are paid once per pack instead of once per patient.
+        Patients a hard rule decides are not packed.
+        """
+        logger.info(f"Processing packed re-triage of {len(triage_requests)} patients")
+        hard_results = self._hard_responses(triage_requests)
+        histories = await self._fetch_histories_async(
+            [request for request, hard in zip(triage_requests, hard_results) if hard is None]
+        )
+        pack_size = max(1, self.settings.triage_packed_max_patients)
+        semaphore = asyncio.Semaphore(max(1, self.settings.triage_batch_concurrency))
+
+        async def assess(pack: List[int]) -> List[TriageResponse]:
+            async with semaphore:
+                return await self.triage_agent.assess_triage_packed_async(
+                    [
+                        (triage_requests[index], histories[triage_requests[index].patient_id])
+                        for index in pack
+                    ]
+                )
+
+        # Each pack shares one prompt, so patients are packed by response mode
+        packs = []
+        for mode in ResponseMode:
+            indexes = [
+                index
+                for index, request in enumerate(triage_requests)
+                if request.response_mode == mode and hard_results[index] is None
+            ]
+            packs.extend(
+                indexes[start : start + pack_size] for start in range(0, len(indexes), pack_size)
+            )
+        pack_outcomes = await asyncio.gather(
+            *(assess(pack) for pack in packs), return_exceptions=True
+        )
+        outcomes = list(hard_results)
+        for pack, pack_outcome in zip(packs, pack_outcomes):
+            for position, index in enumerate(pack):
+                outcomes[index] = (
+                    pack_outcome if isinstance(pack_outcome, Exception) else pack_outcome[position]
+                )
+        items = await self._save_batch_async(triage_requests, outcomes)
+        self._enrich_hard_results(triage_requests, hard_results, items)
+
+        logger.info("Packed re-triage process completed")
+        return items
+
+    def _hard_responses(
+        self, triage_requests: List[TriageRequest]
+    ) -> List[Optional[TriageResponse]]:
+        """Get the hard-rule triage of each request, None where no hard rule decides it."""
+        if not self.settings.triage_rules_enabled:
+            return [None] * len(triage_requests)
+        return [self.rule_engine.hard_response(request) for request in triage_requests]
+
+    def _enrich_hard_results(
+        self,
+        triage_requests: List[TriageRequest],
+        hard_results: List[Optional[TriageResponse]],
+        items: List[TriageBatchItem],
+    ):
+        """Schedule the LLM enrichment of the saved rule-based results of a batch."""
+        for request, hard, item in zip(triage_requests, hard_results, items):
+            if hard and item.saved:
+                self._schedule_enrichment(request, hard)
+
+    async def _fetch_histories_async(self, triage_requests: List[TriageRequest]) -> dict:
+        """Read every requested patient's history in one batch, keyed by patient ID."""
+        if not triage_requests:
+            return {}
+        try:
+            histories = await self.patient_service.get_patient_clinical_histories_async(
+                [request.patient_id for request in triage_requests]
+            )
+        except Exception as e:
+            logger.error(f"Error fetching patient histories: {e}")
+            histories = {}
+
+        for request in triage_requests:
+            if not histories.get(request.patient_id):
+                histories[request.patient_id] = self._default_history(request.patient_id)
+        return histories
+
+    async def _save_batch_async(
+        self, triage_requests: List[TriageRequest], outcomes: list
+    ) -> List[TriageBatchItem]:
+        """Store the assessed results in one batch and build the per-request items.
+
+        Results the batch write fails to store are queued in the outbox for retry.
+        """
+        items = []
+        for index, (request, outcome) in enumerate(zip(triage_requests, outcomes)):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error performing triage for {request.patient_id}: {outcome}")
+                items.append(
+                    TriageBatchItem(index=index, patient_id=request.patient_id, error=str(outcome))
+                )
+            else:
+                items.append(
+                    TriageBatchItem(index=index, patient_id=request.patient_id, result=outcome)
+                )
+
+        results = [item.result.model_dump() for item in items if item.result]
+        try:
+            failed = await self.async_db_service.batch_put_items(
+                self.settings.dynamodb_triage_table, results
+            )
+        except Exception as e:
+            logger.error(f"Error saving batch results: {e}")
+            failed = results
+        failed_ids = {result["triage_id"] for result in failed}
+        for item in items:
+            if item.result:
+                item.saved = (
+                    item.result.triage_id not in failed_ids
+                    or await self._enqueue_result_async(item.result)
+                )
+        return items
+
+    def _schedule_enrichment(self, triage_request: TriageRequest, triage_result: TriageResponse):
+        """Run the LLM assessment in the background to complete a rule-based record."""
+        if not self.settings.triage_rules_enrich:
+            return
+        self._run_in_background(self._enrich_async(triage_request, triage_result))
+
+    def _run_in_background(self, coroutine):
+        """Run a coroutine as a task that is kept alive until it finishes.
+
+        The task is detached from the request's deadline, which it may outlive.
+        """
+        task = asyncio.create_task(self._detached(coroutine))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    @staticmethod
+    async def _detached(coroutine):
+        """Await a coroutine without the deadline of the request that started it."""
+        set_deadline(None)
+        return await coroutine
+
+    async def _complete_phase_two_async(
+        self, triage_request: TriageRequest, triage_result: TriageResponse
+    ):
+        """Phase 2: complete a preliminary record, marking it failed if that isn't possible."""
+        try:
+            if not await self._enrich_async(triage_request, triage_result):
+                await self._update_result_async(
+                    triage_result.triage_id, {"assessment_status": AssessmentStatus.FAILED.value}
+                )
+        finally:
+            self._phase_two_events.pop(triage_result.triage_id).set()
+
+    async def _enrich_async(
+        self, triage_request: TriageRequest, triage_result: TriageResponse
+    ) -> bool:
+        """Update a rule-based or preliminary triage record with the LLM's full assessment.
+
+        The earlier level and priority are kept unless the LLM's are more
+        severe. Returns whether the record was updated.
+        """
+        try:
+            patient_history = await self.patient_service.get_patient_clinical_history_async(
+                triage_request.patient_id
+            )
+            assessment = await self.triage_agent.assess_triage_async(
+                triage_request,
+                patient_history or self._default_history(triage_request.patient_id),
+                fallback=False,
+            )
+            updated = await self._update_result_async(
+                triage_result.triage_id, self._enrichment_updates(triage_result, assessment)
+            )
+            if updated is None:
+                return False
+            logger.info(f"Enriched triage {triage_result.triage_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error enriching triage {triage_result.triage_id}: {e!r}")
+            return False
+
+    @staticmethod
+    def _enrichment_updates(triage_result: TriageResponse, assessment: TriageResponse) -> dict:
+        """Build the attribute updates that merge an LLM assessment into an earlier result."""
+        levels = list(TriageLevel)
+        updates = assessment.model_dump(
+            mode="json", exclude={"triage_id", "patient_id", "created_at"}
+        )
+        updates["assessment_status"] = AssessmentStatus.COMPLETE.value
+        updates["triage_level"] = min(
+            triage_result.triage_level, assessment.triage_level, key=levels.index
+        ).value
+        updates["priority_score"] = max(triage_result.priority_score, assessment.priority_score)
+        updates["warning_signs"] = list(
+            dict.fromkeys(triage_result.warning_signs + assessment.warning_signs)
+        )
+        return updates
+
+    @staticmethod
+    def _thread_config(triage_request: TriageRequest, idempotency_key: str) -> dict:
+        """Graph config whose thread, and so checkpoint, belongs to one logical request.
+
+        Retries share a thread only through their idempotency key, so identical
+        requests in other workers never resume each other's runs.
+        """
+        thread_id = f"{idempotency_key}:{request_fingerprint(triage_request)}"
+        return {"configurable": {"thread_id": thread_id}}
+
+    def _graph_input(
+        self, triage_request: TriageRequest, checkpoint: Optional[Checkpoint]
+    ) -> Optional[AgentState]:
+        """Get the graph input: the initial state, or None to resume from ``checkpoint``.
+
+        An empty checkpoint belongs to a run that completed, so the graph starts over.
+        """
+        if not checkpoint or not checkpoint["channel_values"]:
+            return self._initial_state(triage_request)
+
+        values = checkpoint["channel_values"]
+        TRIAGE_GRAPH_RESUMES.inc()
+        if values.get("next_action") == "fetch_patient_history" and values.get("triage_result"):
+            TRIAGE_RESUME_LLM_CALLS_AVOIDED.inc()
+            logger.info(f"Resuming triage of {triage_request.patient_id} with its saved assessment")
+        else:
+            logger.info(f"Resuming triage of {triage_request.patient_id} from its last checkpoint")
+        return None
+
+    @staticmethod
+    def _initial_state(triage_request: TriageRequest) -> AgentState:
+        """Build the initial graph state for a triage request."""
+        return AgentState(
             messages=[HumanMessage(content="Iniciar proceso de triaje")],
             triage_request=triage_request,
             patient_history={},
@@ -143,24 +823,20 @@ class CoordinatorAgent:
             next_action="",
         )
 
-        # Execute graph
-        final_state = self.graph.invoke(initial_state)
-
-        logger.info("Triage process completed")
-        return final_state["triage_result"]
-
     def get_workflow_visualization(self) -> str:
         """Get a text representation of the workflow."""
         return """
         Flujo de Trabajo del Sistema de Triaje:
         
         1. [INICIO] → Recibir solicitud de triaje
-        2. [fetch_patient_history] → Recuperar historial médico del paciente
-        3. [perform_triage] → Evaluar síntomas y asignar prioridad
-        4. [save_results] → Guardar resultados en DynamoDB
-        5. [FIN] → Retornar resultado de triaje
+        2. [pre_triage] → Aplicar reglas clínicas; un criterio duro pasa directo a save_results
+        3. [fetch_patient_history] → Recuperar historial médico del paciente
+        4. [perform_triage] → Evaluar síntomas y asignar prioridad
+        5. [save_results] → Guardar resultados en DynamoDB
+        6. [FIN] → Retornar resultado de triaje
         
         Agentes involucrados:
+        - TriageRuleEngine: Reglas clínicas deterministas sobre signos vitales y severidad
         - TriageAgent: Especializado en evaluación médica
         - PatientService: Gestión de datos del paciente
         - DynamoDBService: Persistencia de datos
@@ -0,0 +1,71 @@
+"""Incremental parsing of the JSON object streamed by an LLM."""
+import json
+from typing import Any, List, Tuple
+
+
+class JsonFieldParser:
+    """Parse a streamed JSON object, reporting each top-level field as soon as it completes.
+
+    Text before the opening brace, such as a markdown code fence, is ignored.
+    A field is complete once the comma or closing brace that follows its value
+    arrives; fields whose text is not valid JSON are skipped.
+    """
+
+    def __init__(self):
+        """Initialize the parser."""
+        self.text = ""
+        self.fields = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Add streamed text and return the fields it completed, in order."""
+        self.text += chunk
+        completed = []
+        while self._pos < len(self.text) and not self.done:
+            char = self.text[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._member_start = self._pos
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_member(completed)
+                    self.done = True
+            elif char == "," and self._depth == 1:
+                self._complete_member(completed)
+                self._member_start = self._pos
+        return completed
+
+    def _complete_member(self, completed: List[Tuple[str, Any]]):
+        """Parse the ``"key": value`` text that just ended."""
+        member = self.text[self._member_start : self._pos - 1].strip()
+        if not member:
+            return
+        try:
+            field = json.loads("{" + member + "}")
+        except ValueError:
+            return
+        for name, value in field.items():
+            self.fields[name] = value
+            completed.append((name, value))
@@ -1,32 +1,41 @@
 """Triage agent for medical assessment."""
+import asyncio
 import logging
 import json
-from typing import Dict, Any
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
-from src.agents.base_agent import BaseAgent
-from src.models.triage import TriageLevel, TriageRequest, TriageResponse
+from langchain_core.messages import BaseMessage
+from langchain_aws import ChatBedrock
+from src.agents.base_agent import CHARS_PER_TOKEN, BaseAgent
+from src.agents.bedrock_messages import invoke_with_prompt_cache, supports_prompt_caching
+from src.agents.json_stream import JsonFieldParser
+from src.agents.triage_cache import TriageResultCache
+from src.agents.triage_rules import ESTIMATED_WAIT_TIMES, RECOMMENDED_ACTIONS, get_rule_engine
+from src.metrics import (
+    TRIAGE_CASCADE_DECISIONS,
+    TRIAGE_LLM_LATENCY,
+    TRIAGE_PACKED_FALLBACKS,
+    TRIAGE_PACKED_TOKENS_SAVED,
+    TRIAGE_PROMPT_TOKENS,
+    TRIAGE_TIME_TO_FIRST_TOKEN,
+)
+from src.models.triage import (
+    AssessmentStatus,
+    ResponseMode,
+    TriageLevel,
+    TriageRequest,
+    TriageResponse,
+)
+from src.services.deadline import remaining
 import uuid
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
-class TriageAgent(BaseAgent):
-    """Agent specialized in medical triage assessment."""
-
-    def __init__(self):
-        """Initialize triage agent."""
-        super().__init__(temperature=0.3)  # Lower temperature for more consistent medical advice
-        self.setup_prompt()
-
-    def setup_prompt(self):
-        """Setup the triage prompt template."""
-        self.prompt_template = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    """Eres un asistente médico experto en triaje de emergencias para Swiss Medical Group.
+TRIAGE_GUIDELINES = """Eres un asistente médico experto en triaje de emergencias para Swiss Medical Group.
 Tu tarea es evaluar los síntomas del paciente y asignar un nivel de prioridad según protocolos médicos estándar.
 
 NIVELES DE TRIAJE:
@@ -54,9 +63,19 @@ Debes proporcionar:
 - Señales de alerta a monitorear
 - Tiempo estimado de espera
 
-Responde SIEMPRE en formato JSON válido con esta estructura:
-{{
-    "triage_level": "critical|urgent|semi_urgent|non_urgent|routine",
+"""
+
+# Shorter guidelines for the "compact" prompt variant; the JSON schema already lists the outputs
+COMPACT_TRIAGE_GUIDELINES = """Eres un asistente de triaje de emergencias de Swiss Medical Group.
+Asigna un nivel según protocolos estándar considerando severidad (1-10), duración de los síntomas, \
+signos vitales, condiciones crónicas y factores de riesgo.
+
+Niveles: critical (amenaza la vida, inmediato), urgent (15-30 min), semi_urgent (1-2 h), \
+non_urgent (2-4 h), routine (cita programada).
+
+"""
+
+RESPONSE_FIELDS = """    "triage_level": "critical|urgent|semi_urgent|non_urgent|routine",
     "priority_score": 0-100,
     "assessment_summary": "resumen detallado",
     "recommended_action": "acción inmediata recomendada",
@@ -66,30 +85,640 @@ Responde SIEMPRE en formato JSON válido con esta estructura:
     "warning_signs": ["señal1", "señal2"],
     "estimated_wait_time": "tiempo estimado",
     "agent_reasoning": "razonamiento del agente"
-}}""",
+"""
+
+# Extra field the fast cascade tier reports so unsure answers can be escalated
+CONFIDENCE_FIELD = """    "confidence": 0.0-1.0 (confianza en el nivel de triaje asignado)
+"""
+
+# Terse mode asks for short keys and phrases to cut output tokens
+TERSE_INSTRUCTIONS = """Responde de forma concisa: frases de menos de 15 palabras y como máximo \
+{max_items} elementos por lista.
+
+"""
+
+TERSE_FIELDS = """    "l": "critical|urgent|semi_urgent|non_urgent|routine",
+    "p": 0-100,
+    "s": "resumen breve",
+    "a": "acción recomendada",
+    "sp": "especialidad",
+    "t": ["estudio"],
+    "rf": ["factor de riesgo"],
+    "w": ["señal de alerta"],
+    "wt": "tiempo estimado"
+"""
+
+TERSE_REASONING_FIELD = """    "r": "razonamiento breve"
+"""
+
+TERSE_CONFIDENCE_FIELD = """    "c": 0.0-1.0 (confianza en el nivel de triaje asignado)
+"""
+
+# Full field name of each terse key
+TERSE_KEYS = {
+    "l": "triage_level",
+    "p": "priority_score",
+    "s": "assessment_summary",
+    "a": "recommended_action",
+    "sp": "recommended_specialty",
+    "t": "recommended_tests",
+    "rf": "risk_factors",
+    "w": "warning_signs",
+    "wt": "estimated_wait_time",
+    "r": "agent_reasoning",
+    "c": "confidence",
+}
+
+# Phase 1 of a two-phase triage asks only for what the waiting room shows right away
+LEVEL_INSTRUCTIONS = """Responde solo con el nivel de triaje, la prioridad y el tiempo estimado de \
+espera; la evaluación completa se realizará después.
+
+"""
+
+LEVEL_FIELDS = """    "l": "critical|urgent|semi_urgent|non_urgent|routine",
+    "p": 0-100,
+    "wt": "tiempo estimado"
+"""
+
+PRELIMINARY_SUMMARY = "Evaluación preliminar; la evaluación completa está en curso."
+
+# Output token limit of the Claude 3 models, which caps packed multi-patient answers
+PACKED_MAX_TOKENS = 4096
+
+# Levels the fast tier never decides on its own
+ESCALATED_LEVELS = {TriageLevel.CRITICAL, TriageLevel.URGENT}
+
+# Fields of RESPONSE_FIELDS, in the order the model is asked to produce them
+RESPONSE_FIELD_NAMES = [
+    "triage_level",
+    "priority_score",
+    "assessment_summary",
+    "recommended_action",
+    "recommended_specialty",
+    "recommended_tests",
+    "risk_factors",
+    "warning_signs",
+    "estimated_wait_time",
+    "agent_reasoning",
+]
+
+
+def _join_fields(fields) -> str:
+    """Join blocks of JSON schema fields with the commas between them."""
+    return ",\n".join(block.rstrip("\n") for block in fields) + "\n"
+
+
+class TriageAgent(BaseAgent):
+    """Agent specialized in medical triage assessment."""
+
+    def __init__(self):
+        """Initialize triage agent."""
+        super().__init__(temperature=0.3)  # Lower temperature for more consistent medical advice
+        self.result_cache = TriageResultCache()
+        self.fast_llm = (
+            self._build_llm(self.settings.bedrock_fast_model_id)
+            if self.settings.bedrock_fast_model_id
+            else None
+        )
+        self.setup_prompt()
+
+    def setup_prompt(self):
+        """Setup the single-patient, fast-tier and packed prompt templates for each response mode."""
+        guidelines = (
+            COMPACT_TRIAGE_GUIDELINES
+            if self.settings.triage_prompt_variant == "compact"
+            else TRIAGE_GUIDELINES
+        )
+        terse_guidelines = guidelines + TERSE_INSTRUCTIONS.format(
+            max_items=self.settings.triage_terse_max_list_items
+        )
+        terse_fields = [TERSE_FIELDS]
+        if self.settings.triage_terse_reasoning:
+            terse_fields.append(TERSE_REASONING_FIELD)
+
+        self.prompt_templates = {
+            ResponseMode.VERBOSE: self._json_prompt(guidelines, RESPONSE_FIELDS),
+            ResponseMode.TERSE: self._json_prompt(terse_guidelines, *terse_fields),
+        }
+        self.fast_prompt_templates = {
+            ResponseMode.VERBOSE: self._json_prompt(guidelines, RESPONSE_FIELDS, CONFIDENCE_FIELD),
+            ResponseMode.TERSE: self._json_prompt(
+                terse_guidelines, *terse_fields, TERSE_CONFIDENCE_FIELD
+            ),
+        }
+        self.packed_prompt_templates = {
+            ResponseMode.VERBOSE: self._packed_prompt(guidelines, RESPONSE_FIELDS),
+            ResponseMode.TERSE: self._packed_prompt(terse_guidelines, *terse_fields),
+        }
+        self.level_prompt_template = self._json_prompt(
+            guidelines + LEVEL_INSTRUCTIONS, LEVEL_FIELDS
+        )
+
+    @staticmethod
+    def _json_prompt(guidelines: str, *fields: str) -> ChatPromptTemplate:
+        """Build a single-patient prompt asking for a JSON object with ``fields``."""
+        return ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    guidelines
+                    + "Responde SIEMPRE en formato JSON válido con esta estructura:\n{{\n"
+                    + _join_fields(fields)
+                    + "}}",
+                ),
+                ("human", "{input}"),
+            ]
+        )
+
+    @staticmethod
+    def _packed_prompt(guidelines: str, *fields: str) -> ChatPromptTemplate:
+        """Build a multi-patient prompt asking for a JSON array of objects with ``fields``."""
+        return ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    guidelines
+                    + "Recibirás varios pacientes, cada uno identificado por su patient_id. "
+                    "Evalúa cada paciente por separado y responde SIEMPRE con un array JSON "
+                    "válido con un objeto por paciente y esta estructura:\n[\n  {{\n"
+                    + '    "patient_id": "identificador del paciente",\n'
+                    + _join_fields(fields)
+                    + "  }}\n]",
                 ),
                 ("human", "{input}"),
             ]
         )
 
     def assess_triage(self, request: TriageRequest, patient_history: Dict[str, Any]) -> TriageResponse:
-        """Perform triage assessment."""
+        """Perform triage assessment, reusing a cached result for an identical submission."""
+        cache_key = self.result_cache.key(request, patient_history)
+        cached = self.result_cache.get(cache_key)
+        if cached:
+            return cached
+
         try:
-            # Build context
-            symptoms_text = "\n".join(
-                [
-                    f"- {s.name}: Severidad {s.severity}/10, Duración: {s.duration_hours or 'desconocida'} horas"
-                    for s in request.symptoms
-                ]
+            started = time.perf_counter()
+            triage_response = self._assess_with_cascade(request, patient_history)
+            llm_seconds = time.perf_counter() - started
+
+            self.result_cache.set(cache_key, triage_response, llm_seconds)
+            return triage_response
+
+        except Exception as e:
+            logger.error(f"Error in triage assessment: {e}")
+            return self._fallback_response(request, e)
+
+    async def assess_triage_async(
+        self, request: TriageRequest, patient_history: Dict[str, Any], fallback: bool = True
+    ) -> TriageResponse:
+        """Perform triage assessment without blocking the event loop.
+
+        If the LLM fails or takes longer than ``triage_llm_timeout_seconds``,
+        returns the rule-based fallback, or raises when ``fallback`` is False.
+        """
+        cache_key = self.result_cache.key(request, patient_history)
+        cached = await self.result_cache.aget(cache_key)
+        if cached:
+            return cached
+
+        try:
+            started = time.perf_counter()
+            triage_response = await asyncio.wait_for(
+                self._assess_with_cascade_async(request, patient_history),
+                timeout=remaining(self.settings.triage_llm_timeout_seconds),
+            )
+            llm_seconds = time.perf_counter() - started
+
+            await self.result_cache.aset(cache_key, triage_response, llm_seconds)
+            return triage_response
+
+        except Exception as e:
+            logger.error(f"Error in triage assessment: {e!r}")
+            if not fallback:
+                raise
+            return self._fallback_response(request, e)
+
+    async def assess_level_async(
+        self, request: TriageRequest, patient_history: Dict[str, Any]
+    ) -> TriageResponse:
+        """Get a preliminary triage with only the level, priority and wait time.
+
+        Uses the fast model when one is configured and a small output budget;
+        if the call fails or takes longer than ``triage_phase1_timeout_seconds``,
+        returns the rule-based preliminary triage.
+        """
+        tier, llm = ("fast", self.fast_llm) if self.fast_llm is not None else ("large", self.llm)
+        prompt = self.level_prompt_template.format_messages(
+            input=self._build_input(request, patient_history)
+        )
+        try:
+            started = time.perf_counter()
+            response = await asyncio.wait_for(
+                self._ainvoke_tier(
+                    tier,
+                    llm,
+                    prompt,
+                    self.settings.triage_phase1_max_tokens,
+                    self._priority(request),
+                ),
+                timeout=remaining(self.settings.triage_phase1_timeout_seconds),
             )
+            TRIAGE_LLM_LATENCY.labels(tier="level").observe(time.perf_counter() - started)
+            triage_response = self._parse_level_response(response.content, request)
+        except Exception as e:
+            logger.error(f"Error in preliminary triage assessment: {e!r}")
+            triage_response = get_rule_engine().preliminary_response(request)
+        triage_response.assessment_status = AssessmentStatus.PRELIMINARY
+        return triage_response
+
+    def _assess_with_cascade(
+        self, request: TriageRequest, patient_history: Dict[str, Any]
+    ) -> TriageResponse:
+        """Assess with the fast model, escalating to the large model when its answer isn't kept."""
+        user_input = self._build_input(request, patient_history)
+        mode = request.response_mode
+        max_tokens = self._max_tokens(mode)
+        priority = self._priority(request)
+        triage_response = self._try_fast_tier(request, user_input, max_tokens, priority)
+        if triage_response:
+            return triage_response
+
+        started = time.perf_counter()
+        response = self._invoke_tier(
+            "large",
+            self.llm,
+            self.prompt_templates[mode].format_messages(input=user_input),
+            max_tokens,
+            priority,
+        )
+        TRIAGE_LLM_LATENCY.labels(tier="large").observe(time.perf_counter() - started)
+        return self._parse_response(response.content, request)
 
-            vital_signs_text = ""
-            if request.vital_signs:
-                vital_signs_text = "\n".join(
-                    [f"- {k}: {v}" for k, v in request.vital_signs.items()]
+    async def _assess_with_cascade_async(
+        self, request: TriageRequest, patient_history: Dict[str, Any]
+    ) -> TriageResponse:
+        """Assess with the fast model, escalating to the large model when its answer isn't kept."""
+        user_input = self._build_input(request, patient_history)
+        mode = request.response_mode
+        max_tokens = self._max_tokens(mode)
+        priority = self._priority(request)
+        triage_response = await self._atry_fast_tier(request, user_input, max_tokens, priority)
+        if triage_response:
+            return triage_response
+
+        started = time.perf_counter()
+        response = await self._ainvoke_tier(
+            "large",
+            self.llm,
+            self.prompt_templates[mode].format_messages(input=user_input),
+            max_tokens,
+            priority,
+        )
+        TRIAGE_LLM_LATENCY.labels(tier="large").observe(time.perf_counter() - started)
+        return self._parse_response(response.content, request)
+
+    def _try_fast_tier(
+        self, request: TriageRequest, user_input: str, max_tokens: int, priority: int
+    ) -> Optional[TriageResponse]:
+        """Assess with the fast model, or None when there is none or its answer isn't kept."""
+        if self.fast_llm is None:
+            return None
+        started = time.perf_counter()
+        try:
+            response = self._invoke_tier(
+                "fast",
+                self.fast_llm,
+                self.fast_prompt_templates[request.response_mode].format_messages(
+                    input=user_input
+                ),
+                max_tokens,
+                priority,
+            )
+            outcome, triage_response = self._review_fast_answer(response.content, request)
+        except Exception as e:
+            logger.warning(f"Fast triage model failed, escalating: {e}")
+            outcome, triage_response = "escalated_error", None
+        self._record_fast_tier(started, outcome)
+        return triage_response
+
+    async def _atry_fast_tier(
+        self, request: TriageRequest, user_input: str, max_tokens: int, priority: int
+    ) -> Optional[TriageResponse]:
+        """Assess with the fast model without blocking the event loop."""
+        if self.fast_llm is None:
+            return None
+        started = time.perf_counter()
+        try:
+            response = await self._ainvoke_tier(
+                "fast",
+                self.fast_llm,
+                self.fast_prompt_templates[request.response_mode].format_messages(
+                    input=user_input
+                ),
+                max_tokens,
+                priority,
+            )
+            outcome, triage_response = self._review_fast_answer(response.content, request)
+        except Exception as e:
+            logger.warning(f"Fast triage model failed, escalating: {e}")
+            outcome, triage_response = "escalated_error", None
+        self._record_fast_tier(started, outcome)
+        return triage_response
+
+    async def _astream_fast_tier(
+        self, request: TriageRequest, user_input: str, max_tokens: int, priority: int
+    ) -> Optional[TriageResponse]:
+        """Stream the fast model's answer, or None when there is none or it isn't kept.
+
+        The stream is abandoned once the answer's level is one the fast tier
+        never decides, so those cases only wait for its first tokens.
+        """
+        if self.fast_llm is None:
+            return None
+        started = time.perf_counter()
+        parser = JsonFieldParser()
+        escalated_levels = {level.value for level in ESCALATED_LEVELS}
+        outcome, triage_response = "escalated_acuity", None
+        stream = self._astream_hedged(
+            self._tier_model_id("fast"),
+            self.fast_llm,
+            self.fast_prompt_templates[request.response_mode].format_messages(input=user_input),
+            max_tokens,
+            priority,
+        )
+        try:
+            async for chunk in stream:
+                fields = self._expand_terse(dict(parser.feed(chunk)), request)
+                if fields.get("triage_level") in escalated_levels:
+                    break
+            else:
+                outcome, triage_response = self._review_fast_answer(parser.text, request)
+        except Exception as e:
+            logger.warning(f"Fast triage model failed, escalating: {e}")
+            outcome = "escalated_error"
+        finally:
+            await stream.aclose()
+        self._record_fast_tier(started, outcome)
+        return triage_response
+
+    def _invoke_tier(
+        self, tier: str, llm, prompt: List[BaseMessage], max_tokens: int, priority: int = 0
+    ) -> BaseMessage:
+        """Invoke a cascade tier, caching its system prompt when the model supports it.
+
+        The call first waits for the tier model's rate limiter, served by
+        ``priority``, then is hedged across Bedrock targets within the request deadline;
+        each hedged or failover attempt is charged to the rate limiter too.
+        """
+        model_id = self._tier_model_id(tier)
+        self._acquire_quota(model_id, prompt, max_tokens, priority)
+
+        def call(target: str) -> BaseMessage:
+            target_llm = self._target_llm(llm, target)
+            if not self._uses_prompt_cache(target_llm):
+                return target_llm.invoke(prompt, max_tokens=max_tokens)
+            response = invoke_with_prompt_cache(
+                self._target_client(target),
+                target_llm.model_id,
+                prompt,
+                {**(target_llm.model_kwargs or {}), "max_tokens": max_tokens},
+            )
+            self._record_prompt_usage(tier, response)
+            return response
+
+        return self._hedged(model_id).call(
+            self._quota_per_attempt(call, model_id, prompt, max_tokens, priority),
+            timeout=remaining(),
+        )
+
+    async def _ainvoke_tier(
+        self, tier: str, llm, prompt: List[BaseMessage], max_tokens: int, priority: int = 0
+    ) -> BaseMessage:
+        """Invoke a cascade tier without blocking the event loop, caching its system prompt."""
+        model_id = self._tier_model_id(tier)
+        await self._aacquire_quota(model_id, prompt, max_tokens, priority)
+
+        async def call(target: str) -> BaseMessage:
+            target_llm = self._target_llm(llm, target)
+            if not self._uses_prompt_cache(target_llm):
+                return await target_llm.ainvoke(prompt, max_tokens=max_tokens)
+            response = await asyncio.to_thread(
+                invoke_with_prompt_cache,
+                self._target_client(target),
+                target_llm.model_id,
+                prompt,
+                {**(target_llm.model_kwargs or {}), "max_tokens": max_tokens},
+            )
+            self._record_prompt_usage(tier, response)
+            return response
+
+        return await self._hedged(model_id).acall(
+            self._aquota_per_attempt(call, model_id, prompt, max_tokens, priority),
+            timeout=remaining(),
+        )
+
+    def _tier_model_id(self, tier: str) -> str:
+        """Bedrock model ID of a cascade tier."""
+        return self.settings.bedrock_fast_model_id if tier == "fast" else self.model_id
+
+    @staticmethod
+    def _priority(request: TriageRequest) -> int:
+        """Rank a request for Bedrock quota by its red flags and most severe symptom."""
+        return get_rule_engine().urgency(request)
+
+    def _max_tokens(self, mode: ResponseMode) -> int:
+        """Get the output token budget of a response mode."""
+        if mode == ResponseMode.TERSE:
+            return self.settings.triage_terse_max_tokens
+        return self.settings.triage_verbose_max_tokens
+
+    def _uses_prompt_cache(self, llm) -> bool:
+        """Whether calls to ``llm`` should mark the system prompt as cacheable."""
+        return (
+            self.settings.bedrock_prompt_caching
+            and isinstance(llm, ChatBedrock)
+            and supports_prompt_caching(llm.model_id)
+        )
+
+    @staticmethod
+    def _record_prompt_usage(tier: str, response: BaseMessage):
+        """Record the cached-token counts and time to first token of one call."""
+        usage = response.additional_kwargs["usage"]
+        cache_read = usage["cache_read_input_tokens"]
+        cache_write = usage["cache_creation_input_tokens"]
+        uncached = usage["prompt_tokens"] - cache_read - cache_write
+        TRIAGE_PROMPT_TOKENS.labels(tier=tier, status="cache_read").inc(cache_read)
+        TRIAGE_PROMPT_TOKENS.labels(tier=tier, status="cache_write").inc(cache_write)
+        TRIAGE_PROMPT_TOKENS.labels(tier=tier, status="uncached").inc(uncached)
+        if usage["time_to_first_token"] is not None:
+            TRIAGE_TIME_TO_FIRST_TOKEN.labels(tier=tier).observe(usage["time_to_first_token"])
+        logger.info(
+            f"Triage {tier} call: {cache_read} cached, {cache_write} cache-written and "
+            f"{uncached} uncached input tokens, first token after {usage['time_to_first_token']}s"
+        )
+
+    def _review_fast_answer(
+        self, response_text: str, request: TriageRequest
+    ) -> Tuple[str, Optional[TriageResponse]]:
+        """Decide whether to keep a fast-tier answer, returning the outcome and kept response."""
+        try:
+            result = self._extract_result(response_text, request)
+            triage_response = self._build_response(result, request)
+            confidence = float(result.get("confidence", 0))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.info(f"Unparseable fast triage answer, escalating: {e}")
+            return "escalated_parse_error", None
+
+        if triage_response.triage_level in ESCALATED_LEVELS:
+            return "escalated_acuity", None
+        if confidence < self.settings.triage_cascade_confidence_threshold:
+            return "escalated_low_confidence", None
+        return "accepted", triage_response
+
+    @staticmethod
+    def _record_fast_tier(started: float, outcome: str):
+        """Record the latency and outcome of a fast-tier call."""
+        TRIAGE_LLM_LATENCY.labels(tier="fast").observe(time.perf_counter() - started)
+        TRIAGE_CASCADE_DECISIONS.labels(outcome=outcome).inc()
+        logger.info(f"Fast triage tier outcome: {outcome}")
+
+    async def astream_triage(
+        self, request: TriageRequest, patient_history: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a triage assessment as ``(field, value)`` pairs while the LLM generates it.
+
+        The fast tier's answer is streamed first and dropped as soon as its
+        level needs escalation; a kept fast answer is yielded once it is
+        reviewed. Otherwise each top-level field of the large model's streamed
+        answer is yielded as soon as it is complete.
+        The last pair is ``("result", TriageResponse)``, which is authoritative:
+        it is the fallback response if the answer turns out to be invalid.
+        """
+        cache_key = self.result_cache.key(request, patient_history)
+        cached = await self.result_cache.aget(cache_key)
+        if cached:
+            for field in RESPONSE_FIELD_NAMES:
+                yield field, getattr(cached, field)
+            yield "result", cached
+            return
+
+        try:
+            mode = request.response_mode
+            user_input = self._build_input(request, patient_history)
+            max_tokens = self._max_tokens(mode)
+            priority = self._priority(request)
+            started = time.perf_counter()
+            triage_response = await self._astream_fast_tier(
+                request, user_input, max_tokens, priority
+            )
+            if triage_response:
+                for field in RESPONSE_FIELD_NAMES:
+                    yield field, getattr(triage_response, field)
+            else:
+                parser = JsonFieldParser()
+                large_started = time.perf_counter()
+                async for chunk in self._astream_hedged(
+                    self.model_id,
+                    self.llm,
+                    self.prompt_templates[mode].format_messages(input=user_input),
+                    max_tokens,
+                    priority,
+                ):
+                    for field, value in parser.feed(chunk):
+                        for streamed in self._expand_terse({field: value}, request).items():
+                            yield streamed
+                TRIAGE_LLM_LATENCY.labels(tier="large").observe(
+                    time.perf_counter() - large_started
                 )
+                triage_response = self._parse_response(parser.text, request)
+            llm_seconds = time.perf_counter() - started
+
+            await self.result_cache.aset(cache_key, triage_response, llm_seconds)
 
-            patient_context = f"""
+        except Exception as e:
+            logger.error(f"Error in streamed triage assessment: {e}")
+            triage_response = self._fallback_response(request, e)
+
+        yield "result", triage_response
+
+    async def assess_triage_packed_async(
+        self, cases: List[Tuple[TriageRequest, Dict[str, Any]]]
+    ) -> List[TriageResponse]:
+        """Assess several patients with one LLM call, returning results in input order.
+
+        The model answers with a JSON array keyed by patient_id. Patients whose
+        entry is missing or malformed, repeated in ``cases`` or with a different
+        response mode than the first case fall back to a single-patient assessment.
+        """
+        results: List[Optional[TriageResponse]] = [None] * len(cases)
+        pending: Dict[str, int] = {}
+        mode = cases[0][0].response_mode if cases else ResponseMode.VERBOSE
+        for index, (request, patient_history) in enumerate(cases):
+            cached = await self.result_cache.aget(self.result_cache.key(request, patient_history))
+            if cached:
+                results[index] = cached
+            elif request.patient_id not in pending and request.response_mode == mode:
+                pending[request.patient_id] = index
+
+        if len(pending) > 1:
+            packed = [cases[index] for index in pending.values()]
+            try:
+                prompt = self.packed_prompt_templates[mode].format_messages(
+                    input=self._build_packed_input(packed)
+                )
+                max_tokens = min(self._max_tokens(mode) * len(packed), PACKED_MAX_TOKENS)
+                started = time.perf_counter()
+                priority = max(self._priority(request) for request, _ in packed)
+                response = await self._ainvoke_tier(
+                    "large", self.llm, prompt, max_tokens, priority
+                )
+                llm_seconds = time.perf_counter() - started
+
+                parsed = self._parse_packed_response(
+                    response.content, [request for request, _ in packed]
+                )
+                self._record_tokens_saved(prompt, packed, response, len(parsed))
+                for patient_id, triage_response in parsed.items():
+                    request, patient_history = cases[pending[patient_id]]
+                    results[pending[patient_id]] = triage_response
+                    await self.result_cache.aset(
+                        self.result_cache.key(request, patient_history),
+                        triage_response,
+                        llm_seconds / len(packed),
+                    )
+
+            except Exception as e:
+                logger.error(f"Error in packed triage assessment: {e}")
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing and len(pending) > 1:
+            TRIAGE_PACKED_FALLBACKS.inc(len(missing))
+            logger.warning(f"Falling back to single-patient triage for {len(missing)} patients")
+        fallbacks = await asyncio.gather(
+            *(self.assess_triage_async(*cases[index]) for index in missing)
+        )
+        for index, triage_response in zip(missing, fallbacks):
+            results[index] = triage_response
+
+        return results
+
+    @staticmethod
+    def _build_case(request: TriageRequest, patient_history: Dict[str, Any]) -> str:
+        """Describe one patient's history, symptoms, vital signs and context."""
+        symptoms_text = "\n".join(
+            [
+                f"- {s.name}: Severidad {s.severity}/10, Duración: {s.duration_hours or 'desconocida'} horas"
+                for s in request.symptoms
+            ]
+        )
+
+        vital_signs_text = ""
+        if request.vital_signs:
+            vital_signs_text = "\n".join(
+                [f"- {k}: {v}" for k, v in request.vital_signs.items()]
+            )
+
+        patient_context = f"""
 Historial del paciente:
 - Edad: {patient_history.get('age', 'desconocida')} años
 - Tipo de sangre: {patient_history.get('blood_type', 'desconocido')}
@@ -98,10 +727,7 @@ Historial del paciente:
 - Medicamentos actuales: {', '.join(patient_history.get('current_medications', [])) or 'ninguno'}
 """
 
-            input_text = f"""
-EVALUACIÓN DE TRIAJE
-
-{patient_context}
+        return f"""{patient_context}
 
 SÍNTOMAS ACTUALES:
 {symptoms_text}
@@ -110,57 +736,163 @@ SIGNOS VITALES:
 {vital_signs_text if vital_signs_text else "No proporcionados"}
 
 CONTEXTO ADICIONAL:
-{request.additional_context or "Ninguno"}
+{request.additional_context or "Ninguno"}"""
+
+    @classmethod
+    def _build_input(cls, request: TriageRequest, patient_history: Dict[str, Any]) -> str:
+        """Build the human message describing the patient and their symptoms."""
+        return f"""
+EVALUACIÓN DE TRIAJE
+
+{cls._build_case(request, patient_history)}
 
 Por favor, realiza una evaluación completa de triaje y proporciona tu respuesta en formato JSON.
 """
 
-            # Invoke LLM
-            prompt = self.prompt_template.format_messages(input=input_text)
-            response = self.llm.invoke(prompt)
-            
-            # Parse response
-            response_text = response.content.strip()
-            
-            # Extract JSON from response (handle markdown code blocks)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(response_text)
-
-            # Create TriageResponse
-            triage_response = TriageResponse(
-                triage_id=f"TRI-{uuid.uuid4().hex[:8].upper()}",
-                patient_id=request.patient_id,
-                triage_level=TriageLevel(result["triage_level"]),
-                priority_score=result["priority_score"],
-                assessment_summary=result["assessment_summary"],
-                recommended_action=result["recommended_action"],
-                recommended_specialty=result.get("recommended_specialty"),
-                recommended_tests=result.get("recommended_tests", []),
-                risk_factors=result.get("risk_factors", []),
-                warning_signs=result.get("warning_signs", []),
-                estimated_wait_time=result.get("estimated_wait_time"),
-                agent_reasoning=result.get("agent_reasoning"),
-                created_at=datetime.utcnow().isoformat(),
-            )
+    @classmethod
+    def _build_packed_input(cls, cases: List[Tuple[TriageRequest, Dict[str, Any]]]) -> str:
+        """Build the human message describing several patients."""
+        patients_text = "\n\n".join(
+            f"=== PACIENTE patient_id: {request.patient_id} ==={cls._build_case(request, history)}"
+            for request, history in cases
+        )
+        return f"""
+EVALUACIÓN DE TRIAJE DE {len(cases)} PACIENTES
 
-            logger.info(
-                f"Triage assessment completed for patient {request.patient_id}: {triage_response.triage_level}"
-            )
-            return triage_response
+{patients_text}
 
-        except Exception as e:
-            logger.error(f"Error in triage assessment: {e}")
-            # Return a safe default response
-            return TriageResponse(
-                triage_id=f"TRI-{uuid.uuid4().hex[:8].upper()}",
-                patient_id=request.patient_id,
-                triage_level=TriageLevel.URGENT,
-                priority_score=50,
-                assessment_summary="Error en la evaluación automática. Se requiere evaluación manual.",
-                recommended_action="Contactar con personal médico para evaluación manual.",
-                agent_reasoning=f"Error del sistema: {str(e)}",
+Por favor, realiza una evaluación completa de triaje de cada paciente y proporciona tu respuesta \
+como un array JSON con un objeto por paciente, incluyendo su patient_id.
+"""
+
+    @staticmethod
+    def _extract_json(response_text: str) -> Any:
+        """Parse the JSON in an LLM answer, handling markdown code blocks."""
+        response_text = response_text.strip()
+
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+
+        return json.loads(response_text)
+
+    def _extract_result(self, response_text: str, request: TriageRequest) -> Any:
+        """Parse the JSON of a single-patient answer, expanding terse keys."""
+        return self._expand_terse(self._extract_json(response_text), request)
+
+    def _expand_terse(self, result: Any, request: TriageRequest) -> Any:
+        """Map a terse answer's short keys to full field names and cap its lists."""
+        if request.response_mode != ResponseMode.TERSE or not isinstance(result, dict):
+            return result
+        max_items = self.settings.triage_terse_max_list_items
+        expanded = {}
+        for key, value in result.items():
+            if isinstance(value, list):
+                value = value[:max_items]
+            expanded[TERSE_KEYS.get(key, key)] = value
+        return expanded
+
+    def _parse_response(self, response_text: str, request: TriageRequest) -> TriageResponse:
+        """Parse the LLM's JSON answer into a TriageResponse."""
+        triage_response = self._build_response(
+            self._extract_result(response_text, request), request
+        )
+
+        logger.info(
+            f"Triage assessment completed for patient {request.patient_id}: {triage_response.triage_level}"
+        )
+        return triage_response
+
+    def _parse_level_response(self, response_text: str, request: TriageRequest) -> TriageResponse:
+        """Parse a phase-1 answer, filling the details with placeholders until phase 2."""
+        answer = self._extract_json(response_text)
+        result = {TERSE_KEYS.get(key, key): value for key, value in answer.items()}
+        level = TriageLevel(result["triage_level"])
+        result.setdefault("assessment_summary", PRELIMINARY_SUMMARY)
+        result.setdefault("recommended_action", RECOMMENDED_ACTIONS[level])
+        if not result.get("estimated_wait_time"):
+            result["estimated_wait_time"] = ESTIMATED_WAIT_TIMES[level]
+        return self._build_response(result, request)
+
+    def _parse_packed_response(
+        self, response_text: str, requests: List[TriageRequest]
+    ) -> Dict[str, TriageResponse]:
+        """Parse a packed JSON array answer, keyed by patient ID.
+
+        Entries that are malformed or for unexpected patients are skipped.
+        """
+        results = self._extract_json(response_text)
+        if not isinstance(results, list):
+            raise ValueError("Packed triage answer is not a JSON array")
+
+        requests_by_id = {request.patient_id: request for request in requests}
+        parsed = {}
+        for result in results:
+            patient_id = result.get("patient_id") if isinstance(result, dict) else None
+            if patient_id not in requests_by_id or patient_id in parsed:
+                continue
+            request = requests_by_id[patient_id]
+            try:
+                parsed[patient_id] = self._build_response(
+                    self._expand_terse(result, request), request
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Malformed packed triage entry for {patient_id}: {e}")
+
+        logger.info(f"Packed triage assessment completed for {len(parsed)}/{len(requests)} patients")
+        return parsed
+
+    @staticmethod
+    def _build_response(result: Dict[str, Any], request: TriageRequest) -> TriageResponse:
+        """Build a TriageResponse from one parsed JSON result."""
+        return TriageResponse(
+            triage_id=f"TRI-{uuid.uuid4().hex[:8].upper()}",
+            patient_id=request.patient_id,
+            triage_level=TriageLevel(result["triage_level"]),
+            priority_score=result["priority_score"],
+            assessment_summary=result["assessment_summary"],
+            recommended_action=result["recommended_action"],
+            recommended_specialty=result.get("recommended_specialty"),
+            recommended_tests=result.get("recommended_tests", []),
+            risk_factors=result.get("risk_factors", []),
+            warning_signs=result.get("warning_signs", []),
+            estimated_wait_time=result.get("estimated_wait_time"),
+            agent_reasoning=result.get("agent_reasoning"),
+            created_at=datetime.utcnow().isoformat(),
+        )
+
+    def _record_tokens_saved(
+        self,
+        prompt: List[BaseMessage],
+        cases: List[Tuple[TriageRequest, Dict[str, Any]]],
+        response: BaseMessage,
+        assessed: int,
+    ):
+        """Record the input tokens a packed call saved per assessed patient.
+
+        Compares the packed prompt with the single-patient prompts it replaced,
+        using Bedrock's reported input token count to convert characters to tokens.
+        """
+        if not assessed:
+            return
+        packed_chars = sum(len(message.content) for message in prompt)
+        single_chars = sum(
+            len(message.content)
+            for request, history in cases
+            for message in self.prompt_templates[request.response_mode].format_messages(
+                input=self._build_input(request, history)
             )
+        )
+        prompt_tokens = response.additional_kwargs.get("usage", {}).get("prompt_tokens")
+        tokens_per_char = prompt_tokens / packed_chars if prompt_tokens else 1 / CHARS_PER_TOKEN
+
+        saved_per_patient = (single_chars - packed_chars) * tokens_per_char / len(cases)
+        for _ in range(assessed):
+            TRIAGE_PACKED_TOKENS_SAVED.observe(saved_per_patient)
+        logger.info(f"Packed triage saved ~{saved_per_patient:.0f} input tokens per patient")
+
+    @staticmethod
+    def _fallback_response(request: TriageRequest, error: Exception) -> TriageResponse:
+        """Build a rule-based response when the automatic assessment fails."""
+        return get_rule_engine().fallback_response(request, error)
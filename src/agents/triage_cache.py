@@ -0,0 +1,188 @@
+"""Exact-match cache for triage results."""
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from src.config import get_settings
+from src.metrics import (
+    TRIAGE_CACHE_LOOKUPS,
+    TRIAGE_CACHE_SAVED_SECONDS,
+    TRIAGE_IDEMPOTENT_REPLAYS,
+)
+from src.models.triage import TriageRequest, TriageResponse
+from src.services.cache import MISSING, get_cache
+
+logger = logging.getLogger(__name__)
+
+
+def request_fingerprint(request: TriageRequest) -> str:
+    """Hash a triage request after normalizing away differences that don't change it.
+
+    Symptom names and free text are trimmed and lower-cased, and symptoms are
+    sorted, so re-submissions of the same form produce the same fingerprint.
+    """
+    symptoms = sorted(
+        (
+            {
+                "name": symptom.name.strip().lower(),
+                "severity": symptom.severity,
+                "duration_hours": symptom.duration_hours,
+                "description": (symptom.description or "").strip().lower(),
+            }
+            for symptom in request.symptoms
+        ),
+        key=lambda symptom: json.dumps(symptom, sort_keys=True),
+    )
+    canonical = {
+        "patient_id": request.patient_id.strip(),
+        "symptoms": symptoms,
+        "vital_signs": request.vital_signs or {},
+        "additional_context": (request.additional_context or "").strip().lower(),
+        "response_mode": request.response_mode.value,
+    }
+    return _hash(canonical)
+
+
+def history_fingerprint(patient_history: Dict[str, Any]) -> str:
+    """Hash a patient history dict."""
+    return _hash(patient_history)
+
+
+def _hash(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CachedTriage(BaseModel):
+    """A cached triage result and the LLM latency it took to produce."""
+
+    response: TriageResponse
+    llm_seconds: float
+
+
+class TriageResultCache:
+    """Short-lived cache of LLM triage results keyed by request and history fingerprints."""
+
+    def __init__(self):
+        """Initialize the triage result cache."""
+        self.settings = get_settings()
+        self.enabled = self.settings.triage_cache_enabled
+        self.cache = get_cache(
+            "triage_result",
+            CachedTriage,
+            self.settings.triage_cache_ttl_seconds,
+            max_size=self.settings.triage_cache_max_size,
+        )
+
+    @staticmethod
+    def key(request: TriageRequest, patient_history: Dict[str, Any]) -> str:
+        """Build the cache key for a request and the history it was assessed with."""
+        return f"{request_fingerprint(request)}:{history_fingerprint(patient_history)}"
+
+    def get(self, key: str) -> Optional[TriageResponse]:
+        """Get a cached result as a new triage with its own ID, or None on a miss."""
+        if not self.enabled:
+            return None
+        return self._hit(self.cache.get(key))
+
+    async def aget(self, key: str) -> Optional[TriageResponse]:
+        """Get a cached result like ``get``, reading the shared tier off the event loop."""
+        if not self.enabled:
+            return None
+        return self._hit(await self.cache.aget(key))
+
+    @staticmethod
+    def _hit(cached: Any) -> Optional[TriageResponse]:
+        """Count a lookup and copy a cached result into a new triage, or None on a miss."""
+        if cached is MISSING or cached is None:
+            TRIAGE_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None
+
+        TRIAGE_CACHE_LOOKUPS.labels(result="hit").inc()
+        TRIAGE_CACHE_SAVED_SECONDS.inc(cached.llm_seconds)
+        logger.info(f"Triage cache hit, skipped {cached.llm_seconds:.2f}s of LLM time")
+        return cached.response.model_copy(
+            update={
+                "triage_id": f"TRI-{uuid.uuid4().hex[:8].upper()}",
+                "created_at": datetime.utcnow().isoformat(),
+            }
+        )
+
+    def set(self, key: str, response: TriageResponse, llm_seconds: float):
+        """Cache an LLM triage result."""
+        if self.enabled:
+            self.cache.set(key, CachedTriage(response=response, llm_seconds=llm_seconds))
+
+    async def aset(self, key: str, response: TriageResponse, llm_seconds: float):
+        """Cache an LLM triage result, writing the shared tier off the event loop."""
+        if self.enabled:
+            await self.cache.aset(key, CachedTriage(response=response, llm_seconds=llm_seconds))
+
+
+class IdempotencyConflictError(ValueError):
+    """An Idempotency-Key was reused for a different triage request."""
+
+
+class IdempotentTriage(BaseModel):
+    """The response stored for an Idempotency-Key and the request it answered."""
+
+    request_fingerprint: str
+    response: TriageResponse
+
+
+class TriageIdempotencyStore:
+    """Triage responses keyed by client Idempotency-Key, replayed for repeats within a window.
+
+    The store has its own size limit, so keys stay replayable for the whole window
+    instead of being evicted along with short-lived triage results.
+    """
+
+    def __init__(self):
+        """Initialize the idempotency store."""
+        self.settings = get_settings()
+        self.cache = get_cache(
+            "triage_idempotency",
+            IdempotentTriage,
+            self.settings.triage_idempotency_ttl_seconds,
+            max_size=self.settings.triage_idempotency_max_size,
+        )
+
+    def get(self, key: str, request: TriageRequest) -> Optional[TriageResponse]:
+        """Get the stored response for a key, or None if the key is new or expired.
+
+        Raises IdempotencyConflictError if the key was used for a different request.
+        """
+        return self._replay(key, request, self.cache.get(key))
+
+    async def aget(self, key: str, request: TriageRequest) -> Optional[TriageResponse]:
+        """Get the stored response for a key like ``get``, reading the shared tier off the loop."""
+        return self._replay(key, request, await self.cache.aget(key))
+
+    @staticmethod
+    def _replay(key: str, request: TriageRequest, stored: Any) -> Optional[TriageResponse]:
+        """Return a stored response for replay, checking it answered the same request."""
+        if stored is MISSING or stored is None:
+            return None
+        if stored.request_fingerprint != request_fingerprint(request):
+            raise IdempotencyConflictError(
+                f"Idempotency-Key {key} was already used for a different triage request"
+            )
+        TRIAGE_IDEMPOTENT_REPLAYS.inc()
+        logger.info(f"Replaying triage {stored.response.triage_id} for Idempotency-Key {key}")
+        return stored.response
+
+    def set(self, key: str, request: TriageRequest, response: TriageResponse):
+        """Store the response to a request made with an Idempotency-Key."""
+        self.cache.set(key, self._entry(request, response))
+
+    async def aset(self, key: str, request: TriageRequest, response: TriageResponse):
+        """Store a response like ``set``, writing the shared tier off the event loop."""
+        await self.cache.aset(key, self._entry(request, response))
+
+    @staticmethod
+    def _entry(request: TriageRequest, response: TriageResponse) -> IdempotentTriage:
+        """Build the stored entry for a response."""
+        return IdempotentTriage(request_fingerprint=request_fingerprint(request), response=response)
@@ -0,0 +1,386 @@
+"""Deterministic rule-based pre-triage from vital signs and symptom severities."""
+import json
+import logging
+import operator
+import re
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+from src.config import get_settings
+from src.models.triage import TriageLevel, TriageRequest, TriageResponse
+
+logger = logging.getLogger(__name__)
+
+# Accepted spellings of each vital sign in TriageRequest.vital_signs
+VITAL_ALIASES = {
+    "temperature": ["temperature", "temp", "temperatura"],
+    "heart_rate": ["heart_rate", "hr", "pulse", "frecuencia_cardiaca"],
+    "respiratory_rate": ["respiratory_rate", "rr", "frecuencia_respiratoria"],
+    "oxygen_saturation": ["oxygen_saturation", "spo2", "sat_o2", "saturacion_oxigeno"],
+    "systolic_bp": ["systolic_bp", "systolic", "presion_sistolica"],
+    "diastolic_bp": ["diastolic_bp", "diastolic", "presion_diastolica"],
+}
+BLOOD_PRESSURE_KEYS = ["blood_pressure", "bp", "presion_arterial"]
+
+NUMBER_PATTERN = re.compile(r"-?\d+(?:[.,]\d+)?")
+BLOOD_PRESSURE_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*/\s*(\d+(?:[.,]\d+)?)")
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
+# Rules are checked in order; hard rules decide the triage without the LLM
+DEFAULT_RULES = [
+    {
+        "name": "hypoxemia",
+        "field": "oxygen_saturation",
+        "op": "<",
+        "value": 90,
+        "level": "critical",
+        "priority_score": 95,
+        "hard": True,
+        "reason": "Saturación de oxígeno menor a 90%",
+    },
+    {
+        "name": "hypotension",
+        "field": "systolic_bp",
+        "op": "<",
+        "value": 90,
+        "level": "critical",
+        "priority_score": 95,
+        "hard": True,
+        "reason": "Presión sistólica menor a 90 mmHg",
+    },
+    {
+        "name": "max_severity_symptom",
+        "field": "max_severity",
+        "op": ">=",
+        "value": 10,
+        "level": "critical",
+        "priority_score": 90,
+        "hard": True,
+        "reason": "Síntoma de severidad 10/10",
+    },
+    {
+        "name": "extreme_tachycardia",
+        "field": "heart_rate",
+        "op": ">=",
+        "value": 150,
+        "level": "critical",
+        "priority_score": 90,
+        "hard": True,
+        "reason": "Frecuencia cardíaca de 150 lpm o más",
+    },
+    {
+        "name": "bradycardia",
+        "field": "heart_rate",
+        "op": "<",
+        "value": 40,
+        "level": "critical",
+        "priority_score": 90,
+        "hard": True,
+        "reason": "Frecuencia cardíaca menor a 40 lpm",
+    },
+    {
+        "name": "respiratory_distress",
+        "field": "respiratory_rate",
+        "op": ">=",
+        "value": 30,
+        "level": "critical",
+        "priority_score": 90,
+        "hard": True,
+        "reason": "Frecuencia respiratoria de 30 rpm o más",
+    },
+    {
+        "name": "low_saturation",
+        "field": "oxygen_saturation",
+        "op": "<",
+        "value": 94,
+        "level": "urgent",
+        "priority_score": 75,
+        "hard": False,
+        "reason": "Saturación de oxígeno menor a 94%",
+    },
+    {
+        "name": "hypertensive_crisis",
+        "field": "systolic_bp",
+        "op": ">=",
+        "value": 180,
+        "level": "urgent",
+        "priority_score": 75,
+        "hard": False,
+        "reason": "Presión sistólica de 180 mmHg o más",
+    },
+    {
+        "name": "tachycardia",
+        "field": "heart_rate",
+        "op": ">",
+        "value": 120,
+        "level": "urgent",
+        "priority_score": 70,
+        "hard": False,
+        "reason": "Frecuencia cardíaca mayor a 120 lpm",
+    },
+    {
+        "name": "tachypnea",
+        "field": "respiratory_rate",
+        "op": ">",
+        "value": 24,
+        "level": "urgent",
+        "priority_score": 70,
+        "hard": False,
+        "reason": "Frecuencia respiratoria mayor a 24 rpm",
+    },
+    {
+        "name": "high_fever",
+        "field": "temperature",
+        "op": ">=",
+        "value": 39.5,
+        "level": "urgent",
+        "priority_score": 65,
+        "hard": False,
+        "reason": "Temperatura de 39.5 °C o más",
+    },
+    {
+        "name": "severe_symptom",
+        "field": "max_severity",
+        "op": ">=",
+        "value": 8,
+        "level": "urgent",
+        "priority_score": 70,
+        "hard": False,
+        "reason": "Síntoma de severidad 8/10 o más",
+    },
+    {
+        "name": "moderate_symptom",
+        "field": "max_severity",
+        "op": ">=",
+        "value": 5,
+        "level": "semi_urgent",
+        "priority_score": 50,
+        "hard": False,
+        "reason": "Síntoma de severidad 5/10 o más",
+    },
+]
+
+RECOMMENDED_ACTIONS = {
+    TriageLevel.CRITICAL: "Atención médica inmediata en sala de emergencias.",
+    TriageLevel.URGENT: "Evaluación médica en los próximos 15-30 minutos.",
+    TriageLevel.SEMI_URGENT: "Evaluación médica en 1-2 horas; reevaluar si empeora.",
+    TriageLevel.NON_URGENT: "Contactar con personal médico para evaluación manual.",
+    TriageLevel.ROUTINE: "Programar una cita con su médico.",
+}
+ESTIMATED_WAIT_TIMES = {
+    TriageLevel.CRITICAL: "Inmediato",
+    TriageLevel.URGENT: "15-30 minutos",
+    TriageLevel.SEMI_URGENT: "1-2 horas",
+    TriageLevel.NON_URGENT: "2-4 horas",
+    TriageLevel.ROUTINE: "Cita programada",
+}
+
+# Least severe level and priority the fallback triage assigns while the LLM is unavailable
+FALLBACK_FLOOR_LEVEL = TriageLevel.URGENT
+FALLBACK_FLOOR_PRIORITY = 50
+
+
+@dataclass(frozen=True)
+class Vitals:
+    """Vital signs parsed from a triage request."""
+
+    temperature: Optional[float] = None
+    heart_rate: Optional[float] = None
+    respiratory_rate: Optional[float] = None
+    oxygen_saturation: Optional[float] = None
+    systolic_bp: Optional[float] = None
+    diastolic_bp: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class TriageRule:
+    """A compiled pre-triage rule."""
+
+    name: str
+    level: TriageLevel
+    priority_score: int
+    hard: bool
+    reason: str
+    matches: Callable[[Dict[str, Optional[float]]], bool]
+
+
+@dataclass(frozen=True)
+class RuleAssessment:
+    """Outcome of evaluating the rule table against a request."""
+
+    vitals: Vitals
+    matched: List[TriageRule]
+
+    @property
+    def hard(self) -> bool:
+        """Whether a hard rule decides the triage on its own."""
+        return any(rule.hard for rule in self.matched)
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """Read a number from a value such as ``94``, ``"94%"`` or ``"37,5 °C"``."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER_PATTERN.search(str(value))
+    return float(match.group().replace(",", ".")) if match else None
+
+
+def parse_vitals(vital_signs: Optional[Dict[str, Any]]) -> Vitals:
+    """Parse the untyped vital signs of a triage request into typed numbers."""
+    if not vital_signs:
+        return Vitals()
+    normalized = {str(key).strip().lower(): value for key, value in vital_signs.items()}
+
+    values = {}
+    for field_name, aliases in VITAL_ALIASES.items():
+        for alias in aliases:
+            if normalized.get(alias) is not None:
+                values[field_name] = _to_number(normalized[alias])
+                break
+
+    for key in BLOOD_PRESSURE_KEYS:
+        match = BLOOD_PRESSURE_PATTERN.search(str(normalized.get(key) or ""))
+        if match:
+            values.setdefault("systolic_bp", float(match.group(1).replace(",", ".")))
+            values.setdefault("diastolic_bp", float(match.group(2).replace(",", ".")))
+            break
+
+    return Vitals(**values)
+
+
+def compile_rule(spec: Dict[str, Any]) -> TriageRule:
+    """Compile a rule spec into a predicate over request facts."""
+    field_name = spec["field"]
+    compare = OPERATORS[spec["op"]]
+    threshold = float(spec["value"])
+
+    def matches(facts: Dict[str, Optional[float]]) -> bool:
+        value = facts.get(field_name)
+        return value is not None and compare(value, threshold)
+
+    return TriageRule(
+        name=spec["name"],
+        level=TriageLevel(spec["level"]),
+        priority_score=int(spec["priority_score"]),
+        hard=bool(spec.get("hard", False)),
+        reason=spec["reason"],
+        matches=matches,
+    )
+
+
+class TriageRuleEngine:
+    """Evaluates a compiled rule table against triage requests."""
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        """Compile the rule table, using the default rules if none are given."""
+        self.rules = [compile_rule(spec) for spec in (rules or DEFAULT_RULES)]
+
+    def evaluate(self, request: TriageRequest) -> RuleAssessment:
+        """Evaluate every rule against a request."""
+        vitals = parse_vitals(request.vital_signs)
+        facts = {field.name: getattr(vitals, field.name) for field in fields(Vitals)}
+        facts["max_severity"] = float(max(symptom.severity for symptom in request.symptoms))
+        matched = [rule for rule in self.rules if rule.matches(facts)]
+        return RuleAssessment(vitals=vitals, matched=matched)
+
+    def urgency(self, request: TriageRequest) -> int:
+        """Rank a request for scarce capacity by its red flags and most severe symptom (0-100)."""
+        matched = self.evaluate(request).matched
+        max_severity = max(symptom.severity for symptom in request.symptoms)
+        return max([rule.priority_score for rule in matched] + [max_severity * 10])
+
+    def hard_response(
+        self, request: TriageRequest, assessment: Optional[RuleAssessment] = None
+    ) -> Optional[TriageResponse]:
+        """Get the triage decided by hard rules alone, or None if no hard rule matches."""
+        assessment = assessment or self.evaluate(request)
+        if not assessment.hard:
+            return None
+        return self._build_response(
+            request,
+            [rule for rule in assessment.matched if rule.hard],
+            reasoning="Triaje por reglas clínicas de criterio duro",
+        )
+
+    def preliminary_response(self, request: TriageRequest) -> TriageResponse:
+        """Get a rule-based triage to show until a full assessment is available."""
+        return self._build_response(
+            request,
+            self.evaluate(request).matched,
+            reasoning="Triaje preliminar por reglas clínicas",
+        )
+
+    def fallback_response(self, request: TriageRequest, error: Exception) -> TriageResponse:
+        """Get a rule-based triage for when the LLM assessment fails.
+
+        The result is never less severe than URGENT/50: without the LLM a
+        patient no rule recognises must not drop to the back of the queue.
+        """
+        assessment = self.evaluate(request)
+        response = self._build_response(
+            request,
+            assessment.matched,
+            reasoning=(
+                "Triaje por reglas clínicas; evaluación automática no disponible: "
+                f"{str(error) or type(error).__name__}"
+            ),
+        )
+        levels = list(TriageLevel)
+        if levels.index(response.triage_level) > levels.index(FALLBACK_FLOOR_LEVEL):
+            response.triage_level = FALLBACK_FLOOR_LEVEL
+            response.recommended_action = RECOMMENDED_ACTIONS[FALLBACK_FLOOR_LEVEL]
+            response.estimated_wait_time = ESTIMATED_WAIT_TIMES[FALLBACK_FLOOR_LEVEL]
+        response.priority_score = max(response.priority_score, FALLBACK_FLOOR_PRIORITY)
+        response.assessment_summary = (
+            "Evaluación automática no disponible, se requiere evaluación manual. "
+            + response.assessment_summary
+        )
+        return response
+
+    @staticmethod
+    def _build_response(
+        request: TriageRequest, matched: List[TriageRule], reasoning: str
+    ) -> TriageResponse:
+        """Build a response from the most severe of the matched rules."""
+        top = max(matched, key=lambda rule: rule.priority_score, default=None)
+        level = top.level if top else TriageLevel.NON_URGENT
+        return TriageResponse(
+            triage_id=f"TRI-{uuid.uuid4().hex[:8].upper()}",
+            patient_id=request.patient_id,
+            triage_level=level,
+            priority_score=top.priority_score if top else 30,
+            assessment_summary=(
+                "; ".join(rule.reason for rule in matched)
+                or "Sin criterios de alarma en signos vitales ni síntomas"
+            ),
+            recommended_action=RECOMMENDED_ACTIONS[level],
+            warning_signs=[rule.reason for rule in matched],
+            estimated_wait_time=ESTIMATED_WAIT_TIMES[level],
+            agent_reasoning=reasoning,
+            created_at=datetime.utcnow().isoformat(),
+        )
+
+
+@lru_cache()
+def get_rule_engine() -> TriageRuleEngine:
+    """Get the process-wide rule engine, loading the rule table from settings."""
+    settings = get_settings()
+    rules = None
+    if settings.triage_rules_path:
+        try:
+            with open(settings.triage_rules_path, encoding="utf-8") as rules_file:
+                rules = json.load(rules_file)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading triage rules from {settings.triage_rules_path}: {e}")
+    return TriageRuleEngine(rules)
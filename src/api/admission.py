@@ -0,0 +1,117 @@
+"""Admission control and load shedding for expensive endpoints."""
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Tuple
+from src.metrics import API_ADMISSION_QUEUE_DEPTH, API_ADMISSIONS, API_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """A request was shed because the endpoint is saturated."""
+
+    def __init__(self, name: str, reason: str, retry_after_seconds: int):
+        """Initialize the rejection with the seconds after which clients may retry."""
+        super().__init__(f"{name} is saturated ({reason}), retry after {retry_after_seconds}s")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a short FIFO queue in front of it.
+
+    Requests beyond ``max_in_flight`` wait up to ``queue_timeout_seconds`` in a
+    queue of at most ``max_queue``; past either bound they are rejected right
+    away instead of piling up. Exempt requests are always admitted, and count
+    towards the limit while they run. A request may take several units of the
+    limit, e.g. one per patient in a batch; it never takes more than the whole
+    limit, so an oversized batch runs alone rather than never.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: int,
+    ):
+        """Initialize the controller."""
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+
+    @asynccontextmanager
+    async def admit(self, exempt: bool = False, units: int = 1) -> AsyncIterator[None]:
+        """Hold ``units`` admission slots for the duration of the block.
+
+        Raises AdmissionRejected when the request is shed.
+        """
+        units = max(1, min(units, self.max_in_flight))
+        await self._acquire(exempt, units)
+        try:
+            yield
+        finally:
+            self._release(units)
+
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    async def _acquire(self, exempt: bool, units: int):
+        """Take slots, queueing for them briefly if not enough are free."""
+        if self.in_flight + units <= self.max_in_flight and not self._waiters:
+            self._admit("admitted", units)
+            return
+        if exempt:
+            self._admit("exempt", units)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed("shed_queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (future, units)
+        self._waiters.append(waiter)
+        API_ADMISSION_QUEUE_DEPTH.labels(name=self.name).set(len(self._waiters))
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._shed("shed_timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slots were handed over just as the request was cancelled
+                self._release(units)
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            API_ADMISSION_QUEUE_DEPTH.labels(name=self.name).set(len(self._waiters))
+        API_ADMISSIONS.labels(name=self.name, outcome="queued").inc()
+
+    def _admit(self, outcome: str, units: int):
+        """Count a request admitted without queueing."""
+        self.in_flight += units
+        API_IN_FLIGHT.labels(name=self.name).set(self.in_flight)
+        API_ADMISSIONS.labels(name=self.name, outcome=outcome).inc()
+
+    def _release(self, units: int):
+        """Free slots, handing them to queued requests in arrival order."""
+        self.in_flight -= units
+        while self._waiters and self.in_flight + self._waiters[0][1] <= self.max_in_flight:
+            future, waiter_units = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += waiter_units
+                future.set_result(None)
+        API_IN_FLIGHT.labels(name=self.name).set(self.in_flight)
+
+    def _shed(self, outcome: str):
+        """Reject a request."""
+        API_ADMISSIONS.labels(name=self.name, outcome=outcome).inc()
+        logger.warning(f"Shedding {self.name} request: {outcome}")
+        raise AdmissionRejected(self.name, outcome, self.retry_after_seconds)
@@ -1,12 +1,16 @@
 """FastAPI main application."""
 import logging
+import math
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from src.config import get_settings
+from src.api.admission import AdmissionRejected
 from src.api.routes import patients, triage, consultations, health
 from src.services.dynamodb_service import DynamoDBService
+from src.services.aws_clients import get_client_registry
+from src.services.deadline import reset_deadline, set_deadline
 
 # Configure logging
 logging.basicConfig(
@@ -30,11 +34,19 @@ async def lifespan(app: FastAPI):
         logger.info("DynamoDB tables initialized")
     except Exception as e:
         logger.error(f"Error initializing DynamoDB: {e}")
+
+    # Write triage results left in the outbox by a previous run
+    outbox_flusher = triage.coordinator.outbox_flusher
+    if outbox_flusher:
+        outbox_flusher.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Swiss Medical Triage System API")
+    if outbox_flusher:
+        await outbox_flusher.aclose()
+    await get_client_registry().aclose()
 
 
 # Create FastAPI app
@@ -55,6 +67,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def request_deadline(request: Request, call_next):
+    """Bound downstream calls by the request's deadline.
+
+    Clients set it in seconds with ``X-Request-Timeout``, up to the Bedrock
+    read timeout; otherwise ``api_request_timeout_seconds`` applies, if set.
+    """
+    timeout = settings.api_request_timeout_seconds
+    header = request.headers.get("X-Request-Timeout")
+    if header is not None:
+        try:
+            timeout = float(header)
+        except ValueError:
+            timeout = math.nan
+        if not math.isfinite(timeout) or timeout <= 0:
+            return JSONResponse(
+                status_code=400,
+                content={"detail": "X-Request-Timeout must be a positive number of seconds"},
+            )
+        timeout = min(timeout, settings.aws_read_timeout)
+    token = set_deadline(timeout)
+    try:
+        return await call_next(request)
+    finally:
+        reset_deadline(token)
+
+
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
 app.include_router(patients.router, prefix="/api/v1/patients", tags=["Patients"])
@@ -72,6 +112,16 @@ async def root():
     }
 
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request, exc: AdmissionRejected):
+    """Shed requests fast with 503 and a Retry-After hint."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after_seconds)},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
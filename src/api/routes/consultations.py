@@ -1,8 +1,8 @@
 """Consultation endpoints."""
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException
-from src.models.consultation import Consultation, ConsultationCreate
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from src.models.consultation import Consultation, ConsultationCreate, ConsultationPage
 from src.services.consultation_service import ConsultationService
 
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ consultation_service = ConsultationService()
 async def create_consultation(consultation_data: ConsultationCreate):
     """Create a new consultation."""
     try:
-        consultation = consultation_service.create_consultation(consultation_data)
+        consultation = await consultation_service.create_consultation_async(consultation_data)
         return consultation
     except Exception as e:
         logger.error(f"Error creating consultation: {e}")
@@ -24,18 +24,25 @@ async def create_consultation(consultation_data: ConsultationCreate):
 @router.get("/{consultation_id}", response_model=Consultation)
 async def get_consultation(consultation_id: str):
     """Get a consultation by ID."""
-    consultation = consultation_service.get_consultation(consultation_id)
+    consultation = await consultation_service.get_consultation_async(consultation_id)
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
     return consultation
 
 
-@router.get("/patient/{patient_id}", response_model=List[Consultation])
-async def get_patient_consultations(patient_id: str):
-    """Get all consultations for a patient."""
+@router.get("/patient/{patient_id}", response_model=ConsultationPage)
+async def get_patient_consultations(
+    patient_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    """Get a patient's consultations one page at a time."""
     try:
-        consultations = consultation_service.get_patient_consultations(patient_id)
-        return consultations
+        return await consultation_service.get_patient_consultations_page_async(
+            patient_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting patient consultations: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -46,7 +53,7 @@ async def update_consultation_status(
     consultation_id: str, status: str, notes: str = None
 ):
     """Update consultation status."""
-    consultation = consultation_service.update_consultation_status(
+    consultation = await consultation_service.update_consultation_status_async(
         consultation_id, status, notes
     )
     if not consultation:
@@ -1,6 +1,7 @@
 """Health check endpoints."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from datetime import datetime
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from src.config import get_settings
 
 router = APIRouter()
@@ -26,3 +27,9 @@ async def readiness_check():
         "status": "ready",
         "timestamp": datetime.utcnow().isoformat(),
     }
+
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
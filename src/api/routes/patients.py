@@ -1,8 +1,8 @@
 """Patient management endpoints."""
 import logging
-from typing import List
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
-from src.models.patient import Patient, PatientCreate, PatientUpdate
+from src.models.patient import Patient, PatientCreate, PatientUpdate, PatientPage
 from src.services.patient_service import PatientService
 
 logger = logging.getLogger(__name__)
@@ -14,7 +14,7 @@ patient_service = PatientService()
 async def create_patient(patient_data: PatientCreate):
     """Create a new patient."""
     try:
-        patient = patient_service.create_patient(patient_data)
+        patient = await patient_service.create_patient_async(patient_data)
         return patient
     except Exception as e:
         logger.error(f"Error creating patient: {e}")
@@ -24,7 +24,7 @@ async def create_patient(patient_data: PatientCreate):
 @router.get("/{patient_id}", response_model=Patient)
 async def get_patient(patient_id: str):
     """Get a patient by ID."""
-    patient = patient_service.get_patient(patient_id)
+    patient = await patient_service.get_patient_async(patient_id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
@@ -33,18 +33,21 @@ async def get_patient(patient_id: str):
 @router.put("/{patient_id}", response_model=Patient)
 async def update_patient(patient_id: str, updates: PatientUpdate):
     """Update a patient."""
-    patient = patient_service.update_patient(patient_id, updates)
+    patient = await patient_service.update_patient_async(patient_id, updates)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     return patient
 
 
-@router.get("/", response_model=List[Patient])
-async def list_patients(limit: int = Query(50, ge=1, le=100)):
-    """List all patients."""
+@router.get("/", response_model=PatientPage)
+async def list_patients(
+    limit: int = Query(50, ge=1, le=100), cursor: Optional[str] = Query(None)
+):
+    """List patients one page at a time; pass next_cursor back to get the next page."""
     try:
-        patients = patient_service.list_patients(limit=limit)
-        return patients
+        return await patient_service.list_patients_page_async(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing patients: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -53,7 +56,7 @@ async def list_patients(limit: int = Query(50, ge=1, le=100)):
 @router.get("/{patient_id}/history")
 async def get_patient_history(patient_id: str):
     """Get patient medical history."""
-    history = patient_service.get_patient_medical_history(patient_id)
+    history = await patient_service.get_patient_medical_history_async(patient_id)
     if not history:
         raise HTTPException(status_code=404, detail="Patient not found")
     return history
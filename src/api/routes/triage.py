@@ -1,24 +1,146 @@
 """Triage endpoints."""
+import json
 import logging
-from fastapi import APIRouter, HTTPException
-from src.models.triage import TriageRequest, TriageResponse
-from src.agents.coordinator_agent import CoordinatorAgent
+from contextlib import AsyncExitStack
+from typing import Any, Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from src.models.triage import (
+    TriageRequest,
+    TriageResponse,
+    TriageBatchRequest,
+    TriageBatchResponse,
+)
+from src.agents.coordinator_agent import CoordinatorAgent, TriageNotSavedError
+from src.agents.triage_cache import IdempotencyConflictError
+from src.api.admission import AdmissionController
+from src.config import get_settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 coordinator = CoordinatorAgent()
+settings = get_settings()
+admission = AdmissionController(
+    "triage_assess",
+    settings.triage_admission_max_in_flight,
+    settings.triage_admission_max_queue,
+    settings.triage_admission_queue_timeout_seconds,
+    settings.triage_admission_retry_after_seconds,
+)
+
+
+def _exempt_from_shedding(request: TriageRequest) -> bool:
+    """Whether a request is severe enough to be admitted even when saturated."""
+    return (
+        max(symptom.severity for symptom in request.symptoms)
+        >= settings.triage_admission_exempt_severity
+    )
 
 
 @router.post("/assess", response_model=TriageResponse)
-async def assess_triage(request: TriageRequest):
-    """Perform triage assessment using AI agents."""
-    try:
-        logger.info(f"Received triage request for patient {request.patient_id}")
-        result = coordinator.process_triage(request)
-        return result
-    except Exception as e:
-        logger.error(f"Error in triage assessment: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing triage: {str(e)}")
+async def assess_triage(
+    request: TriageRequest,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Repeats with the same key within the window return the stored response",
+    ),
+):
+    """Perform triage assessment using AI agents.
+
+    When saturated, responds 503 with Retry-After unless a symptom is severe.
+    """
+    async with admission.admit(exempt=_exempt_from_shedding(request)):
+        try:
+            logger.info(f"Received triage request for patient {request.patient_id}")
+            result = await coordinator.process_triage_async(request, idempotency_key)
+            return result
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except TriageNotSavedError as e:
+            logger.error(f"Triage result for patient {request.patient_id} not saved: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="Triage result could not be saved, retry with the same Idempotency-Key",
+                headers={"Retry-After": str(settings.triage_admission_retry_after_seconds)},
+            )
+        except Exception as e:
+            logger.error(f"Error in triage assessment: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error processing triage: {str(e)}")
+
+
+@router.post("/assess/stream")
+async def assess_triage_stream(request: TriageRequest):
+    """Perform triage assessment, streaming each result field as a Server-Sent Event.
+
+    Emits a ``field`` event per completed field of the assessment, then a
+    ``complete`` event with the full result once it has been saved, or an
+    ``error`` event if the workflow fails. Admission is decided before the
+    stream starts, so a shed request still gets 503 with Retry-After, and the
+    slot is held until the stream ends.
+    """
+    logger.info(f"Received streaming triage request for patient {request.patient_id}")
+    slot = AsyncExitStack()
+    await slot.enter_async_context(admission.admit(exempt=_exempt_from_shedding(request)))
+
+    async def events():
+        async with slot:
+            try:
+                async for field, value in coordinator.astream_triage(request):
+                    if field == "complete":
+                        yield _sse("complete", value)
+                    else:
+                        yield _sse("field", {"name": field, "value": value})
+            except Exception as e:
+                logger.error(f"Error in streaming triage assessment: {e}", exc_info=True)
+                yield _sse("error", {"detail": f"Error processing triage: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), ensure_ascii=False)}\n\n"
+
+
+@router.post("/assess/two-phase", response_model=TriageResponse)
+async def assess_triage_two_phase(request: TriageRequest):
+    """Return a preliminary triage level fast; the full assessment completes in the background.
+
+    Poll ``GET /{triage_id}`` (optionally with ``wait``) until
+    ``assessment_status`` is no longer ``preliminary``.
+    """
+    async with admission.admit(exempt=_exempt_from_shedding(request)):
+        try:
+            logger.info(f"Received two-phase triage request for patient {request.patient_id}")
+            return await coordinator.process_triage_two_phase_async(request)
+        except Exception as e:
+            logger.error(f"Error in two-phase triage assessment: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error processing triage: {str(e)}")
+
+
+@router.post("/assess/batch", response_model=TriageBatchResponse)
+async def assess_triage_batch(batch: TriageBatchRequest):
+    """Perform triage assessments for several patients concurrently.
+
+    The batch is admitted as one unit per patient. When saturated, responds
+    503 with Retry-After unless every patient has a severe symptom.
+    """
+    exempt = all(_exempt_from_shedding(request) for request in batch.requests)
+    async with admission.admit(exempt=exempt, units=len(batch.requests)):
+        try:
+            logger.info(f"Received batch of {len(batch.requests)} triage requests")
+            items = await coordinator.process_triage_batch_async(batch.requests)
+            return TriageBatchResponse(items=items)
+        except Exception as e:
+            logger.error(f"Error in batch triage assessment: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error processing triage batch: {str(e)}")
 
 
 @router.get("/workflow")
@@ -28,3 +150,17 @@ async def get_workflow():
         "workflow": coordinator.get_workflow_visualization(),
         "description": "Multi-agent workflow using LangGraph",
     }
+
+
+@router.get("/{triage_id}", response_model=TriageResponse)
+async def get_triage(
+    triage_id: str,
+    wait: float = Query(
+        0, ge=0, le=30, description="Seconds to wait for a preliminary triage to complete"
+    ),
+):
+    """Get a stored triage, optionally long-polling until its full assessment is ready."""
+    result = await coordinator.wait_for_triage_async(triage_id, timeout=wait)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Triage not found")
+    return result
@@ -16,14 +16,111 @@ class Settings(BaseSettings):
     aws_secret_access_key: Optional[str] = None
     aws_account_id: str = "LOAD_FROM_ENV"
 
+    # AWS Client Pool
+    aws_max_pool_connections: int = 50
+    aws_tcp_keepalive: bool = True
+    aws_retry_mode: str = "adaptive"
+    aws_max_attempts: int = 3
+    aws_connect_timeout: float = 5.0
+    aws_read_timeout: float = 60.0
+
     # AWS Bedrock
     bedrock_model_id: str = "anthropic.claude-3-sonnet-20240229-v1:0"
     bedrock_region: str = "us-east-1"
 
+    # Bedrock Targets, Hedging and Circuit Breaking (endpoint URLs point at stubs in tests; a
+    # secondary target receives a duplicate call once the primary is slower than the percentile)
+    bedrock_endpoint_url: Optional[str] = None
+    bedrock_secondary_region: Optional[str] = None
+    bedrock_secondary_endpoint_url: Optional[str] = None
+    bedrock_hedging_enabled: bool = True
+    bedrock_hedge_percentile: float = 0.95
+    bedrock_hedge_initial_delay_seconds: float = 3.0
+    bedrock_hedge_min_samples: int = 20
+    bedrock_circuit_failure_threshold: int = 5
+    bedrock_circuit_reset_seconds: float = 30.0
+
+    # Bedrock Rate Limiting (per-model client-side quota; waiting calls are served sickest first)
+    bedrock_rate_limit_enabled: bool = True
+    bedrock_requests_per_minute: int = 200
+    bedrock_tokens_per_minute: int = 200000
+    bedrock_rate_limit_max_wait_seconds: float = 30.0
+
+    # Model Cascade (a fast model answers first; unset disables the cascade)
+    bedrock_fast_model_id: Optional[str] = None
+    triage_cascade_confidence_threshold: float = 0.8
+
+    # Prompt Caching and Variant ("full" or "compact" triage system prompt)
+    bedrock_prompt_caching: bool = True
+    triage_prompt_variant: str = "full"
+
+    # Triage Response Modes (output token budgets per request response_mode)
+    triage_verbose_max_tokens: int = 2048
+    triage_terse_max_tokens: int = 512
+    triage_terse_max_list_items: int = 3
+    triage_terse_reasoning: bool = False
+
     # DynamoDB Tables
     dynamodb_patients_table: str = "health-tech-patients"
     dynamodb_consultations_table: str = "health-tech-consultations"
     dynamodb_triage_table: str = "health-tech-triage"
+    dynamodb_batch_max_retries: int = 8
+    dynamodb_batch_base_backoff: float = 0.05
+    dynamodb_batch_max_backoff: float = 5.0
+    dynamodb_scan_segments: int = 8
+    dynamodb_scan_workers: int = 8
+
+    # Caches
+    patient_cache_max_size: int = 1024
+    patient_cache_ttl_seconds: float = 60.0
+    patient_cache_negative_ttl_seconds: float = 0.0
+    consultation_cache_max_size: int = 512
+    consultation_cache_ttl_seconds: float = 30.0
+    triage_cache_enabled: bool = True
+    triage_cache_ttl_seconds: float = 120.0
+    triage_cache_max_size: int = 1024
+    triage_single_flight_enabled: bool = True
+    triage_idempotency_ttl_seconds: float = 3600.0
+    triage_idempotency_max_size: int = 16384
+
+    # Triage Write-behind Outbox (results are queued durably on local disk and written in batches)
+    triage_outbox_enabled: bool = True
+    triage_outbox_path: str = ".cache/triage-outbox.sqlite3"
+    triage_outbox_batch_size: int = 25
+    triage_outbox_flush_interval_seconds: float = 1.0
+
+    # Triage Workflow Checkpoints ("sqlite" saves each node's output so a retried request resumes
+    # after its last completed node; "none" disables checkpointing)
+    triage_checkpoint_backend: str = "sqlite"
+    triage_checkpoint_path: str = ".cache/triage-checkpoints.sqlite3"
+    triage_checkpoint_ttl_seconds: float = 900.0
+
+    # Shared Cache Tier ("memory" keeps caches per process, "sqlite" shares them across workers)
+    cache_backend: str = "memory"
+    cache_sqlite_path: str = ".cache/shared-cache.sqlite3"
+    cache_version_ttl_seconds: float = 1.0
+
+    # Rule-based Pre-triage (rules path is a JSON rule table replacing the defaults)
+    triage_rules_enabled: bool = True
+    triage_rules_path: Optional[str] = None
+    triage_rules_enrich: bool = True
+    triage_llm_timeout_seconds: float = 30.0
+
+    # Batch Triage
+    triage_batch_concurrency: int = 10
+    triage_packed_max_patients: int = 5
+
+    # Two-phase Triage (phase 1 returns the level fast, phase 2 completes the record)
+    triage_phase1_max_tokens: int = 96
+    triage_phase1_timeout_seconds: float = 3.0
+    triage_phase2_poll_interval_seconds: float = 0.5
+
+    # Triage Admission Control (excess requests queue briefly, then get 503 with Retry-After)
+    triage_admission_max_in_flight: int = 32
+    triage_admission_max_queue: int = 64
+    triage_admission_queue_timeout_seconds: float = 2.0
+    triage_admission_retry_after_seconds: int = 5
+    triage_admission_exempt_severity: int = 9
 
     # LangSmith
     langchain_tracing_v2: bool = False
@@ -37,9 +134,10 @@ class Settings(BaseSettings):
     environment: str = "development"
     log_level: str = "INFO"
 
-    # API Settings
+    # API Settings (requests may send X-Request-Timeout in seconds; the default applies otherwise)
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    api_request_timeout_seconds: Optional[float] = None
 
     # Streamlit Settings
     streamlit_server_port: int = 8501
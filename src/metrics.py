@@ -0,0 +1,118 @@
+"""Prometheus metrics for the application."""
+from prometheus_client import Counter, Gauge, Histogram
+
+TRIAGE_CACHE_LOOKUPS = Counter(
+    "triage_result_cache_lookups_total",
+    "Triage result cache lookups by result (hit or miss)",
+    ["result"],
+)
+TRIAGE_CACHE_SAVED_SECONDS = Counter(
+    "triage_result_cache_saved_seconds_total",
+    "LLM latency avoided by serving triage results from the cache",
+)
+TRIAGE_PACKED_TOKENS_SAVED = Histogram(
+    "triage_packed_tokens_saved_per_patient",
+    "Estimated input tokens saved per patient by packed multi-patient triage prompts",
+    buckets=(0, 100, 250, 500, 750, 1000, 1500, 2000),
+)
+TRIAGE_PACKED_FALLBACKS = Counter(
+    "triage_packed_fallbacks_total",
+    "Patients re-assessed individually after a malformed packed triage answer",
+)
+TRIAGE_LLM_LATENCY = Histogram(
+    "triage_llm_latency_seconds",
+    "Latency of triage LLM calls by cascade tier (fast or large)",
+    ["tier"],
+)
+TRIAGE_CASCADE_DECISIONS = Counter(
+    "triage_cascade_decisions_total",
+    "Fast-tier triage answers by outcome (accepted or the reason they were escalated)",
+    ["outcome"],
+)
+TRIAGE_PROMPT_TOKENS = Counter(
+    "triage_prompt_tokens_total",
+    "Triage LLM input tokens by prompt cache status (cache_read, cache_write or uncached)",
+    ["tier", "status"],
+)
+TRIAGE_TIME_TO_FIRST_TOKEN = Histogram(
+    "triage_llm_time_to_first_token_seconds",
+    "Time to the first generated token of prompt-cached triage LLM calls, mostly prefill",
+    ["tier"],
+)
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total",
+    "Calls that awaited an identical in-flight call instead of running their own",
+    ["name"],
+)
+TRIAGE_IDEMPOTENT_REPLAYS = Counter(
+    "triage_idempotent_replays_total",
+    "Triage requests answered with the stored response for a repeated Idempotency-Key",
+)
+BEDROCK_RATE_LIMIT_QUEUE_DEPTH = Gauge(
+    "bedrock_rate_limit_queue_depth",
+    "LLM calls waiting for Bedrock request or token quota",
+    ["model"],
+)
+BEDROCK_RATE_LIMIT_WAIT = Histogram(
+    "bedrock_rate_limit_wait_seconds",
+    "Time LLM calls waited for Bedrock quota by request priority band",
+    ["model", "priority"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+BEDROCK_RATE_LIMIT_TIMEOUTS = Counter(
+    "bedrock_rate_limit_timeouts_total",
+    "LLM calls abandoned after waiting longer than the maximum for Bedrock quota",
+    ["model"],
+)
+API_ADMISSIONS = Counter(
+    "api_admissions_total",
+    "Requests by admission outcome (admitted, queued, exempt, shed_queue_full or shed_timeout)",
+    ["name", "outcome"],
+)
+API_IN_FLIGHT = Gauge(
+    "api_in_flight_requests",
+    "Requests currently admitted, including those exempt from the limit",
+    ["name"],
+)
+API_ADMISSION_QUEUE_DEPTH = Gauge(
+    "api_admission_queue_depth",
+    "Requests waiting in the admission queue",
+    ["name"],
+)
+BEDROCK_HEDGES = Counter(
+    "bedrock_hedged_requests_total",
+    "Duplicate Bedrock requests sent to the secondary target, by reason (slow or failover)",
+    ["model", "reason"],
+)
+BEDROCK_TARGET_WINS = Counter(
+    "bedrock_target_wins_total",
+    "Bedrock calls answered, by the target whose answer was used",
+    ["model", "target"],
+)
+BEDROCK_CIRCUIT_OPENS = Counter(
+    "bedrock_circuit_opens_total",
+    "Times a Bedrock target's circuit breaker opened after repeated failures",
+    ["target"],
+)
+OUTBOX_PENDING = Gauge(
+    "outbox_pending_writes",
+    "Writes appended to the local outbox and not yet stored in DynamoDB",
+)
+OUTBOX_FLUSHES = Counter(
+    "outbox_flushed_writes_total",
+    "Outbox writes sent to DynamoDB by outcome (written or retried)",
+    ["table", "outcome"],
+)
+OUTBOX_WRITE_DELAY = Histogram(
+    "outbox_write_delay_seconds",
+    "Time from appending a write to the outbox until it was stored in DynamoDB",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+TRIAGE_GRAPH_RESUMES = Counter(
+    "triage_graph_resumes_total",
+    "Triage workflow runs resumed from a checkpoint instead of starting over",
+)
+TRIAGE_RESUME_LLM_CALLS_AVOIDED = Counter(
+    "triage_resume_llm_calls_avoided_total",
+    "Triage LLM assessments reused from a checkpoint by a resumed workflow run",
+)
@@ -1,17 +1,35 @@
 """Data models for the application."""
-from .patient import Patient, PatientCreate, PatientUpdate
-from .consultation import Consultation, ConsultationCreate, TriageResult
-from .triage import TriageLevel, Symptom, TriageRequest, TriageResponse
+from .patient import Patient, PatientCreate, PatientUpdate, PatientClinicalSummary, PatientPage
+from .consultation import Consultation, ConsultationCreate, ConsultationPage, TriageResult
+from .triage import (
+    TriageLevel,
+    ResponseMode,
+    AssessmentStatus,
+    Symptom,
+    TriageRequest,
+    TriageResponse,
+    TriageBatchRequest,
+    TriageBatchItem,
+    TriageBatchResponse,
+)
 
 __all__ = [
     "Patient",
     "PatientCreate",
     "PatientUpdate",
+    "PatientClinicalSummary",
+    "PatientPage",
     "Consultation",
     "ConsultationCreate",
+    "ConsultationPage",
     "TriageResult",
     "TriageLevel",
+    "ResponseMode",
+    "AssessmentStatus",
     "Symptom",
     "TriageRequest",
     "TriageResponse",
+    "TriageBatchRequest",
+    "TriageBatchItem",
+    "TriageBatchResponse",
 ]
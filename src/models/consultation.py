@@ -68,3 +68,10 @@ class ConsultationCreate(BaseModel):
     patient_id: str
     chief_complaint: str
     symptoms_description: str
+
+
+class ConsultationPage(BaseModel):
+    """One page of consultations with a cursor for the next page."""
+
+    items: List[Consultation] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
@@ -95,3 +95,21 @@ class PatientUpdate(BaseModel):
     chronic_conditions: Optional[List[str]] = None
     current_medications: Optional[List[str]] = None
     is_active: Optional[bool] = None
+
+
+class PatientClinicalSummary(BaseModel):
+    """Clinical subset of a patient, read with a projection for triage."""
+
+    patient_id: str
+    date_of_birth: str
+    blood_type: Optional[BloodType] = None
+    allergies: List[str] = Field(default_factory=list)
+    chronic_conditions: List[str] = Field(default_factory=list)
+    current_medications: List[str] = Field(default_factory=list)
+
+
+class PatientPage(BaseModel):
+    """One page of patients with a cursor for the next page."""
+
+    items: List[Patient] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
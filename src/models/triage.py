@@ -15,6 +15,21 @@ class TriageLevel(str, Enum):
     ROUTINE = "routine"  # Can wait, schedule appointment
 
 
+class ResponseMode(str, Enum):
+    """How detailed the LLM's triage answer should be."""
+
+    VERBOSE = "verbose"  # Full assessment with reasoning
+    TERSE = "terse"  # Short keys and phrases, capped lists, fewer output tokens
+
+
+class AssessmentStatus(str, Enum):
+    """Whether a stored triage holds the full assessment yet."""
+
+    PRELIMINARY = "preliminary"  # Level, priority and wait time only; details pending
+    COMPLETE = "complete"  # Full assessment
+    FAILED = "failed"  # The full assessment could not be generated
+
+
 class Symptom(BaseModel):
     """Individual symptom model."""
 
@@ -34,6 +49,9 @@ class TriageRequest(BaseModel):
         description="Vital signs (temperature, blood_pressure, heart_rate, respiratory_rate, oxygen_saturation)",
     )
     additional_context: Optional[str] = Field(None, description="Additional context or concerns")
+    response_mode: ResponseMode = Field(
+        ResponseMode.VERBOSE, description="Verbose or terse LLM assessment"
+    )
 
     class Config:
         json_schema_extra = {
@@ -79,6 +97,9 @@ class TriageResponse(BaseModel):
     
     # Agent Information
     agent_reasoning: Optional[str] = Field(None, description="Agent's reasoning process")
+    assessment_status: AssessmentStatus = Field(
+        AssessmentStatus.COMPLETE, description="Whether the full assessment is available yet"
+    )
 
     class Config:
         json_schema_extra = {
@@ -96,3 +117,27 @@ class TriageResponse(BaseModel):
                 "estimated_wait_time": "15-30 minutos",
             }
         }
+
+
+class TriageBatchRequest(BaseModel):
+    """Request model for triaging several patients at once."""
+
+    requests: List[TriageRequest] = Field(
+        ..., min_length=1, max_length=200, description="Triage requests to assess"
+    )
+
+
+class TriageBatchItem(BaseModel):
+    """Outcome of one request in a batch triage."""
+
+    index: int = Field(..., description="Position of the request in the batch")
+    patient_id: str
+    result: Optional[TriageResponse] = Field(None, description="Triage result, if assessed")
+    saved: bool = Field(False, description="Whether the result was stored")
+    error: Optional[str] = Field(None, description="Error that prevented the assessment")
+
+
+class TriageBatchResponse(BaseModel):
+    """Response model for a batch triage, with items in request order."""
+
+    items: List[TriageBatchItem]
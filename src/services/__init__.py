@@ -1,6 +1,12 @@
 """Services for the application."""
 from .dynamodb_service import DynamoDBService
+from .async_dynamodb_service import AsyncDynamoDBService
 from .patient_service import PatientService
 from .consultation_service import ConsultationService
 
-__all__ = ["DynamoDBService", "PatientService", "ConsultationService"]
+__all__ = [
+    "DynamoDBService",
+    "AsyncDynamoDBService",
+    "PatientService",
+    "ConsultationService",
+]
@@ -0,0 +1,258 @@
+"""Async DynamoDB service for non-blocking database operations."""
+import asyncio
+import logging
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
+from botocore.exceptions import ClientError
+from src.config import get_settings
+from src.services.aws_clients import get_client_registry
+from src.services.dynamodb_service import (
+    BATCH_GET_SIZE,
+    BATCH_WRITE_SIZE,
+    backoff_delay,
+    page_kwargs,
+    projection_kwargs,
+    update_kwargs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDynamoDBService:
+    """Async counterpart of DynamoDBService backed by aioboto3."""
+
+    def __init__(self):
+        """Initialize async DynamoDB service."""
+        self.settings = get_settings()
+        self.registry = get_client_registry()
+
+    async def _get_resource(self):
+        """Get the shared DynamoDB resource for the running loop."""
+        return await self.registry.async_resource("dynamodb")
+
+    async def put_item(self, table_name: str, item: Dict[str, Any]) -> bool:
+        """Put an item into a DynamoDB table."""
+        try:
+            dynamodb = await self._get_resource()
+            table = await dynamodb.Table(table_name)
+            await table.put_item(Item=item)
+            logger.info(f"Successfully put item in {table_name}")
+            return True
+        except ClientError as e:
+            logger.error(f"Error putting item in {table_name}: {e}")
+            return False
+
+    async def get_item(
+        self, table_name: str, key: Dict[str, Any], projection: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get an item from a DynamoDB table, optionally reading only ``projection``."""
+        try:
+            dynamodb = await self._get_resource()
+            table = await dynamodb.Table(table_name)
+            response = await table.get_item(Key=key, **projection_kwargs(projection))
+            return response.get("Item")
+        except ClientError as e:
+            logger.error(f"Error getting item from {table_name}: {e}")
+            return None
+
+    async def query_by_index(
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        projection: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query all items by secondary index, following every page."""
+        items = []
+        async for page in self.iter_query(
+            table_name, index_name, key_name, key_value, projection=projection
+        ):
+            items.extend(page)
+        return items
+
+    async def query_page(
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Query one page by secondary index, returning items and the last evaluated key.
+
+        Errors are raised, so a failed read is never mistaken for the last page.
+        """
+        try:
+            dynamodb = await self._get_resource()
+            table = await dynamodb.Table(table_name)
+            response = await table.query(
+                IndexName=index_name,
+                KeyConditionExpression=f"{key_name} = :value",
+                ExpressionAttributeValues={":value": key_value},
+                **page_kwargs(limit, start_key),
+                **projection_kwargs(projection),
+            )
+            return response.get("Items", []), response.get("LastEvaluatedKey")
+        except ClientError as e:
+            logger.error(f"Error querying {table_name} by index: {e}")
+            raise
+
+    async def iter_query(
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream query results by secondary index page by page."""
+        start_key = None
+        while True:
+            items, start_key = await self.query_page(
+                table_name, index_name, key_name, key_value, page_size, start_key, projection
+            )
+            if items:
+                yield items
+            if not start_key:
+                return
+
+    async def update_item(
+        self, table_name: str, key: Dict[str, Any], updates: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Update an existing item and return its attributes after the update.
+
+        Returns None if the item does not exist or the update fails.
+        """
+        try:
+            dynamodb = await self._get_resource()
+            table = await dynamodb.Table(table_name)
+            response = await table.update_item(**update_kwargs(key, updates))
+            logger.info(f"Successfully updated item in {table_name}")
+            return response.get("Attributes")
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.warning(f"Item {key} not found in {table_name}")
+            else:
+                logger.error(f"Error updating item in {table_name}: {e}")
+            return None
+
+    async def scan_table(
+        self, table_name: str, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Scan a table and return all items, or the first ``limit`` items."""
+        items = []
+        async for page in self.iter_scan(table_name, page_size=limit):
+            items.extend(page)
+            if limit and len(items) >= limit:
+                return items[:limit]
+        return items
+
+    async def scan_page(
+        self,
+        table_name: str,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Scan one page of a table, returning items and the last evaluated key.
+
+        Errors are raised, so a failed read is never mistaken for the last page.
+        """
+        try:
+            dynamodb = await self._get_resource()
+            table = await dynamodb.Table(table_name)
+            response = await table.scan(**page_kwargs(limit, start_key))
+            return response.get("Items", []), response.get("LastEvaluatedKey")
+        except ClientError as e:
+            logger.error(f"Error scanning {table_name}: {e}")
+            raise
+
+    async def iter_scan(
+        self, table_name: str, page_size: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream a table scan page by page."""
+        start_key = None
+        while True:
+            items, start_key = await self.scan_page(table_name, page_size, start_key)
+            if items:
+                yield items
+            if not start_key:
+                return
+
+    async def batch_put_items(
+        self, table_name: str, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Put items in batches of 25, retrying unprocessed items.
+
+        Returns the items that could not be written after all retries.
+        """
+        dynamodb = await self._get_resource()
+        failed = []
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            requests = [
+                {"PutRequest": {"Item": item}} for item in items[start : start + BATCH_WRITE_SIZE]
+            ]
+            for attempt in range(self.settings.dynamodb_batch_max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(backoff_delay(self.settings, attempt))
+                try:
+                    response = await dynamodb.batch_write_item(
+                        RequestItems={table_name: requests}
+                    )
+                except ClientError as e:
+                    logger.error(f"Error batch writing to {table_name}: {e}")
+                    break
+                requests = response.get("UnprocessedItems", {}).get(table_name, [])
+                if not requests:
+                    break
+            failed.extend(request["PutRequest"]["Item"] for request in requests)
+
+        logger.info(f"Batch put {len(items) - len(failed)}/{len(items)} items in {table_name}")
+        return failed
+
+    async def batch_get_items(
+        self,
+        table_name: str,
+        keys: List[Dict[str, Any]],
+        projection: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get items in batches of 100, retrying unprocessed keys.
+
+        Returns the items found, in no particular order, and the keys that
+        could not be fetched after all retries. Keys of missing items are in
+        neither list.
+        """
+        dynamodb = await self._get_resource()
+        unique_keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+        items = []
+        unfetched = []
+        for start in range(0, len(unique_keys), BATCH_GET_SIZE):
+            request = {
+                table_name: {
+                    "Keys": unique_keys[start : start + BATCH_GET_SIZE],
+                    **projection_kwargs(projection),
+                }
+            }
+            for attempt in range(self.settings.dynamodb_batch_max_retries + 1):
+                if attempt:
+                    await asyncio.sleep(backoff_delay(self.settings, attempt))
+                try:
+                    response = await dynamodb.batch_get_item(RequestItems=request)
+                except ClientError as e:
+                    logger.error(f"Error batch getting from {table_name}: {e}")
+                    break
+                items.extend(response.get("Responses", {}).get(table_name, []))
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+            if request:
+                unfetched.extend(request[table_name]["Keys"])
+
+        if unfetched:
+            logger.error(
+                f"Could not get {len(unfetched)}/{len(unique_keys)} keys from {table_name}: "
+                f"{unfetched}"
+            )
+        return items, unfetched
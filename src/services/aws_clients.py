@@ -0,0 +1,127 @@
+"""Process-wide registry of AWS sessions and clients."""
+import asyncio
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import aioboto3
+import boto3
+from aiobotocore.config import AioConfig
+from botocore.config import Config
+from src.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """Shares one boto3 session and one connection pool per (service, region)."""
+
+    def __init__(self, settings: Optional[Settings] = None):
+        """Initialize the registry from application settings."""
+        self.settings = settings or get_settings()
+        credentials = {
+            "aws_access_key_id": self.settings.aws_access_key_id,
+            "aws_secret_access_key": self.settings.aws_secret_access_key,
+        }
+        self.session = boto3.Session(**credentials)
+        self.async_session = aioboto3.Session(**credentials)
+
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+        self._resources: Dict[Tuple[str, str], Any] = {}
+
+        self._async_loop = None
+        self._async_lock = None
+        self._async_resources: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+
+    def _config_kwargs(self) -> Dict[str, Any]:
+        """Build the botocore configuration shared by every client."""
+        return {
+            "max_pool_connections": self.settings.aws_max_pool_connections,
+            "tcp_keepalive": self.settings.aws_tcp_keepalive,
+            "connect_timeout": self.settings.aws_connect_timeout,
+            "read_timeout": self.settings.aws_read_timeout,
+            "retries": {
+                "mode": self.settings.aws_retry_mode,
+                "max_attempts": self.settings.aws_max_attempts,
+            },
+        }
+
+    def client(
+        self,
+        service_name: str,
+        region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+    ):
+        """Get the shared client for a service and region, optionally at a custom endpoint."""
+        key = (service_name, region_name or self.settings.aws_region, endpoint_url)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    if endpoint_url is None and key[:2] in self._resources:
+                        # Reuse the connection pool of an existing resource
+                        client = self._resources[key[:2]].meta.client
+                    else:
+                        client = self.session.client(
+                            service_name,
+                            region_name=key[1],
+                            endpoint_url=endpoint_url,
+                            config=Config(**self._config_kwargs()),
+                        )
+                    self._clients[key] = client
+                    logger.info(f"Created shared {service_name} client for {key[1]}")
+        return client
+
+    def resource(self, service_name: str, region_name: Optional[str] = None):
+        """Get the shared resource for a service and region."""
+        key = (service_name, region_name or self.settings.aws_region)
+        resource = self._resources.get(key)
+        if resource is None:
+            with self._lock:
+                resource = self._resources.get(key)
+                if resource is None:
+                    resource = self.session.resource(
+                        service_name, region_name=key[1], config=Config(**self._config_kwargs())
+                    )
+                    self._resources[key] = resource
+                    # Clients requested later share the resource's connection pool
+                    self._clients.setdefault((*key, None), resource.meta.client)
+                    logger.info(f"Created shared {service_name} resource for {key[1]}")
+        return resource
+
+    async def async_resource(self, service_name: str, region_name: Optional[str] = None):
+        """Get the shared async resource for a service and region in the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # aiohttp sessions are bound to the loop that created them
+            self._async_resources = {}
+            self._async_lock = asyncio.Lock()
+            self._async_loop = loop
+
+        key = (service_name, region_name or self.settings.aws_region)
+        if key not in self._async_resources:
+            async with self._async_lock:
+                if key not in self._async_resources:
+                    context = self.async_session.resource(
+                        service_name,
+                        region_name=key[1],
+                        config=AioConfig(**self._config_kwargs()),
+                    )
+                    self._async_resources[key] = (context, await context.__aenter__())
+                    logger.info(f"Created shared async {service_name} resource for {key[1]}")
+        return self._async_resources[key][1]
+
+    async def aclose(self):
+        """Close all async connection pools."""
+        resources = self._async_resources
+        self._async_resources = {}
+        for context, _ in resources.values():
+            await context.__aexit__(None, None, None)
+
+
+@lru_cache()
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide client registry."""
+    return ClientRegistry()
@@ -0,0 +1,381 @@
+"""Two-level caching: an in-process LRU tier over an optional shared key-value store."""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from pydantic import TypeAdapter
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() when a key is not cached; None is a valid (negative) cached value
+MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a TTL.
+
+    ``None`` values are cached as negative entries with their own TTL; a
+    negative TTL of 0 disables negative caching.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, negative_ttl_seconds: float = 0.0):
+        """Initialize the cache."""
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Get a cached value, or MISSING if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entry when full."""
+        ttl = self.ttl_seconds if value is not None else self.negative_ttl_seconds
+        if ttl <= 0 or self.max_size <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        """Invalidate a cached value."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Invalidate every cached value."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class KeyValueStore(ABC):
+    """Minimal client interface for the shared cache tier.
+
+    Values are strings; implementations must be safe to share across worker
+    processes on the same host.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None):
+        """Store a value, optionally expiring after ``ttl_seconds``."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Delete a value."""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer value and return the new value."""
+
+
+class SQLiteStore(KeyValueStore):
+    """Local stand-in for a shared key-value server backed by a SQLite file in WAL mode."""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        """Open (and create if needed) the store at ``path``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, or None if absent or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None):
+        """Store a value, optionally expiring after ``ttl_seconds``."""
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        """Delete a value."""
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        """Atomically increment an integer value and return the new value."""
+        with self._lock:
+            return self._conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, '1', NULL) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 "
+                "RETURNING CAST(value AS INTEGER)",
+                (key,),
+            ).fetchone()[0]
+
+
+class TwoLevelCache:
+    """Cache with an in-process L1 tier in front of an optional shared L2 store.
+
+    Every key carries a version stamp kept in L2. Invalidating a key bumps its
+    version, so entries cached under the old version, in any worker's L1 or in
+    L2, are never read again and simply age out. Without an L2 store the cache
+    behaves like a plain TTLCache. If L2 is unreachable the cache is bypassed
+    rather than risk serving values another worker has invalidated.
+
+    Version stamps read from L2 are kept in L1 for ``version_ttl_seconds``, so
+    another worker's invalidation can take that long to be seen here.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        value_type: Any,
+        l1: TTLCache,
+        l2: Optional[KeyValueStore] = None,
+        version_ttl_seconds: float = 0.0,
+    ):
+        """Initialize the cache for values of ``value_type``."""
+        self.namespace = namespace
+        self.l1 = l1
+        self.l2 = l2
+        self.versions = TTLCache(l1.max_size, version_ttl_seconds)
+        self._adapter = TypeAdapter(Optional[value_type])
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    def version(self, key: str) -> Optional[int]:
+        """Get the key's current version stamp, or None if L2 is unreachable."""
+        if self.l2 is None:
+            return 0
+        version = self.versions.get(key)
+        if version is not MISSING:
+            return version
+        try:
+            version = int(self.l2.get(f"{self.namespace}:ver:{key}") or 0)
+        except Exception as e:
+            logger.warning(f"Shared cache unavailable, bypassing cache for {key}: {e}")
+            return None
+        self.versions.set(key, version)
+        return version
+
+    async def aversion(self, key: str) -> Optional[int]:
+        """Get the key's current version stamp, reading L2 off the event loop."""
+        if self.l2 is None:
+            return 0
+        version = self.versions.get(key)
+        if version is not MISSING:
+            return version
+        return await asyncio.to_thread(self.version, key)
+
+    def get(self, key: str, version: Optional[int] = None) -> Any:
+        """Get a cached value, or MISSING if absent, expired or invalidated."""
+        version = self.version(key) if version is None else version
+        if version is None:
+            return MISSING
+        value = self.l1.get((key, version))
+        if value is not MISSING or self.l2 is None:
+            return value
+        return self._get_l2(key, version)
+
+    async def aget(self, key: str, version: Optional[int] = None) -> Any:
+        """Get a cached value like ``get``, reading L2 off the event loop."""
+        version = await self.aversion(key) if version is None else version
+        if version is None:
+            return MISSING
+        value = self.l1.get((key, version))
+        if value is not MISSING or self.l2 is None:
+            return value
+        return await asyncio.to_thread(self._get_l2, key, version)
+
+    def _get_l2(self, key: str, version: int) -> Any:
+        """Get a value from L2 into L1, or MISSING if absent."""
+        try:
+            payload = self.l2.get(f"{self.namespace}:{key}:v{version}")
+        except Exception as e:
+            logger.warning(f"Error reading {key} from shared cache: {e}")
+            payload = None
+        if payload is None:
+            self.l2_misses += 1
+            return MISSING
+
+        self.l2_hits += 1
+        value = self._adapter.validate_json(payload)
+        self.l1.set((key, version), value)
+        return value
+
+    def set(self, key: str, value: Any, version: Optional[int] = None):
+        """Cache a value in both tiers.
+
+        Pass the version read before loading ``value`` so that a load racing
+        with an invalidation is stored under the old, already-dead version.
+        """
+        version = self.version(key) if version is None else version
+        if version is None:
+            return
+        self.l1.set((key, version), value)
+        if self.l2 is not None:
+            self._set_l2(key, value, version)
+
+    async def aset(self, key: str, value: Any, version: Optional[int] = None):
+        """Cache a value in both tiers like ``set``, writing L2 off the event loop."""
+        version = await self.aversion(key) if version is None else version
+        if version is None:
+            return
+        self.l1.set((key, version), value)
+        if self.l2 is not None:
+            await asyncio.to_thread(self._set_l2, key, value, version)
+
+    def _set_l2(self, key: str, value: Any, version: int):
+        """Write a value to L2 for as long as L1 would keep it."""
+        ttl = self.l1.ttl_seconds if value is not None else self.l1.negative_ttl_seconds
+        if ttl <= 0:
+            return
+        try:
+            self.l2.set(
+                f"{self.namespace}:{key}:v{version}",
+                self._adapter.dump_json(value).decode(),
+                ttl_seconds=ttl,
+            )
+        except Exception as e:
+            logger.warning(f"Error writing {key} to shared cache: {e}")
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Get a cached value, loading and caching it on a miss."""
+        version = self.version(key)
+        value = self.get(key, version) if version is not None else MISSING
+        if value is MISSING:
+            value = loader()
+            if version is not None:
+                self.set(key, value, version)
+        return value
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a cached value, awaiting ``loader`` and caching its result on a miss.
+
+        L2 is read and written off the event loop.
+        """
+        version = await self.aversion(key)
+        value = await self.aget(key, version) if version is not None else MISSING
+        if value is MISSING:
+            value = await loader()
+            if version is not None:
+                await self.aset(key, value, version)
+        return value
+
+    def invalidate(self, key: str):
+        """Invalidate a key in every worker by bumping its version."""
+        if self.l2 is None:
+            self.l1.delete((key, 0))
+            return
+        try:
+            self.versions.set(key, self.l2.incr(f"{self.namespace}:ver:{key}"))
+        except Exception as e:
+            self.versions.delete(key)
+            logger.error(f"Error invalidating {key} in shared cache: {e}")
+
+    async def ainvalidate(self, key: str):
+        """Invalidate a key like ``invalidate``, bumping its L2 version off the event loop."""
+        if self.l2 is None:
+            self.invalidate(key)
+            return
+        await asyncio.to_thread(self.invalidate, key)
+
+    def clear(self):
+        """Invalidate every value cached by this process."""
+        self.l1.clear()
+        self.versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for both tiers."""
+        return {
+            "l1": self.l1.stats(),
+            "l2": {"enabled": self.l2 is not None, "hits": self.l2_hits, "misses": self.l2_misses},
+        }
+
+
+@lru_cache()
+def get_shared_store() -> Optional[KeyValueStore]:
+    """Get the process-wide connection to the shared cache tier, if configured."""
+    settings = get_settings()
+    if settings.cache_backend == "sqlite":
+        return SQLiteStore(settings.cache_sqlite_path)
+    if settings.cache_backend != "memory":
+        logger.warning(f"Unknown cache backend {settings.cache_backend}, using memory only")
+    return None
+
+
+@lru_cache()
+def get_cache(
+    namespace: str,
+    value_type: Any,
+    ttl_seconds: float,
+    negative_ttl_seconds: float = 0.0,
+    max_size: int = 1024,
+) -> TwoLevelCache:
+    """Get the process-wide two-level cache for a namespace."""
+    return TwoLevelCache(
+        namespace,
+        value_type,
+        TTLCache(max_size, ttl_seconds, negative_ttl_seconds),
+        get_shared_store(),
+        get_settings().cache_version_ttl_seconds,
+    )
@@ -3,8 +3,11 @@ import logging
 from typing import Optional, List
 from datetime import datetime
 import uuid
-from src.models.consultation import Consultation, ConsultationCreate
+from src.models.consultation import Consultation, ConsultationCreate, ConsultationPage
 from src.services.dynamodb_service import DynamoDBService
+from src.services.async_dynamodb_service import AsyncDynamoDBService
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.cache import get_cache
 from src.config import get_settings
 
 logger = logging.getLogger(__name__)
@@ -16,19 +19,34 @@ class ConsultationService:
     def __init__(self):
         """Initialize consultation service."""
         self.db_service = DynamoDBService()
+        self.async_db_service = AsyncDynamoDBService()
         self.settings = get_settings()
         self.table_name = self.settings.dynamodb_consultations_table
+        self.patient_consultations_cache = get_cache(
+            "patient_consultations",
+            List[Consultation],
+            self.settings.consultation_cache_ttl_seconds,
+            max_size=self.settings.consultation_cache_max_size,
+        )
 
     def create_consultation(self, consultation_data: ConsultationCreate) -> Consultation:
         """Create a new consultation."""
-        consultation_id = f"CONS-{uuid.uuid4().hex[:8].upper()}"
-
-        consultation = Consultation(
-            consultation_id=consultation_id, **consultation_data.model_dump()
-        )
+        consultation = self._build_consultation(consultation_data)
 
         self.db_service.put_item(self.table_name, consultation.model_dump())
-        logger.info(f"Created consultation {consultation_id}")
+        self.patient_consultations_cache.invalidate(consultation.patient_id)
+        logger.info(f"Created consultation {consultation.consultation_id}")
+        return consultation
+
+    async def create_consultation_async(
+        self, consultation_data: ConsultationCreate
+    ) -> Consultation:
+        """Create a new consultation without blocking the event loop."""
+        consultation = self._build_consultation(consultation_data)
+
+        await self.async_db_service.put_item(self.table_name, consultation.model_dump())
+        await self.patient_consultations_cache.ainvalidate(consultation.patient_id)
+        logger.info(f"Created consultation {consultation.consultation_id}")
         return consultation
 
     def get_consultation(self, consultation_id: str) -> Optional[Consultation]:
@@ -38,17 +56,101 @@ class ConsultationService:
             return Consultation(**item)
         return None
 
+    async def get_consultation_async(self, consultation_id: str) -> Optional[Consultation]:
+        """Get a consultation by ID without blocking the event loop."""
+        item = await self.async_db_service.get_item(
+            self.table_name, {"consultation_id": consultation_id}
+        )
+        if item:
+            return Consultation(**item)
+        return None
+
     def get_patient_consultations(self, patient_id: str) -> List[Consultation]:
-        """Get all consultations for a patient."""
-        items = self.db_service.query_by_index(
-            self.table_name, "patient_id-index", "patient_id", patient_id
+        """Get all consultations for a patient, reading through the shared cache."""
+
+        def load() -> List[Consultation]:
+            items = self.db_service.query_by_index(
+                self.table_name, "patient_id-index", "patient_id", patient_id
+            )
+            return [Consultation(**item) for item in items]
+
+        return self.patient_consultations_cache.get_or_load(patient_id, load)
+
+    async def get_patient_consultations_async(self, patient_id: str) -> List[Consultation]:
+        """Get all consultations for a patient without blocking the event loop."""
+
+        async def load() -> List[Consultation]:
+            items = await self.async_db_service.query_by_index(
+                self.table_name, "patient_id-index", "patient_id", patient_id
+            )
+            return [Consultation(**item) for item in items]
+
+        return await self.patient_consultations_cache.aget_or_load(patient_id, load)
+
+    async def get_patient_consultations_page_async(
+        self, patient_id: str, limit: Optional[int] = 50, cursor: Optional[str] = None
+    ) -> ConsultationPage:
+        """Get one page of a patient's consultations, resuming from an opaque cursor."""
+        items, last_key = await self.async_db_service.query_page(
+            self.table_name,
+            "patient_id-index",
+            "patient_id",
+            patient_id,
+            limit=limit,
+            start_key=decode_cursor(cursor),
+        )
+        return ConsultationPage(
+            items=[Consultation(**item) for item in items], next_cursor=encode_cursor(last_key)
         )
-        return [Consultation(**item) for item in items]
 
     def update_consultation_status(
         self, consultation_id: str, status: str, notes: Optional[str] = None
     ) -> Optional[Consultation]:
         """Update consultation status."""
+        item = self.db_service.update_item(
+            self.table_name,
+            {"consultation_id": consultation_id},
+            self._build_status_update(status, notes),
+        )
+
+        return self._store_updated(item)
+
+    async def update_consultation_status_async(
+        self, consultation_id: str, status: str, notes: Optional[str] = None
+    ) -> Optional[Consultation]:
+        """Update consultation status without blocking the event loop."""
+        item = await self.async_db_service.update_item(
+            self.table_name,
+            {"consultation_id": consultation_id},
+            self._build_status_update(status, notes),
+        )
+        return await self._store_updated_async(item)
+
+    def _store_updated(self, item: Optional[dict]) -> Optional[Consultation]:
+        """Build the updated consultation and invalidate its patient's cached list."""
+        if not item:
+            return None
+        consultation = Consultation(**item)
+        self.patient_consultations_cache.invalidate(consultation.patient_id)
+        return consultation
+
+    async def _store_updated_async(self, item: Optional[dict]) -> Optional[Consultation]:
+        """Build the updated consultation and invalidate its patient's list off the event loop."""
+        if not item:
+            return None
+        consultation = Consultation(**item)
+        await self.patient_consultations_cache.ainvalidate(consultation.patient_id)
+        return consultation
+
+    @staticmethod
+    def _build_consultation(consultation_data: ConsultationCreate) -> Consultation:
+        """Build a new consultation with a generated ID."""
+        consultation_id = f"CONS-{uuid.uuid4().hex[:8].upper()}"
+        return Consultation(consultation_id=consultation_id, **consultation_data.model_dump())
+
+    @staticmethod
+    def _build_status_update(status: str, notes: Optional[str] = None) -> dict:
+        """Build the attribute updates for a status change."""
         updates = {"status": status, "updated_at": datetime.utcnow().isoformat()}
 
         if notes:
@@ -57,10 +159,4 @@ class ConsultationService:
         if status == "completed":
             updates["completed_at"] = datetime.utcnow().isoformat()
 
-        success = self.db_service.update_item(
-            self.table_name, {"consultation_id": consultation_id}, updates
-        )
-
-        if success:
-            return self.get_consultation(consultation_id)
-        return None
+        return updates
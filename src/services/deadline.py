@@ -0,0 +1,30 @@
+"""Request deadlines propagated to downstream calls through a context variable."""
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+# Monotonic time by which the current request must be answered, if it has a deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before a call could complete."""
+
+
+def set_deadline(timeout_seconds: Optional[float]) -> Token:
+    """Set the deadline of the current context ``timeout_seconds`` from now, or clear it."""
+    return _deadline.set(None if timeout_seconds is None else time.monotonic() + timeout_seconds)
+
+
+def reset_deadline(token: Token):
+    """Restore the deadline in place before ``set_deadline``."""
+    _deadline.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left until the deadline, capped at ``default``; None if neither is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    left = deadline - time.monotonic()
+    return left if default is None else min(left, default)
@@ -1,12 +1,92 @@
 """DynamoDB service for database operations."""
 import logging
-from typing import Optional, Dict, Any, List
-import boto3
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
 from botocore.exceptions import ClientError
 from src.config import get_settings
+from src.services.aws_clients import get_client_registry
 
 logger = logging.getLogger(__name__)
 
+# DynamoDB limits per BatchWriteItem / BatchGetItem request
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+
+def projection_kwargs(projection: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Build the ProjectionExpression arguments for reading only some attributes."""
+    if not projection:
+        return {}
+    names = {f"#p{i}": name for i, name in enumerate(projection)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+
+def update_kwargs(key: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Build UpdateItem arguments that return the new item and are safe for reserved words.
+
+    Attribute names go through ExpressionAttributeNames, so names such as
+    ``status`` work, and the update only applies to an existing item.
+    """
+    names = {f"#k{i}": name for i, name in enumerate(updates)}
+    values = {f":v{i}": value for i, value in enumerate(updates.values())}
+    assignments = [f"#k{i} = :v{i}" for i in range(len(updates))]
+
+    key_names = {f"#key{i}": name for i, name in enumerate(key)}
+    condition = " AND ".join(f"attribute_exists({placeholder})" for placeholder in key_names)
+
+    return {
+        "Key": key,
+        "UpdateExpression": "SET " + ", ".join(assignments),
+        "ConditionExpression": condition,
+        "ExpressionAttributeNames": {**names, **key_names},
+        "ExpressionAttributeValues": values,
+        "ReturnValues": "ALL_NEW",
+    }
+
+
+def backoff_delay(settings, attempt: int) -> float:
+    """Get a full-jitter delay before retrying unprocessed batch entries."""
+    cap = min(
+        settings.dynamodb_batch_max_backoff,
+        settings.dynamodb_batch_base_backoff * 2**attempt,
+    )
+    return random.uniform(0, cap)
+
+
+@dataclass
+class SegmentProgress:
+    """Progress of one segment of a parallel scan."""
+
+    segment: int
+    total_segments: int
+    pages: int = 0
+    items: int = 0
+    throttled: int = 0
+    done: bool = False
+
+
+def page_kwargs(
+    limit: Optional[int] = None, start_key: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the Limit/ExclusiveStartKey arguments for a scan or query page."""
+    kwargs = {}
+    if limit:
+        kwargs["Limit"] = limit
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+    return kwargs
+
 
 class DynamoDBService:
     """Service for DynamoDB operations."""
@@ -14,18 +94,9 @@ class DynamoDBService:
     def __init__(self):
         """Initialize DynamoDB service."""
         self.settings = get_settings()
-        self.dynamodb = boto3.resource(
-            "dynamodb",
-            region_name=self.settings.aws_region,
-            aws_access_key_id=self.settings.aws_access_key_id,
-            aws_secret_access_key=self.settings.aws_secret_access_key,
-        )
-        self.client = boto3.client(
-            "dynamodb",
-            region_name=self.settings.aws_region,
-            aws_access_key_id=self.settings.aws_access_key_id,
-            aws_secret_access_key=self.settings.aws_secret_access_key,
-        )
+        registry = get_client_registry()
+        self.dynamodb = registry.resource("dynamodb")
+        self.client = registry.client("dynamodb")
 
     def create_tables(self):
         """Create all required DynamoDB tables if they don't exist."""
@@ -95,61 +166,301 @@ class DynamoDBService:
             logger.error(f"Error putting item in {table_name}: {e}")
             return False
 
-    def get_item(self, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Get an item from a DynamoDB table."""
+    def get_item(
+        self, table_name: str, key: Dict[str, Any], projection: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get an item from a DynamoDB table, optionally reading only ``projection``."""
         try:
             table = self.dynamodb.Table(table_name)
-            response = table.get_item(Key=key)
+            response = table.get_item(Key=key, **projection_kwargs(projection))
             return response.get("Item")
         except ClientError as e:
             logger.error(f"Error getting item from {table_name}: {e}")
             return None
 
     def query_by_index(
-        self, table_name: str, index_name: str, key_name: str, key_value: str
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        projection: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Query items by secondary index."""
+        """Query all items by secondary index, following every page."""
+        items = []
+        for page in self.iter_query(
+            table_name, index_name, key_name, key_value, projection=projection
+        ):
+            items.extend(page)
+        return items
+
+    def query_page(
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Query one page by secondary index, returning items and the last evaluated key.
+
+        Errors are raised, so a failed read is never mistaken for the last page.
+        """
         try:
             table = self.dynamodb.Table(table_name)
             response = table.query(
                 IndexName=index_name,
                 KeyConditionExpression=f"{key_name} = :value",
                 ExpressionAttributeValues={":value": key_value},
+                **page_kwargs(limit, start_key),
+                **projection_kwargs(projection),
             )
-            return response.get("Items", [])
+            return response.get("Items", []), response.get("LastEvaluatedKey")
         except ClientError as e:
             logger.error(f"Error querying {table_name} by index: {e}")
-            return []
+            raise
+
+    def iter_query(
+        self,
+        table_name: str,
+        index_name: str,
+        key_name: str,
+        key_value: str,
+        page_size: Optional[int] = None,
+        projection: Optional[List[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream query results by secondary index page by page."""
+        start_key = None
+        while True:
+            items, start_key = self.query_page(
+                table_name, index_name, key_name, key_value, page_size, start_key, projection
+            )
+            if items:
+                yield items
+            if not start_key:
+                return
 
     def update_item(
         self, table_name: str, key: Dict[str, Any], updates: Dict[str, Any]
-    ) -> bool:
-        """Update an item in a DynamoDB table."""
+    ) -> Optional[Dict[str, Any]]:
+        """Update an existing item and return its attributes after the update.
+
+        Returns None if the item does not exist or the update fails.
+        """
         try:
             table = self.dynamodb.Table(table_name)
-            update_expression = "SET " + ", ".join([f"{k} = :{k}" for k in updates.keys()])
-            expression_values = {f":{k}": v for k, v in updates.items()}
-
-            table.update_item(
-                Key=key,
-                UpdateExpression=update_expression,
-                ExpressionAttributeValues=expression_values,
-            )
+            response = table.update_item(**update_kwargs(key, updates))
             logger.info(f"Successfully updated item in {table_name}")
-            return True
+            return response.get("Attributes")
         except ClientError as e:
-            logger.error(f"Error updating item in {table_name}: {e}")
-            return False
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.warning(f"Item {key} not found in {table_name}")
+            else:
+                logger.error(f"Error updating item in {table_name}: {e}")
+            return None
 
     def scan_table(self, table_name: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Scan a table and return all items."""
+        """Scan a table and return all items, or the first ``limit`` items."""
+        items = []
+        for page in self.iter_scan(table_name, page_size=limit):
+            items.extend(page)
+            if limit and len(items) >= limit:
+                return items[:limit]
+        return items
+
+    def scan_page(
+        self,
+        table_name: str,
+        limit: Optional[int] = None,
+        start_key: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Scan one page of a table, returning items and the last evaluated key.
+
+        Errors are raised, so a failed read is never mistaken for the last page.
+        """
         try:
             table = self.dynamodb.Table(table_name)
-            if limit:
-                response = table.scan(Limit=limit)
-            else:
-                response = table.scan()
-            return response.get("Items", [])
+            response = table.scan(**page_kwargs(limit, start_key))
+            return response.get("Items", []), response.get("LastEvaluatedKey")
         except ClientError as e:
             logger.error(f"Error scanning {table_name}: {e}")
-            return []
+            raise
+
+    def iter_scan(
+        self, table_name: str, page_size: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream a table scan page by page."""
+        start_key = None
+        while True:
+            items, start_key = self.scan_page(table_name, page_size, start_key)
+            if items:
+                yield items
+            if not start_key:
+                return
+
+    def parallel_scan(
+        self,
+        table_name: str,
+        segments: Optional[int] = None,
+        workers: Optional[int] = None,
+        page_size: Optional[int] = None,
+        on_progress: Optional[Callable[[SegmentProgress], None]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Scan a whole table with parallel segments, streaming pages as they arrive.
+
+        Each segment runs on the thread pool and backs off when throttled. Pages
+        from all segments are yielded through one iterator in arrival order, and
+        ``on_progress`` is called after every page. Errors other than throttling
+        are raised to the caller rather than returning a partial table.
+        """
+        segments = segments or self.settings.dynamodb_scan_segments
+        workers = workers or self.settings.dynamodb_scan_workers
+        pages: queue.Queue = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+
+        def publish(entry) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def scan_segment(segment: int):
+            progress = SegmentProgress(segment=segment, total_segments=segments)
+            table = self.dynamodb.Table(table_name)
+            start_key = None
+            attempt = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        response = table.scan(
+                            Segment=segment,
+                            TotalSegments=segments,
+                            **page_kwargs(page_size, start_key),
+                        )
+                    except ClientError as e:
+                        code = e.response["Error"]["Code"]
+                        if code in THROTTLING_ERROR_CODES and (
+                            attempt < self.settings.dynamodb_batch_max_retries
+                        ):
+                            attempt += 1
+                            progress.throttled += 1
+                            self._backoff(attempt)
+                            continue
+                        raise
+                    attempt = 0
+                    items = response.get("Items", [])
+                    start_key = response.get("LastEvaluatedKey")
+                    progress.pages += 1
+                    progress.items += len(items)
+                    progress.done = not start_key
+                    if items and not publish(items):
+                        return
+                    if on_progress:
+                        on_progress(progress)
+                    if progress.done:
+                        logger.info(
+                            f"Segment {segment + 1}/{segments} of {table_name} done: "
+                            f"{progress.items} items in {progress.pages} pages"
+                        )
+                        break
+            except Exception as e:
+                logger.error(f"Error scanning segment {segment} of {table_name}: {e}")
+                publish(e)
+            finally:
+                publish(None)
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parallel-scan")
+        try:
+            for segment in range(segments):
+                executor.submit(scan_segment, segment)
+            remaining = segments
+            while remaining:
+                entry = pages.get()
+                if entry is None:
+                    remaining -= 1
+                elif isinstance(entry, Exception):
+                    raise entry
+                else:
+                    yield entry
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def batch_put_items(self, table_name: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Put items in batches of 25, retrying unprocessed items.
+
+        Returns the items that could not be written after all retries.
+        """
+        failed = []
+        for start in range(0, len(items), BATCH_WRITE_SIZE):
+            requests = [
+                {"PutRequest": {"Item": item}} for item in items[start : start + BATCH_WRITE_SIZE]
+            ]
+            for attempt in range(self.settings.dynamodb_batch_max_retries + 1):
+                if attempt:
+                    self._backoff(attempt)
+                try:
+                    response = self.dynamodb.batch_write_item(RequestItems={table_name: requests})
+                except ClientError as e:
+                    logger.error(f"Error batch writing to {table_name}: {e}")
+                    break
+                requests = response.get("UnprocessedItems", {}).get(table_name, [])
+                if not requests:
+                    break
+            failed.extend(request["PutRequest"]["Item"] for request in requests)
+
+        logger.info(f"Batch put {len(items) - len(failed)}/{len(items)} items in {table_name}")
+        return failed
+
+    def batch_get_items(
+        self,
+        table_name: str,
+        keys: List[Dict[str, Any]],
+        projection: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Get items in batches of 100, retrying unprocessed keys.
+
+        Returns the items found, in no particular order, and the keys that
+        could not be fetched after all retries. Keys of missing items are in
+        neither list.
+        """
+        unique_keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+        items = []
+        unfetched = []
+        for start in range(0, len(unique_keys), BATCH_GET_SIZE):
+            request = {
+                table_name: {
+                    "Keys": unique_keys[start : start + BATCH_GET_SIZE],
+                    **projection_kwargs(projection),
+                }
+            }
+            for attempt in range(self.settings.dynamodb_batch_max_retries + 1):
+                if attempt:
+                    self._backoff(attempt)
+                try:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                except ClientError as e:
+                    logger.error(f"Error batch getting from {table_name}: {e}")
+                    break
+                items.extend(response.get("Responses", {}).get(table_name, []))
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+            if request:
+                unfetched.extend(request[table_name]["Keys"])
+
+        if unfetched:
+            logger.error(
+                f"Could not get {len(unfetched)}/{len(unique_keys)} keys from {table_name}: "
+                f"{unfetched}"
+            )
+        return items, unfetched
+
+    def _backoff(self, attempt: int):
+        """Sleep with full jitter before retrying unprocessed batch entries."""
+        time.sleep(backoff_delay(self.settings, attempt))
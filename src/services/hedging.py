@@ -0,0 +1,330 @@
+"""Hedged calls across redundant targets with circuit breakers."""
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from src.config import get_settings
+from src.metrics import BEDROCK_CIRCUIT_OPENS, BEDROCK_HEDGES, BEDROCK_TARGET_WINS
+from src.services.deadline import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Every target's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calls to a failing target for a cool-down, then lets a trial call through.
+
+    Opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_seconds`` have passed, one call is allowed; its success closes the
+    breaker and its failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        """Initialize a closed breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """``closed``, ``open`` or ``half_open``."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        """Whether a call may be sent to the target now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker at the threshold."""
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_in_flight:
+                    BEDROCK_CIRCUIT_OPENS.labels(target=self.name).inc()
+                    logger.warning(f"Circuit breaker for {self.name} opened")
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Give up a trial call that was abandoned before it finished."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies."""
+
+    def __init__(self, window: int = 200):
+        """Initialize an empty window."""
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Add a latency sample."""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 1) -> Optional[float]:
+        """The latency below which ``fraction`` of recent calls finished, or None if too few."""
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class HedgedCaller:
+    """Calls the primary target, duplicating slow or failed calls to the secondary.
+
+    A call still running after the ``hedge_percentile`` of recent primary
+    latencies (or ``initial_delay_seconds`` until there are enough samples) is
+    sent to the secondary target too, and the first answer wins. A failed call
+    fails over to the secondary right away. Targets whose circuit breaker is
+    open are skipped. Synchronous calls that lose the race or outlive the
+    deadline keep running on their thread; their result is discarded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        targets: List[str],
+        hedging: bool = True,
+        hedge_percentile: float = 0.95,
+        initial_delay_seconds: float = 3.0,
+        min_samples: int = 20,
+        breakers: Optional[Dict[str, CircuitBreaker]] = None,
+    ):
+        """Initialize the caller for targets in order of preference."""
+        self.name = name
+        self.targets = targets
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.initial_delay_seconds = initial_delay_seconds
+        self.min_samples = min_samples
+        self.breakers = breakers or {target: get_circuit_breaker(target) for target in targets}
+        self.latencies = LatencyTracker()
+
+    def call(self, fn: Callable[[str], Any], timeout: Optional[float] = None) -> Any:
+        """Call ``fn(target)``, hedging across targets and giving up after ``timeout`` seconds."""
+        targets = self._available_targets(timeout)
+        if len(targets) == 1 and timeout is None:
+            return self._attempt(fn, targets[0])
+
+        started = time.monotonic()
+        context = contextvars.copy_context()
+        future = _get_executor().submit(context.copy().run, self._attempt, fn, targets[0])
+        futures = {future: targets[0]}
+        pending = targets[1:]
+        error: Optional[BaseException] = None
+        try:
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures,
+                    timeout=self._next_wait(started, timeout, pending),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    target = futures.pop(future)
+                    try:
+                        return self._won(target, future.result())
+                    except Exception as e:
+                        error = e
+                reason = self._hedge_reason(started, pending, error)
+                if reason:
+                    target = pending.pop(0)
+                    future = _get_executor().submit(context.copy().run, self._attempt, fn, target)
+                    futures[future] = target
+                    BEDROCK_HEDGES.labels(model=self.name, reason=reason).inc()
+                elif self._expired(started, timeout):
+                    raise DeadlineExceeded(f"{self.name} call exceeded its {timeout:.2f}s deadline")
+            raise error
+        finally:
+            for future, target in futures.items():
+                if future.cancel():
+                    self.breakers[target].release()
+            self._release(pending)
+
+    async def acall(
+        self, fn: Callable[[str], Awaitable[Any]], timeout: Optional[float] = None
+    ) -> Any:
+        """Await ``fn(target)``, hedging across targets and giving up after ``timeout`` seconds."""
+        targets = self._available_targets(timeout)
+        if len(targets) == 1 and timeout is None:
+            return await self._aattempt(fn, targets[0])
+
+        started = time.monotonic()
+        tasks = {asyncio.create_task(self._aattempt(fn, targets[0])): targets[0]}
+        pending = targets[1:]
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=self._next_wait(started, timeout, pending),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    target = tasks.pop(task)
+                    try:
+                        return self._won(target, task.result())
+                    except Exception as e:
+                        error = e
+                reason = self._hedge_reason(started, pending, error)
+                if reason:
+                    target = pending.pop(0)
+                    tasks[asyncio.create_task(self._aattempt(fn, target))] = target
+                    BEDROCK_HEDGES.labels(model=self.name, reason=reason).inc()
+                elif self._expired(started, timeout):
+                    raise DeadlineExceeded(f"{self.name} call exceeded its {timeout:.2f}s deadline")
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._release(pending)
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging."""
+        observed = self.latencies.percentile(self.hedge_percentile, self.min_samples)
+        return self.initial_delay_seconds if observed is None else observed
+
+    def _available_targets(self, timeout: Optional[float]) -> List[str]:
+        """Targets whose breaker allows a call, in order of preference."""
+        if timeout is not None and timeout <= 0:
+            raise DeadlineExceeded(f"{self.name} call has no time left before its deadline")
+        targets = [target for target in self.targets if self.breakers[target].allow()]
+        if not targets:
+            raise CircuitOpenError(f"Every {self.name} target's circuit breaker is open")
+        return targets
+
+    def _release(self, targets: List[str]):
+        """Return the trial permits of targets that were never called."""
+        for target in targets:
+            self.breakers[target].release()
+
+    def _next_wait(
+        self, started: float, timeout: Optional[float], pending: List[str]
+    ) -> Optional[float]:
+        """Seconds to wait before the next hedge or the deadline, whichever is first."""
+        elapsed = time.monotonic() - started
+        waits = []
+        if timeout is not None:
+            waits.append(timeout - elapsed)
+        if pending and self.hedging:
+            waits.append(self.hedge_delay() - elapsed)
+        return max(0.0, min(waits)) if waits else None
+
+    def _hedge_reason(
+        self, started: float, pending: List[str], error: Optional[BaseException]
+    ) -> Optional[str]:
+        """Why to send the call to the next target now, or None."""
+        if not pending:
+            return None
+        if error is not None:
+            return "failover"
+        if self.hedging and time.monotonic() - started >= self.hedge_delay():
+            return "slow"
+        return None
+
+    @staticmethod
+    def _expired(started: float, timeout: Optional[float]) -> bool:
+        """Whether the deadline has passed."""
+        return timeout is not None and time.monotonic() - started >= timeout
+
+    def _won(self, target: str, result: Any) -> Any:
+        """Record which target's answer was used."""
+        BEDROCK_TARGET_WINS.labels(model=self.name, target=target).inc()
+        return result
+
+    def _attempt(self, fn: Callable[[str], Any], target: str) -> Any:
+        """Call one target, recording its latency and health."""
+        started = time.monotonic()
+        try:
+            result = fn(target)
+        except Exception as e:
+            self.breakers[target].record_failure()
+            logger.warning(f"{self.name} call to {target} failed: {e!r}")
+            raise
+        self._record_success(target, time.monotonic() - started)
+        return result
+
+    async def _aattempt(self, fn: Callable[[str], Awaitable[Any]], target: str) -> Any:
+        """Await one target, recording its latency and health."""
+        started = time.monotonic()
+        try:
+            result = await fn(target)
+        except asyncio.CancelledError:
+            self.breakers[target].release()
+            raise
+        except Exception as e:
+            self.breakers[target].record_failure()
+            logger.warning(f"{self.name} call to {target} failed: {e!r}")
+            raise
+        self._record_success(target, time.monotonic() - started)
+        return result
+
+    def _record_success(self, target: str, seconds: float):
+        """Close the target's breaker and track primary latencies for the hedge delay."""
+        self.breakers[target].record_success()
+        if target == self.targets[0]:
+            self.latencies.record(seconds)
+
+
+@lru_cache()
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Threads running hedged synchronous calls, one per pooled Bedrock connection."""
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=get_settings().aws_max_pool_connections, thread_name_prefix="hedged-call"
+    )
+
+
+@lru_cache()
+def get_circuit_breaker(target: str) -> CircuitBreaker:
+    """Get the process-wide circuit breaker of a target, shared by every model."""
+    settings = get_settings()
+    return CircuitBreaker(
+        target, settings.bedrock_circuit_failure_threshold, settings.bedrock_circuit_reset_seconds
+    )
+
+
+@lru_cache()
+def get_hedged_caller(model_id: str, targets: Tuple[str, ...]) -> HedgedCaller:
+    """Get the process-wide hedged caller of a model across targets."""
+    settings = get_settings()
+    return HedgedCaller(
+        model_id,
+        list(targets),
+        hedging=settings.bedrock_hedging_enabled,
+        hedge_percentile=settings.bedrock_hedge_percentile,
+        initial_delay_seconds=settings.bedrock_hedge_initial_delay_seconds,
+        min_samples=settings.bedrock_hedge_min_samples,
+    )
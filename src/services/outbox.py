@@ -0,0 +1,361 @@
+"""Durable write-behind outbox drained to DynamoDB in the background."""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.config import get_settings
+from src.metrics import OUTBOX_FLUSHES, OUTBOX_PENDING, OUTBOX_WRITE_DELAY
+from src.services.dynamodb_service import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Batch writers take a table and items and return the items that could not be written
+BatchWriter = Callable[[str, List[Dict[str, Any]]], List[Dict[str, Any]]]
+AsyncBatchWriter = Callable[[str, List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+# Failed attempts counted towards the retry backoff, which is capped well before this
+MAX_BACKOFF_ATTEMPT = 16
+
+
+def _encode_key(key: Dict[str, Any]) -> str:
+    """Encode an item key so equal keys compare equal."""
+    return json.dumps(key, sort_keys=True)
+
+
+@dataclass
+class OutboxEntry:
+    """A pending put claimed from the outbox for writing."""
+
+    table_name: str
+    key: Dict[str, Any]
+    item: Dict[str, Any]
+    version: int
+    attempts: int
+    created_at: float
+
+
+class WriteOutbox:
+    """Durable queue of DynamoDB puts in a local SQLite file in WAL mode.
+
+    Entries are keyed by table and item key: appending an item again replaces
+    its pending put, and replaying a put is idempotent. Every append is synced
+    to disk before it returns. Claimed entries are leased for
+    ``LEASE_SECONDS``, so entries of a writer that died are claimed again.
+    Items must be JSON-serializable.
+    """
+
+    LEASE_SECONDS = 120
+
+    def __init__(self, path: str):
+        """Open (and create if needed) the outbox at ``path``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "table_name TEXT NOT NULL, item_key TEXT NOT NULL, item TEXT NOT NULL, "
+            "version INTEGER NOT NULL DEFAULT 1, attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, next_attempt_at REAL NOT NULL, "
+            "PRIMARY KEY (table_name, item_key))"
+        )
+        OUTBOX_PENDING.set(self.pending())
+
+    def append(self, table_name: str, key: Dict[str, Any], item: Dict[str, Any]) -> bool:
+        """Queue a put of ``item``, replacing any pending put of the same key."""
+        now = time.time()
+        try:
+            payload = json.dumps(item)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO outbox (table_name, item_key, item, created_at, next_attempt_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(table_name, item_key) "
+                    "DO UPDATE SET item = excluded.item, version = version + 1",
+                    (table_name, _encode_key(key), payload, now, now),
+                )
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            logger.error(f"Error appending {key} to the outbox: {e}")
+            return False
+        OUTBOX_PENDING.set(self.pending())
+        return True
+
+    def update(self, table_name: str, key: Dict[str, Any], updates: Dict[str, Any]) -> bool:
+        """Merge ``updates`` into a pending put; False if the item is not pending."""
+        try:
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                with self._conn:
+                    row = self._conn.execute(
+                        "SELECT item FROM outbox WHERE table_name = ? AND item_key = ?",
+                        (table_name, _encode_key(key)),
+                    ).fetchone()
+                    if row is None:
+                        return False
+                    item = {**json.loads(row[0]), **updates}
+                    self._conn.execute(
+                        "UPDATE outbox SET item = ?, version = version + 1 "
+                        "WHERE table_name = ? AND item_key = ?",
+                        (json.dumps(item), table_name, _encode_key(key)),
+                    )
+            return True
+        except (TypeError, ValueError, sqlite3.Error) as e:
+            logger.error(f"Error updating {key} in the outbox: {e}")
+            return False
+
+    def get(self, table_name: str, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the item of a pending put, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item FROM outbox WHERE table_name = ? AND item_key = ?",
+                (table_name, _encode_key(key)),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def claim(self, limit: int) -> List[OutboxEntry]:
+        """Lease up to ``limit`` due entries, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            with self._conn:
+                rows = self._conn.execute(
+                    "SELECT table_name, item_key, item, version, attempts, created_at FROM outbox "
+                    "WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE table_name = ? AND item_key = ?",
+                    [(now + self.LEASE_SECONDS, row[0], row[1]) for row in rows],
+                )
+        return [
+            OutboxEntry(
+                table_name=table_name,
+                key=json.loads(item_key),
+                item=json.loads(item),
+                version=version,
+                attempts=attempts,
+                created_at=created_at,
+            )
+            for table_name, item_key, item, version, attempts, created_at in rows
+        ]
+
+    def complete(self, entries: List[OutboxEntry]):
+        """Remove written entries; entries changed since they were claimed are due again."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            with self._conn:
+                for entry in entries:
+                    deleted = self._conn.execute(
+                        "DELETE FROM outbox WHERE table_name = ? AND item_key = ? AND version = ?",
+                        (entry.table_name, _encode_key(entry.key), entry.version),
+                    ).rowcount
+                    if not deleted:
+                        self._conn.execute(
+                            "UPDATE outbox SET next_attempt_at = ? "
+                            "WHERE table_name = ? AND item_key = ?",
+                            (now, entry.table_name, _encode_key(entry.key)),
+                        )
+        OUTBOX_PENDING.set(self.pending())
+
+    def retry(self, entries: List[OutboxEntry], delays: List[float]):
+        """Schedule failed entries to be claimed again after their delays."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? "
+                    "WHERE table_name = ? AND item_key = ?",
+                    [
+                        (now + delay, entry.table_name, _encode_key(entry.key))
+                        for entry, delay in zip(entries, delays)
+                    ],
+                )
+
+    def pending(self) -> int:
+        """Number of puts not yet written."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+class OutboxFlusher:
+    """Drains an outbox to DynamoDB with batch writes, retrying failed items with backoff.
+
+    Runs as a task on the event loop it is started from, or as a daemon thread
+    when started outside one, until the outbox is empty. Entries are never
+    dropped: a put that keeps failing stays in the outbox and is retried.
+    """
+
+    def __init__(
+        self,
+        outbox: WriteOutbox,
+        write: BatchWriter,
+        awrite: AsyncBatchWriter,
+        batch_size: int = 25,
+        interval_seconds: float = 1.0,
+    ):
+        """Initialize the flusher with sync and async batch writers."""
+        self.settings = get_settings()
+        self.outbox = outbox
+        self.write = write
+        self.awrite = awrite
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_wake = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._task_wake: Optional[asyncio.Event] = None
+        self._closing = False
+
+    def start(self):
+        """Start draining in the background unless already running, waking it if it is."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="outbox-flusher", daemon=True
+                    )
+                    self._thread.start()
+            self._thread_wake.set()
+            return
+
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task_wake = asyncio.Event()
+            self._task = loop.create_task(self._arun())
+        self._task_wake.set()
+
+    async def aclose(self):
+        """Stop the background task after a last drain of the due entries."""
+        task = self._task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            await self.aflush()
+            return
+        self._closing = True
+        self._task_wake.set()
+        try:
+            await task
+        finally:
+            self._closing = False
+
+    def flush(self) -> int:
+        """Write every due entry, returning how many were stored."""
+        written = 0
+        while True:
+            entries = self.outbox.claim(self.batch_size)
+            if not entries:
+                return written
+            for table_name, group in self._by_table(entries).items():
+                items = [entry.item for entry in group]
+                try:
+                    failed = self.write(table_name, items)
+                except Exception as e:
+                    logger.error(f"Error flushing outbox to {table_name}: {e!r}")
+                    failed = items
+                written += self._settle(table_name, group, failed)
+
+    async def aflush(self) -> int:
+        """Write every due entry without blocking the event loop on DynamoDB or SQLite."""
+        written = 0
+        while True:
+            entries = await asyncio.to_thread(self.outbox.claim, self.batch_size)
+            if not entries:
+                return written
+            for table_name, group in self._by_table(entries).items():
+                items = [entry.item for entry in group]
+                try:
+                    failed = await self.awrite(table_name, items)
+                except Exception as e:
+                    logger.error(f"Error flushing outbox to {table_name}: {e!r}")
+                    failed = items
+                written += await asyncio.to_thread(self._settle, table_name, group, failed)
+
+    def _run(self):
+        """Drain the outbox from a thread until it is empty."""
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error draining the outbox: {e!r}")
+            with self._lock:
+                if not self.outbox.pending():
+                    self._thread = None
+                    return
+            self._thread_wake.wait(self.interval_seconds)
+            self._thread_wake.clear()
+
+    async def _arun(self):
+        """Drain the outbox from a task until it is empty or the flusher closes."""
+        while True:
+            try:
+                await self.aflush()
+            except Exception as e:
+                logger.error(f"Error draining the outbox: {e!r}")
+            if self._closing or not await asyncio.to_thread(self.outbox.pending):
+                return
+            try:
+                await asyncio.wait_for(self._task_wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._task_wake.clear()
+
+    @staticmethod
+    def _by_table(entries: List[OutboxEntry]) -> Dict[str, List[OutboxEntry]]:
+        """Group entries by table for batch writes."""
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[entry.table_name].append(entry)
+        return groups
+
+    def _settle(
+        self, table_name: str, entries: List[OutboxEntry], failed: List[Dict[str, Any]]
+    ) -> int:
+        """Complete written entries and reschedule failed ones; returns how many were written."""
+        key_names = list(entries[0].key)
+        failed_keys = {
+            _encode_key({name: item.get(name) for name in key_names}) for item in failed
+        }
+        written = [entry for entry in entries if _encode_key(entry.key) not in failed_keys]
+        retried = [entry for entry in entries if _encode_key(entry.key) in failed_keys]
+
+        if written:
+            self.outbox.complete(written)
+            OUTBOX_FLUSHES.labels(table=table_name, outcome="written").inc(len(written))
+            now = time.time()
+            for entry in written:
+                OUTBOX_WRITE_DELAY.observe(now - entry.created_at)
+        if retried:
+            self.outbox.retry(
+                retried,
+                [
+                    backoff_delay(self.settings, min(entry.attempts + 1, MAX_BACKOFF_ATTEMPT))
+                    for entry in retried
+                ],
+            )
+            OUTBOX_FLUSHES.labels(table=table_name, outcome="retried").inc(len(retried))
+            logger.warning(f"Retrying {len(retried)} outbox writes to {table_name} later")
+        return len(written)
+
+
+@lru_cache()
+def get_outbox(path: str) -> WriteOutbox:
+    """Get the process-wide outbox stored at ``path``."""
+    return WriteOutbox(path)
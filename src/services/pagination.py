@@ -0,0 +1,30 @@
+"""Opaque cursors for paginated DynamoDB reads."""
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Encode a DynamoDB LastEvaluatedKey as an opaque URL-safe cursor."""
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Decode a cursor back into an ExclusiveStartKey.
+
+    Raises ValueError if the cursor was not produced by encode_cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(start_key, dict) or not all(isinstance(k, str) for k in start_key):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return start_key
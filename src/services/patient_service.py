@@ -1,14 +1,25 @@
 """Patient service for patient-related operations."""
 import logging
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
-from src.models.patient import Patient, PatientCreate, PatientUpdate
+from src.models.patient import (
+    Patient,
+    PatientCreate,
+    PatientUpdate,
+    PatientClinicalSummary,
+    PatientPage,
+)
 from src.services.dynamodb_service import DynamoDBService
+from src.services.async_dynamodb_service import AsyncDynamoDBService
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.cache import MISSING, get_cache
 from src.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+CLINICAL_SUMMARY_FIELDS = list(PatientClinicalSummary.model_fields)
+
 
 class PatientService:
     """Service for patient operations."""
@@ -16,50 +27,258 @@ class PatientService:
     def __init__(self):
         """Initialize patient service."""
         self.db_service = DynamoDBService()
+        self.async_db_service = AsyncDynamoDBService()
         self.settings = get_settings()
         self.table_name = self.settings.dynamodb_patients_table
+        cache_options = (
+            self.settings.patient_cache_ttl_seconds,
+            self.settings.patient_cache_negative_ttl_seconds,
+            self.settings.patient_cache_max_size,
+        )
+        self.patient_cache = get_cache("patient", Patient, *cache_options)
+        self.clinical_cache = get_cache("clinical", PatientClinicalSummary, *cache_options)
 
     def create_patient(self, patient_data: PatientCreate) -> Patient:
         """Create a new patient."""
-        patient_id = f"PAT-{uuid.uuid4().hex[:8].upper()}"
-        
-        patient = Patient(
-            patient_id=patient_id,
-            **patient_data.model_dump(),
-        )
+        patient = self._build_patient(patient_data)
 
         self.db_service.put_item(self.table_name, patient.model_dump())
-        logger.info(f"Created patient {patient_id}")
+        self._invalidate(patient.patient_id)
+        logger.info(f"Created patient {patient.patient_id}")
         return patient
 
+    async def create_patient_async(self, patient_data: PatientCreate) -> Patient:
+        """Create a new patient without blocking the event loop."""
+        patient = self._build_patient(patient_data)
+
+        await self.async_db_service.put_item(self.table_name, patient.model_dump())
+        await self._invalidate_async(patient.patient_id)
+        logger.info(f"Created patient {patient.patient_id}")
+        return patient
+
+    def create_patients(self, patients_data: List[PatientCreate]) -> List[Patient]:
+        """Create patients in bulk, returning the ones that were stored."""
+        patients = [self._build_patient(patient_data) for patient_data in patients_data]
+
+        failed = self.db_service.batch_put_items(
+            self.table_name, [patient.model_dump() for patient in patients]
+        )
+        for patient in patients:
+            self._invalidate(patient.patient_id)
+        failed_ids = {item["patient_id"] for item in failed}
+        if failed_ids:
+            logger.error(f"Failed to create {len(failed_ids)} patients")
+
+        created = [patient for patient in patients if patient.patient_id not in failed_ids]
+        logger.info(f"Created {len(created)} patients")
+        return created
+
     def get_patient(self, patient_id: str) -> Optional[Patient]:
-        """Get a patient by ID."""
-        item = self.db_service.get_item(self.table_name, {"patient_id": patient_id})
-        if item:
-            return Patient(**item)
-        return None
+        """Get a patient by ID, reading through the patient cache."""
+
+        def load() -> Optional[Patient]:
+            item = self.db_service.get_item(self.table_name, {"patient_id": patient_id})
+            return Patient(**item) if item else None
+
+        return self.patient_cache.get_or_load(patient_id, load)
+
+    def get_patients(self, patient_ids: List[str]) -> Dict[str, Patient]:
+        """Get several patients by ID, keyed by patient ID.
+
+        Patients that don't exist or could not be read are left out; only the
+        former are cached as missing.
+        """
+        patients = {}
+        missing = {}
+        for patient_id in dict.fromkeys(patient_ids):
+            version = self.patient_cache.version(patient_id)
+            patient = MISSING if version is None else self.patient_cache.get(patient_id, version)
+            if patient is MISSING:
+                missing[patient_id] = version
+            elif patient is not None:
+                patients[patient_id] = patient
+
+        if missing:
+            items, unfetched = self.db_service.batch_get_items(
+                self.table_name, [{"patient_id": patient_id} for patient_id in missing]
+            )
+            fetched = {item["patient_id"]: Patient(**item) for item in items}
+            unfetched_ids = {key["patient_id"] for key in unfetched}
+            for patient_id, version in missing.items():
+                # Keys that were never fetched must not be cached as missing patients
+                if version is not None and patient_id not in unfetched_ids:
+                    self.patient_cache.set(patient_id, fetched.get(patient_id), version)
+            patients.update(fetched)
+
+        return patients
+
+    async def get_patient_async(self, patient_id: str) -> Optional[Patient]:
+        """Get a patient by ID without blocking the event loop."""
+
+        async def load() -> Optional[Patient]:
+            item = await self.async_db_service.get_item(
+                self.table_name, {"patient_id": patient_id}
+            )
+            return Patient(**item) if item else None
+
+        return await self.patient_cache.aget_or_load(patient_id, load)
 
     def update_patient(self, patient_id: str, updates: PatientUpdate) -> Optional[Patient]:
         """Update a patient."""
-        update_data = {k: v for k, v in updates.model_dump().items() if v is not None}
-        update_data["updated_at"] = datetime.utcnow().isoformat()
-
-        success = self.db_service.update_item(
-            self.table_name, {"patient_id": patient_id}, update_data
+        item = self.db_service.update_item(
+            self.table_name, {"patient_id": patient_id}, self._build_update(updates)
         )
+        return self._store_updated(patient_id, item)
 
-        if success:
-            return self.get_patient(patient_id)
-        return None
+    async def update_patient_async(
+        self, patient_id: str, updates: PatientUpdate
+    ) -> Optional[Patient]:
+        """Update a patient without blocking the event loop."""
+        item = await self.async_db_service.update_item(
+            self.table_name, {"patient_id": patient_id}, self._build_update(updates)
+        )
+        return await self._store_updated_async(patient_id, item)
 
     def list_patients(self, limit: Optional[int] = 50) -> List[Patient]:
         """List all patients."""
         items = self.db_service.scan_table(self.table_name, limit=limit)
         return [Patient(**item) for item in items]
 
+    async def list_patients_page_async(
+        self, limit: Optional[int] = 50, cursor: Optional[str] = None
+    ) -> PatientPage:
+        """List one page of patients, resuming from an opaque cursor."""
+        items, last_key = await self.async_db_service.scan_page(
+            self.table_name, limit=limit, start_key=decode_cursor(cursor)
+        )
+        return PatientPage(
+            items=[Patient(**item) for item in items], next_cursor=encode_cursor(last_key)
+        )
+
     def get_patient_medical_history(self, patient_id: str) -> dict:
         """Get patient's medical history summary."""
-        patient = self.get_patient(patient_id)
+        return self._build_medical_history(self.get_patient(patient_id))
+
+    async def get_patient_medical_history_async(self, patient_id: str) -> dict:
+        """Get patient's medical history summary without blocking the event loop."""
+        return self._build_medical_history(await self.get_patient_async(patient_id))
+
+    def get_clinical_summary(self, patient_id: str) -> Optional[PatientClinicalSummary]:
+        """Get only the clinical fields of a patient, reading through the clinical cache."""
+
+        def load() -> Optional[PatientClinicalSummary]:
+            item = self.db_service.get_item(
+                self.table_name, {"patient_id": patient_id}, projection=CLINICAL_SUMMARY_FIELDS
+            )
+            return PatientClinicalSummary(**item) if item else None
+
+        return self.clinical_cache.get_or_load(patient_id, load)
+
+    async def get_clinical_summary_async(
+        self, patient_id: str
+    ) -> Optional[PatientClinicalSummary]:
+        """Get only the clinical fields of a patient without blocking the event loop."""
+
+        async def load() -> Optional[PatientClinicalSummary]:
+            item = await self.async_db_service.get_item(
+                self.table_name, {"patient_id": patient_id}, projection=CLINICAL_SUMMARY_FIELDS
+            )
+            return PatientClinicalSummary(**item) if item else None
+
+        return await self.clinical_cache.aget_or_load(patient_id, load)
+
+    async def get_clinical_summaries_async(
+        self, patient_ids: List[str]
+    ) -> Dict[str, PatientClinicalSummary]:
+        """Get the clinical fields of several patients in one batch read, keyed by patient ID."""
+        summaries = {}
+        missing = {}
+        for patient_id in dict.fromkeys(patient_ids):
+            version = await self.clinical_cache.aversion(patient_id)
+            summary = (
+                MISSING if version is None else await self.clinical_cache.aget(patient_id, version)
+            )
+            if summary is MISSING:
+                missing[patient_id] = version
+            elif summary is not None:
+                summaries[patient_id] = summary
+
+        if missing:
+            items, unfetched = await self.async_db_service.batch_get_items(
+                self.table_name,
+                [{"patient_id": patient_id} for patient_id in missing],
+                projection=CLINICAL_SUMMARY_FIELDS,
+            )
+            fetched = {item["patient_id"]: PatientClinicalSummary(**item) for item in items}
+            unfetched_ids = {key["patient_id"] for key in unfetched}
+            for patient_id, version in missing.items():
+                if version is not None and patient_id not in unfetched_ids:
+                    await self.clinical_cache.aset(patient_id, fetched.get(patient_id), version)
+            summaries.update(fetched)
+
+        return summaries
+
+    def get_patient_clinical_history(self, patient_id: str) -> dict:
+        """Get the clinical history used for triage."""
+        return self._build_clinical_history(self.get_clinical_summary(patient_id))
+
+    async def get_patient_clinical_history_async(self, patient_id: str) -> dict:
+        """Get the clinical history used for triage without blocking the event loop."""
+        return self._build_clinical_history(await self.get_clinical_summary_async(patient_id))
+
+    async def get_patient_clinical_histories_async(self, patient_ids: List[str]) -> Dict[str, dict]:
+        """Get the clinical histories used for triage of several patients, keyed by patient ID."""
+        summaries = await self.get_clinical_summaries_async(patient_ids)
+        return {
+            patient_id: self._build_clinical_history(summary)
+            for patient_id, summary in summaries.items()
+        }
+
+    def _invalidate(self, patient_id: str):
+        """Invalidate every cached view of a patient in all workers."""
+        self.patient_cache.invalidate(patient_id)
+        self.clinical_cache.invalidate(patient_id)
+
+    def _store_updated(self, patient_id: str, item: Optional[dict]) -> Optional[Patient]:
+        """Build the updated patient and refresh the cache with it."""
+        self._invalidate(patient_id)
+        if not item:
+            return None
+        patient = Patient(**item)
+        self.patient_cache.set(patient_id, patient)
+        return patient
+
+    async def _invalidate_async(self, patient_id: str):
+        """Invalidate every cached view of a patient without blocking the event loop."""
+        await self.patient_cache.ainvalidate(patient_id)
+        await self.clinical_cache.ainvalidate(patient_id)
+
+    async def _store_updated_async(
+        self, patient_id: str, item: Optional[dict]
+    ) -> Optional[Patient]:
+        """Build the updated patient and refresh the cache without blocking the event loop."""
+        await self._invalidate_async(patient_id)
+        if not item:
+            return None
+        patient = Patient(**item)
+        await self.patient_cache.aset(patient_id, patient)
+        return patient
+
+    @staticmethod
+    def _build_patient(patient_data: PatientCreate) -> Patient:
+        """Build a new patient with a generated ID."""
+        patient_id = f"PAT-{uuid.uuid4().hex[:8].upper()}"
+        return Patient(patient_id=patient_id, **patient_data.model_dump())
+
+    @staticmethod
+    def _build_update(updates: PatientUpdate) -> dict:
+        """Build the attribute updates for a patient."""
+        update_data = {k: v for k, v in updates.model_dump().items() if v is not None}
+        update_data["updated_at"] = datetime.utcnow().isoformat()
+        return update_data
+
+    def _build_medical_history(self, patient: Optional[Patient]) -> dict:
+        """Build the medical history summary for a patient."""
         if not patient:
             return {}
 
@@ -73,6 +292,20 @@ class PatientService:
             "current_medications": patient.current_medications,
         }
 
+    def _build_clinical_history(self, summary: Optional[PatientClinicalSummary]) -> dict:
+        """Build the triage history for a patient's clinical summary."""
+        if not summary:
+            return {}
+
+        return {
+            "patient_id": summary.patient_id,
+            "age": self._calculate_age(summary.date_of_birth),
+            "blood_type": summary.blood_type,
+            "allergies": summary.allergies,
+            "chronic_conditions": summary.chronic_conditions,
+            "current_medications": summary.current_medications,
+        }
+
     @staticmethod
     def _calculate_age(date_of_birth: str) -> int:
         """Calculate age from date of birth."""
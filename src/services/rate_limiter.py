@@ -0,0 +1,208 @@
+"""Client-side token-bucket rate limiting of Bedrock calls with priority queueing."""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from src.config import get_settings
+from src.metrics import (
+    BEDROCK_RATE_LIMIT_QUEUE_DEPTH,
+    BEDROCK_RATE_LIMIT_TIMEOUTS,
+    BEDROCK_RATE_LIMIT_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Priority bands used to label wait-time metrics
+PRIORITY_BANDS = ((90, "critical"), (70, "high"), (40, "medium"), (0, "low"))
+
+
+class RateLimitTimeout(TimeoutError):
+    """A call waited longer than the maximum for rate limit capacity."""
+
+
+class _Waiter:
+    """A call waiting for capacity, woken from any thread."""
+
+    def __init__(self, tokens: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Initialize the waiter; async waiters pass their event loop."""
+        self.tokens = tokens
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+
+    def wake(self):
+        """Wake the waiter so it re-checks capacity."""
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class PriorityRateLimiter:
+    """Request and token buckets refilled per minute, granted to waiting calls by priority.
+
+    Calls that cannot be admitted right away wait in a heap ordered by
+    priority (highest first, then arrival); only the head of the queue may take
+    capacity, so under saturation urgent calls go first. Sync and async callers
+    share the same queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_wait_seconds: float,
+    ):
+        """Initialize the limiter with full buckets."""
+        self.name = name
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.max_wait_seconds = max_wait_seconds
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+
+    def acquire(self, tokens: float, priority: int = 0) -> float:
+        """Block until a call of ``tokens`` may proceed, returning the seconds waited.
+
+        Raises RateLimitTimeout after ``max_wait_seconds``.
+        """
+        waiter = _Waiter(self._clamp(tokens))
+        started = time.monotonic()
+        entry = self._enqueue(waiter, priority)
+        try:
+            while True:
+                delay = self._try_grant(entry, started)
+                if delay is None:
+                    break
+                waiter.event.wait(delay)
+                waiter.event.clear()
+        except BaseException:
+            self._dequeue(entry)
+            raise
+        return self._record_wait(started, priority)
+
+    async def aacquire(self, tokens: float, priority: int = 0) -> float:
+        """Wait without blocking the event loop until a call of ``tokens`` may proceed.
+
+        Raises RateLimitTimeout after ``max_wait_seconds``.
+        """
+        waiter = _Waiter(self._clamp(tokens), asyncio.get_running_loop())
+        started = time.monotonic()
+        entry = self._enqueue(waiter, priority)
+        try:
+            while True:
+                delay = self._try_grant(entry, started)
+                if delay is None:
+                    break
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                waiter.event.clear()
+        except BaseException:
+            self._dequeue(entry)
+            raise
+        return self._record_wait(started, priority)
+
+    def queue_depth(self) -> int:
+        """Number of calls waiting for capacity."""
+        return len(self._queue)
+
+    def _clamp(self, tokens: float) -> float:
+        """Limit a call's tokens to the bucket size so it can eventually be admitted."""
+        return min(max(tokens, 0.0), self.token_capacity)
+
+    def _enqueue(self, waiter: _Waiter, priority: int) -> Tuple[int, int, _Waiter]:
+        """Add a waiter to the priority queue."""
+        entry = (-priority, next(self._sequence), waiter)
+        with self._lock:
+            heapq.heappush(self._queue, entry)
+            BEDROCK_RATE_LIMIT_QUEUE_DEPTH.labels(model=self.name).set(len(self._queue))
+        return entry
+
+    def _dequeue(self, entry: Tuple[int, int, _Waiter]):
+        """Remove an abandoned waiter and wake the next one."""
+        with self._lock:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            BEDROCK_RATE_LIMIT_QUEUE_DEPTH.labels(model=self.name).set(len(self._queue))
+            if self._queue:
+                self._queue[0][2].wake()
+
+    def _try_grant(self, entry: Tuple[int, int, _Waiter], started: float) -> Optional[float]:
+        """Take capacity if the waiter is at the head and it suffices.
+
+        Returns None once granted, otherwise how long to wait before re-checking.
+        """
+        waiter = entry[2]
+        with self._lock:
+            self._refill()
+            remaining = started + self.max_wait_seconds - time.monotonic()
+            if self._queue[0] is entry and self._requests >= 1 and self._tokens >= waiter.tokens:
+                heapq.heappop(self._queue)
+                self._requests -= 1
+                self._tokens -= waiter.tokens
+                BEDROCK_RATE_LIMIT_QUEUE_DEPTH.labels(model=self.name).set(len(self._queue))
+                if self._queue:
+                    self._queue[0][2].wake()
+                return None
+            if remaining <= 0:
+                BEDROCK_RATE_LIMIT_TIMEOUTS.labels(model=self.name).inc()
+                raise RateLimitTimeout(
+                    f"Waited more than {self.max_wait_seconds}s for {self.name} rate limit capacity"
+                )
+            if self._queue[0] is not entry:
+                return remaining
+            return min(self._seconds_until_capacity(waiter.tokens), remaining)
+
+    def _refill(self):
+        """Add the capacity accrued since the last refill."""
+        now = time.monotonic()
+        elapsed_minutes = (now - self._refilled_at) / 60
+        self._refilled_at = now
+        self._requests = min(
+            self.request_capacity, self._requests + elapsed_minutes * self.request_capacity
+        )
+        self._tokens = min(
+            self.token_capacity, self._tokens + elapsed_minutes * self.token_capacity
+        )
+
+    def _seconds_until_capacity(self, tokens: float) -> float:
+        """Seconds until both buckets hold enough for a call of ``tokens``."""
+        missing_requests = max(0.0, 1 - self._requests)
+        missing_tokens = max(0.0, tokens - self._tokens)
+        return 60 * max(
+            missing_requests / self.request_capacity, missing_tokens / self.token_capacity
+        )
+
+    def _record_wait(self, started: float, priority: int) -> float:
+        """Record the seconds a granted call waited."""
+        waited = time.monotonic() - started
+        band = next((label for threshold, label in PRIORITY_BANDS if priority >= threshold), "low")
+        BEDROCK_RATE_LIMIT_WAIT.labels(model=self.name, priority=band).observe(waited)
+        if waited > 1:
+            logger.info(f"Waited {waited:.2f}s for {self.name} rate limit capacity")
+        return waited
+
+
+@lru_cache()
+def get_rate_limiter(model_id: str) -> Optional[PriorityRateLimiter]:
+    """Get the process-wide rate limiter for a Bedrock model, or None if disabled."""
+    settings = get_settings()
+    if not settings.bedrock_rate_limit_enabled:
+        return None
+    return PriorityRateLimiter(
+        model_id,
+        settings.bedrock_requests_per_minute,
+        settings.bedrock_tokens_per_minute,
+        settings.bedrock_rate_limit_max_wait_seconds,
+    )
@@ -0,0 +1,98 @@
+"""Coalescing of concurrent identical calls into a single execution."""
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+from src.metrics import SINGLE_FLIGHT_COALESCED
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """A synchronous call in flight and its outcome."""
+
+    def __init__(self):
+        """Initialize the call."""
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; callers arriving meanwhile share its outcome.
+
+    Unlike a cache, nothing is kept once the call finishes: the next caller
+    with the same key starts a new call. The first caller runs the call; if it
+    is cancelled, one of the callers waiting on it runs the call instead.
+    """
+
+    def __init__(self, name: str):
+        """Initialize the group; ``name`` labels its metrics."""
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._futures: Dict[str, asyncio.Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call ``fn``, or wait for and share the outcome of the call in flight for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._record_coalesced(key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()``, or share the outcome of the call in flight for ``key``."""
+        while key in self._futures:
+            future = self._futures[key]
+            self._record_coalesced(key)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the error as retrieved in case no caller was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[key]
+
+    def in_flight(self) -> int:
+        """Number of calls currently running."""
+        return len(self._calls) + len(self._futures)
+
+    def _record_coalesced(self, key: str):
+        """Count a caller that joined a call in flight."""
+        SINGLE_FLIGHT_COALESCED.labels(name=self.name).inc()
+        logger.info(f"Coalesced {self.name} call with the one in flight for {key[:12]}")
@@ -0,0 +1,699 @@
+"""Tests for AI agents."""
+import asyncio
+import json
+import sqlite3
+import threading
+import pytest
+from prometheus_client import REGISTRY
+from unittest.mock import AsyncMock, Mock
+from src.agents.coordinator_agent import CoordinatorAgent, TriageNotSavedError
+from src.agents.json_stream import JsonFieldParser
+from src.agents.triage_rules import TriageRuleEngine, Vitals, parse_vitals
+from src.agents.triage_agent import TriageAgent
+from src.agents.triage_cache import (
+    IdempotencyConflictError,
+    TriageIdempotencyStore,
+    request_fingerprint,
+)
+from src.models.triage import (
+    AssessmentStatus,
+    ResponseMode,
+    TriageRequest,
+    TriageResponse,
+    Symptom,
+    TriageLevel,
+)
+from src.config import get_settings
+from src.services.cache import get_cache
+
+LLM_RESULT = {
+    "triage_level": "urgent",
+    "priority_score": 80,
+    "assessment_summary": "Dolor torácico",
+    "recommended_action": "ECG inmediato",
+    "recommended_specialty": "Cardiología",
+    "recommended_tests": ["ECG"],
+    "risk_factors": [],
+    "warning_signs": [],
+    "estimated_wait_time": "15 minutos",
+    "agent_reasoning": "Dolor torácico con factores de riesgo",
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty process-wide caches."""
+    get_cache.cache_clear()
+    yield
+    get_cache.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def triage_outbox(tmp_path, monkeypatch):
+    """Give every test its own empty triage outbox and workflow checkpoints."""
+    monkeypatch.setenv("TRIAGE_OUTBOX_PATH", str(tmp_path / "triage-outbox.sqlite3"))
+    monkeypatch.setenv("TRIAGE_CHECKPOINT_PATH", str(tmp_path / "triage-checkpoints.sqlite3"))
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def triage_request():
+    """Sample triage request."""
+    return TriageRequest(
+        patient_id="PAT-001",
+        symptoms=[
+            Symptom(name="Dolor de pecho", severity=8, duration_hours=2),
+            Symptom(name="Dificultad para respirar", severity=7, duration_hours=1),
+        ],
+        vital_signs={"heart_rate": 95, "blood_pressure": "140/90"},
+    )
+
+
+@pytest.fixture
+def triage_agent():
+    """Triage agent with a stubbed LLM."""
+    agent = TriageAgent()
+    agent.llm = Mock()
+    agent.llm.invoke.return_value = Mock(content=json.dumps(LLM_RESULT))
+    return agent
+
+
+@pytest.fixture
+async def coordinator(triage_agent):
+    """Coordinator over the stubbed triage agent, with mocked patients and DynamoDB writes."""
+    coordinator = CoordinatorAgent()
+    coordinator.triage_agent = triage_agent
+    coordinator.patient_service = Mock()
+    coordinator.patient_service.get_patient_clinical_history_async = AsyncMock(return_value={})
+    coordinator.async_db_service = Mock()
+    coordinator.async_db_service.batch_put_items = AsyncMock(return_value=[])
+    yield coordinator
+    await coordinator.outbox_flusher.aclose()
+
+
+class TestTriageResultCache:
+    """Test triage result caching."""
+
+    def test_fingerprint_ignores_symptom_order_and_case(self, triage_request):
+        """Test equivalent submissions share a fingerprint."""
+        resubmitted = triage_request.model_copy(
+            update={
+                "symptoms": [
+                    Symptom(name="dificultad para respirar ", severity=7, duration_hours=1),
+                    Symptom(name="Dolor de pecho", severity=8, duration_hours=2),
+                ]
+            }
+        )
+        changed = triage_request.model_copy(update={"vital_signs": {"heart_rate": 130}})
+
+        assert request_fingerprint(resubmitted) == request_fingerprint(triage_request)
+        assert request_fingerprint(changed) != request_fingerprint(triage_request)
+
+    def test_duplicate_submission_skips_llm(self, triage_agent, triage_request):
+        """Test an identical re-submission is served from the cache with a new triage ID."""
+        history = {"patient_id": "PAT-001", "age": 40, "allergies": []}
+
+        first = triage_agent.assess_triage(triage_request, history)
+        second = triage_agent.assess_triage(triage_request, history)
+        other_history = triage_agent.assess_triage(triage_request, {**history, "age": 41})
+
+        assert triage_agent.llm.invoke.call_count == 2
+        assert second.triage_level == first.triage_level == TriageLevel.URGENT
+        assert second.triage_id != first.triage_id
+        assert other_history.triage_id != first.triage_id
+
+
+class TestTriageRules:
+    """Test rule-based pre-triage."""
+
+    def test_parse_vitals(self):
+        """Test untyped vital signs are parsed into numbers."""
+        vitals = parse_vitals(
+            {"SpO2": "88%", "blood_pressure": "85/60", "Temperature": "38,5 °C", "hr": 110}
+        )
+
+        assert vitals == Vitals(
+            temperature=38.5,
+            heart_rate=110.0,
+            oxygen_saturation=88.0,
+            systolic_bp=85.0,
+            diastolic_bp=60.0,
+        )
+        assert parse_vitals(None) == Vitals()
+
+    def test_hard_rules_decide_without_llm(self, triage_request):
+        """Test hard criteria produce a critical response and soft ones do not."""
+        engine = TriageRuleEngine()
+        hypoxemic = triage_request.model_copy(update={"vital_signs": {"oxygen_saturation": 86}})
+
+        response = engine.hard_response(hypoxemic)
+
+        assert response.triage_level == TriageLevel.CRITICAL
+        assert response.priority_score == 95
+        assert engine.hard_response(triage_request) is None
+
+    async def test_llm_timeout_falls_back_to_rules(self, triage_agent, triage_request):
+        """Test a slow LLM is abandoned for the rule-based assessment."""
+
+        async def slow_llm(prompt, **kwargs):
+            await asyncio.sleep(1)
+
+        triage_agent.llm.ainvoke = slow_llm
+        triage_agent.settings = triage_agent.settings.model_copy(
+            update={"triage_llm_timeout_seconds": 0.01}
+        )
+
+        response = await triage_agent.assess_triage_async(triage_request, {})
+
+        assert response.triage_level == TriageLevel.URGENT
+        assert response.priority_score == 70
+        assert "evaluación manual" in response.assessment_summary
+
+    def test_fallback_keeps_urgent_floor(self):
+        """Test the fallback never ranks a patient below URGENT/50."""
+        mild = TriageRequest(
+            patient_id="PAT-002",
+            symptoms=[Symptom(name="Tos leve", severity=1, duration_hours=24)],
+        )
+
+        response = TriageRuleEngine().fallback_response(mild, TimeoutError())
+
+        assert response.triage_level == TriageLevel.URGENT
+        assert response.priority_score >= 50
+        assert response.agent_reasoning.endswith("TimeoutError")
+
+
+class TestJsonFieldParser:
+    """Test incremental parsing of streamed JSON answers."""
+
+    def test_fields_complete_as_they_stream(self):
+        """Test each field is reported once its value is complete, even one char at a time."""
+        answer = '```json\n{"triage_level": "urgent", "priority_score": 80, ' + (
+            '"risk_factors": ["Fiebre, alta", "{x}"], "agent_reasoning": "dijo \\"no\\""}\n```'
+        )
+        parser = JsonFieldParser()
+
+        completed = []
+        for char in answer:
+            completed.extend((len(parser.text), field) for field in parser.feed(char))
+
+        assert [field for _, field in completed] == [
+            ("triage_level", "urgent"),
+            ("priority_score", 80),
+            ("risk_factors", ["Fiebre, alta", "{x}"]),
+            ("agent_reasoning", 'dijo "no"'),
+        ]
+        assert completed[0][0] < len(answer) // 3
+        assert parser.done
+
+
+class TestResponseModes:
+    """Test verbose and terse triage answers."""
+
+    async def test_terse_answer_maps_to_full_response(self, triage_agent, triage_request):
+        """Test a terse answer uses its own budget and expands into a full TriageResponse."""
+        terse_answer = {
+            "l": "semi_urgent",
+            "p": 45,
+            "s": "Dolor torácico leve",
+            "a": "ECG",
+            "t": ["ECG", "Troponinas", "Rx tórax", "Hemograma", "Ionograma"],
+        }
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(terse_answer)))
+        terse_request = triage_request.model_copy(update={"response_mode": ResponseMode.TERSE})
+
+        response = await triage_agent.assess_triage_async(terse_request, {})
+
+        assert response.triage_level == TriageLevel.SEMI_URGENT
+        assert response.assessment_summary == "Dolor torácico leve"
+        assert response.recommended_tests == ["ECG", "Troponinas", "Rx tórax"]
+        assert response.agent_reasoning is None
+        prompt = triage_agent.llm.ainvoke.await_args.args[0]
+        assert '"l": "critical|' in prompt[0].content
+        assert triage_agent.llm.ainvoke.await_args.kwargs == {"max_tokens": 512}
+
+    async def test_streamed_terse_lists_are_capped(self, triage_agent, triage_request):
+        """Test streamed terse fields get full names and the same list caps as parsed answers."""
+        terse_answer = json.dumps(
+            {"l": "semi_urgent", "p": 45, "s": "Dolor", "a": "ECG", "w": ["a", "b", "c", "d"]}
+        )
+        triage_agent.llm.stream.return_value = iter(
+            Mock(content=terse_answer[start : start + 7])
+            for start in range(0, len(terse_answer), 7)
+        )
+        terse_request = triage_request.model_copy(update={"response_mode": ResponseMode.TERSE})
+
+        events = dict([event async for event in triage_agent.astream_triage(terse_request, {})])
+
+        assert events["warning_signs"] == ["a", "b", "c"]
+        assert events["result"].warning_signs == ["a", "b", "c"]
+        assert triage_agent.llm.stream.call_args.kwargs == {"max_tokens": 512}
+
+
+class TestModelCascade:
+    """Test fast-model-first cascade routing."""
+
+    @pytest.mark.parametrize(
+        "fast_answer, escalated",
+        [
+            ({**LLM_RESULT, "triage_level": "routine", "confidence": 0.95}, False),
+            ({**LLM_RESULT, "triage_level": "routine", "confidence": 0.5}, True),
+            ({**LLM_RESULT, "triage_level": "urgent", "confidence": 0.99}, True),
+            ({"triage_level": "routine"}, True),
+        ],
+    )
+    async def test_escalation(self, triage_agent, triage_request, fast_answer, escalated):
+        """Test only confident low-acuity fast answers are kept."""
+        triage_agent.fast_llm = Mock()
+        triage_agent.fast_llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(fast_answer)))
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+
+        response = await triage_agent.assess_triage_async(triage_request, {})
+
+        fast_prompt = triage_agent.fast_llm.ainvoke.await_args.args[0]
+        assert '"confidence"' in fast_prompt[0].content
+        assert triage_agent.llm.ainvoke.await_count == int(escalated)
+        expected = TriageLevel.URGENT if escalated else TriageLevel.ROUTINE
+        assert response.triage_level == expected
+
+    async def test_streaming_keeps_confident_fast_answer(self, triage_agent, triage_request):
+        """Test a streamed triage uses the cascade and skips the large model when it can."""
+        fast_answer = json.dumps({**LLM_RESULT, "triage_level": "routine", "confidence": 0.95})
+        triage_agent.fast_llm = Mock()
+        triage_agent.fast_llm.stream.return_value = iter(
+            Mock(content=fast_answer[start : start + 7]) for start in range(0, len(fast_answer), 7)
+        )
+
+        events = [event async for event in triage_agent.astream_triage(triage_request, {})]
+
+        assert events[0] == ("triage_level", TriageLevel.ROUTINE)
+        assert events[-1][1].triage_level == TriageLevel.ROUTINE
+        triage_agent.llm.stream.assert_not_called()
+
+    async def test_streaming_drops_fast_answer_at_an_escalated_level(
+        self, triage_agent, triage_request
+    ):
+        """Test the fast stream is abandoned at its level field when that level is escalated."""
+        pulled = []
+
+        def fast_stream(prompt, **kwargs):
+            for text in ['{"triage_level": "urgent", ', '"priority_score": 80', "}"]:
+                pulled.append(text)
+                yield Mock(content=text)
+
+        answer = json.dumps(LLM_RESULT)
+        triage_agent.fast_llm = Mock(stream=fast_stream)
+        triage_agent.llm.stream.return_value = (Mock(content=text) for text in [answer])
+
+        events = [event async for event in triage_agent.astream_triage(triage_request, {})]
+
+        assert len(pulled) == 1
+        assert events[0] == ("triage_level", "urgent")
+        assert events[-1][1].assessment_summary == LLM_RESULT["assessment_summary"]
+
+
+class TestPromptCaching:
+    """Test Bedrock prompt caching of the triage system prompt."""
+
+    async def test_system_prompt_marked_cacheable(self, triage_agent, triage_request):
+        """Test caching-capable models get a cacheable system block and report cached tokens."""
+        answer = json.dumps(LLM_RESULT)
+        usage = {"input_tokens": 120, "cache_read_input_tokens": 900, "output_tokens": 1}
+        events = [
+            {"type": "message_start", "message": {"usage": usage}},
+            {"type": "content_block_delta", "delta": {"text": answer[:10]}},
+            {"type": "content_block_delta", "delta": {"text": answer[10:]}},
+            {"type": "message_delta", "usage": {"output_tokens": 150}},
+        ]
+        triage_agent.llm = triage_agent._build_llm("anthropic.claude-3-5-haiku-20241022-v1:0")
+        triage_agent.bedrock_client = Mock()
+        triage_agent.bedrock_client.invoke_model_with_response_stream.return_value = {
+            "body": [{"chunk": {"bytes": json.dumps(event).encode()}} for event in events]
+        }
+
+        response = await triage_agent.assess_triage_async(triage_request, {})
+
+        assert response.triage_level == TriageLevel.URGENT
+        call = triage_agent.bedrock_client.invoke_model_with_response_stream.call_args.kwargs
+        body = json.loads(call["body"])
+        assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert "NIVELES DE TRIAJE" in body["system"][0]["text"]
+        assert body["messages"][0]["role"] == "user"
+        assert body["max_tokens"] == 2048
+
+
+class TestPackedTriage:
+    """Test multi-patient packed triage prompts."""
+
+    async def test_malformed_entries_fall_back_to_single_calls(self, triage_agent, triage_request):
+        """Test valid entries come from the packed call and the rest are re-assessed alone."""
+        cases = [
+            (triage_request.model_copy(update={"patient_id": f"PAT-{i}"}), {"age": 40 + i})
+            for i in range(3)
+        ]
+        packed_answer = [
+            {**LLM_RESULT, "patient_id": "PAT-1", "triage_level": "critical"},
+            {**LLM_RESULT, "patient_id": "PAT-0"},
+            {"patient_id": "PAT-2", "triage_level": "unknown"},
+        ]
+        single_answer = {**LLM_RESULT, "triage_level": "routine"}
+        triage_agent.llm.ainvoke = AsyncMock(
+            side_effect=[
+                Mock(
+                    content=f"```json\n{json.dumps(packed_answer)}\n```",
+                    additional_kwargs={"usage": {"prompt_tokens": 900}},
+                ),
+                Mock(content=json.dumps(single_answer)),
+            ]
+        )
+
+        results = await triage_agent.assess_triage_packed_async(cases)
+
+        assert [result.patient_id for result in results] == ["PAT-0", "PAT-1", "PAT-2"]
+        assert [result.triage_level for result in results] == [
+            TriageLevel.URGENT,
+            TriageLevel.CRITICAL,
+            TriageLevel.ROUTINE,
+        ]
+        assert triage_agent.llm.ainvoke.await_count == 2
+        packed_prompt = triage_agent.llm.ainvoke.await_args_list[0].args[0]
+        assert all(f"patient_id: PAT-{i}" in packed_prompt[-1].content for i in range(3))
+
+    async def test_non_array_answer_falls_back_for_everyone(self, triage_agent, triage_request):
+        """Test an answer that is not a JSON array re-assesses every patient alone."""
+        cases = [
+            (triage_request.model_copy(update={"patient_id": f"PAT-{i}"}), {})
+            for i in range(2)
+        ]
+        triage_agent.llm.ainvoke = AsyncMock(
+            side_effect=[
+                Mock(content=json.dumps(LLM_RESULT), additional_kwargs={}),
+                Mock(content=json.dumps(LLM_RESULT)),
+                Mock(content=json.dumps(LLM_RESULT)),
+            ]
+        )
+
+        results = await triage_agent.assess_triage_packed_async(cases)
+
+        assert [result.patient_id for result in results] == ["PAT-0", "PAT-1"]
+        assert triage_agent.llm.ainvoke.await_count == 3
+
+
+class TestCoordinatorAgent:
+    """Test the triage workflow."""
+
+    async def test_process_triage_async(self, coordinator, triage_agent, triage_request):
+        """Test the async workflow fetches history, assesses and saves without blocking calls."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        coordinator.patient_service.get_patient_clinical_history_async.return_value = {
+            "patient_id": "PAT-001",
+            "age": 40,
+        }
+
+        result = await coordinator.process_triage_async(triage_request)
+
+        assert result.triage_level == TriageLevel.URGENT
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        triage_agent.llm.invoke.assert_not_called()
+        coordinator.patient_service.get_patient_clinical_history.assert_not_called()
+        await coordinator.outbox_flusher.aclose()
+        coordinator.async_db_service.batch_put_items.assert_awaited_once()
+
+    async def test_requests_without_a_key_are_not_checkpointed(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test a keyless run writes no checkpoint and returns its result even if unsaved."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        coordinator.outbox.append = Mock(return_value=False)
+        coordinator.async_db_service.put_item = AsyncMock(return_value=False)
+
+        result = await coordinator.process_triage_async(triage_request)
+
+        assert result.triage_level == TriageLevel.URGENT
+        with sqlite3.connect(coordinator.checkpointer.path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone() == (0,)
+
+    async def test_outbox_is_written_off_the_event_loop(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test the fsynced outbox append runs on a worker thread, not the event loop."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        append = coordinator.outbox.append
+        threads = []
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return append(*args)
+
+        coordinator.outbox.append = record_thread
+
+        await coordinator.process_triage_async(triage_request)
+
+        assert threads and threading.main_thread() not in threads
+
+    async def test_failed_save_resumes_without_calling_the_llm_again(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test a retry after the result could not be saved resumes at the save node."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        triage_agent.result_cache.enabled = False
+        coordinator.async_db_service.put_item = AsyncMock(side_effect=[False, True, True])
+        coordinator.outbox.append = Mock(return_value=False)
+        resumes = REGISTRY.get_sample_value("triage_graph_resumes_total")
+        avoided = REGISTRY.get_sample_value("triage_resume_llm_calls_avoided_total")
+
+        with pytest.raises(TriageNotSavedError):
+            await coordinator.process_triage_async(triage_request, "key-1")
+        result = await coordinator.process_triage_async(triage_request, "key-1")
+
+        assert result.triage_level == TriageLevel.URGENT
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        assert coordinator.async_db_service.put_item.await_count == 2
+        saved = coordinator.async_db_service.put_item.await_args.args[1]
+        assert saved["triage_id"] == result.triage_id
+        assert REGISTRY.get_sample_value("triage_graph_resumes_total") == resumes + 1
+        assert REGISTRY.get_sample_value("triage_resume_llm_calls_avoided_total") == avoided + 1
+        config = coordinator._thread_config(triage_request, "key-1")
+        assert coordinator.checkpointer.get(config)["channel_values"] == {}
+
+        other = await coordinator.process_triage_async(triage_request, "key-2")
+        assert other.triage_id != result.triage_id
+        assert triage_agent.llm.ainvoke.await_count == 2
+
+    async def test_process_triage_batch_async(self, coordinator, triage_agent, triage_request):
+        """Test a batch runs assessments concurrently and keeps request order."""
+        in_flight = 0
+        peak = 0
+
+        async def slow_llm(prompt, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return Mock(content=json.dumps(LLM_RESULT))
+
+        triage_agent.llm.ainvoke = slow_llm
+        coordinator.settings = coordinator.settings.model_copy(
+            update={"triage_batch_concurrency": 3}
+        )
+        coordinator.patient_service.get_patient_clinical_histories_async = AsyncMock(
+            return_value={"PAT-0": {"patient_id": "PAT-0", "age": 40}}
+        )
+        requests = [
+            triage_request.model_copy(
+                update={"patient_id": f"PAT-{i}", "additional_context": f"Caso {i}"}
+            )
+            for i in range(8)
+        ]
+
+        items = await coordinator.process_triage_batch_async(requests)
+
+        assert [item.patient_id for item in items] == [f"PAT-{i}" for i in range(8)]
+        assert [item.index for item in items] == list(range(8))
+        assert all(item.result and item.saved for item in items)
+        assert 1 < peak <= 3
+        coordinator.patient_service.get_patient_clinical_histories_async.assert_awaited_once()
+        coordinator.async_db_service.batch_put_items.assert_awaited_once()
+        assert len(coordinator.async_db_service.batch_put_items.call_args.args[1]) == 8
+
+    async def test_packed_retriage_decides_red_flags_without_the_llm(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test hard-rule patients get their level at once and are left out of the LLM packs."""
+        triage_agent.llm.ainvoke = AsyncMock(
+            return_value=Mock(content=json.dumps([{**LLM_RESULT, "patient_id": "PAT-1"}]))
+        )
+        coordinator.settings = coordinator.settings.model_copy(
+            update={"triage_rules_enrich": False}
+        )
+        coordinator.patient_service.get_patient_clinical_histories_async = AsyncMock(
+            return_value={}
+        )
+        hypoxemic = triage_request.model_copy(
+            update={"patient_id": "PAT-0", "vital_signs": {"oxygen_saturation": 86}}
+        )
+        stable = triage_request.model_copy(update={"patient_id": "PAT-1"})
+
+        items = await coordinator.process_retriage_packed_async([hypoxemic, stable])
+
+        assert items[0].result.triage_level == TriageLevel.CRITICAL
+        assert items[1].result.triage_level == TriageLevel.URGENT
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        assert "PAT-0" not in triage_agent.llm.ainvoke.await_args.args[0][1].content
+        coordinator.patient_service.get_patient_clinical_histories_async.assert_awaited_once_with(
+            ["PAT-1"]
+        )
+
+    async def test_astream_triage_emits_fields_then_saved_result(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test streamed fields arrive before the saved result."""
+        answer = json.dumps(LLM_RESULT)
+        triage_agent.llm.stream.return_value = iter(
+            Mock(content=answer[start : start + 7]) for start in range(0, len(answer), 7)
+        )
+
+        events = [event async for event in coordinator.astream_triage(triage_request)]
+
+        assert events[0] == ("triage_level", "urgent")
+        assert [field for field, _ in events[:-1]] == list(LLM_RESULT)
+        field, final = events[-1]
+        assert field == "complete"
+        assert final["saved"] is True
+        assert final["result"].triage_level == TriageLevel.URGENT
+        await coordinator.outbox_flusher.aclose()
+        coordinator.async_db_service.batch_put_items.assert_awaited_once()
+
+    async def test_hard_rule_short_circuits_llm_and_enriches_later(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test a hard criterion is saved without waiting for the LLM, which enriches it after."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        records = {}
+
+        async def batch_put_items(table, items):
+            records.update({item["triage_id"]: dict(item) for item in items})
+            return []
+
+        async def update_item(table, key, updates):
+            records[key["triage_id"]].update(updates)
+            return records[key["triage_id"]]
+
+        coordinator.async_db_service.batch_put_items = batch_put_items
+        coordinator.async_db_service.update_item = update_item
+        request = triage_request.model_copy(update={"vital_signs": {"blood_pressure": "80/50"}})
+
+        result = await coordinator.process_triage_async(request)
+
+        assert result.triage_level == TriageLevel.CRITICAL
+        triage_agent.llm.ainvoke.assert_not_called()
+
+        await asyncio.gather(*coordinator._background_tasks)
+        await coordinator.outbox_flusher.aclose()
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        record = records[result.triage_id]
+        assert record["triage_level"] == "critical"
+        assert record["assessment_summary"] == LLM_RESULT["assessment_summary"]
+        assert record["assessment_status"] == "complete"
+
+    async def test_two_phase_returns_level_then_completes_record(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test phase 1 saves a preliminary level and phase 2 completes the same record."""
+        level_answer = json.dumps({"l": "semi_urgent", "p": 55, "wt": "1 hora"})
+        triage_agent.llm.ainvoke = AsyncMock(
+            side_effect=[Mock(content=level_answer), Mock(content=json.dumps(LLM_RESULT))]
+        )
+        records = {}
+
+        async def batch_put_items(table, items):
+            records.update({item["triage_id"]: dict(item) for item in items})
+            return []
+
+        async def update_item(table, key, updates):
+            records[key["triage_id"]].update(updates)
+            return records[key["triage_id"]]
+
+        coordinator.async_db_service.batch_put_items = batch_put_items
+        coordinator.async_db_service.update_item = update_item
+        coordinator.async_db_service.get_item = AsyncMock(
+            side_effect=lambda table, key: records.get(key["triage_id"])
+        )
+
+        result = await coordinator.process_triage_two_phase_async(triage_request)
+
+        assert result.assessment_status == AssessmentStatus.PRELIMINARY
+        assert result.triage_level == TriageLevel.SEMI_URGENT
+        assert result.estimated_wait_time == "1 hora"
+        assert triage_agent.llm.ainvoke.await_args_list[0].kwargs["max_tokens"] == 96
+
+        completed = await coordinator.wait_for_triage_async(result.triage_id, timeout=5)
+
+        assert completed.assessment_status == AssessmentStatus.COMPLETE
+        assert completed.triage_id == result.triage_id
+        assert completed.triage_level == TriageLevel.URGENT
+        assert completed.recommended_tests == LLM_RESULT["recommended_tests"]
+        assert not coordinator._phase_two_events
+        assert await coordinator.wait_for_triage_async("TRI-MISSING") is None
+        await coordinator.outbox_flusher.aclose()
+        assert records[result.triage_id]["assessment_status"] == "complete"
+
+    async def test_identical_requests_in_flight_share_one_run(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test concurrent identical submissions make one LLM call and one record."""
+
+        async def slow_llm(prompt, **kwargs):
+            await asyncio.sleep(0.01)
+            return Mock(content=json.dumps(LLM_RESULT))
+
+        triage_agent.llm.ainvoke = AsyncMock(side_effect=slow_llm)
+        triage_agent.result_cache.enabled = False
+        retry = triage_request.model_copy(
+            update={"symptoms": list(reversed(triage_request.symptoms))}
+        )
+
+        results = await asyncio.gather(
+            coordinator.process_triage_async(triage_request),
+            coordinator.process_triage_async(retry),
+        )
+
+        assert results[0].triage_id == results[1].triage_id
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        await coordinator.outbox_flusher.aclose()
+        coordinator.async_db_service.batch_put_items.assert_awaited_once()
+        assert coordinator.single_flight.in_flight() == 0
+
+    async def test_idempotency_key_replays_stored_response(
+        self, coordinator, triage_agent, triage_request
+    ):
+        """Test a repeated Idempotency-Key returns the stored triage and rejects other requests."""
+        triage_agent.llm.ainvoke = AsyncMock(return_value=Mock(content=json.dumps(LLM_RESULT)))
+        triage_agent.result_cache.enabled = False
+
+        first = await coordinator.process_triage_async(triage_request, "key-1")
+        repeat = await coordinator.process_triage_async(triage_request, "key-1")
+
+        assert repeat.triage_id == first.triage_id
+        triage_agent.llm.ainvoke.assert_awaited_once()
+        other = triage_request.model_copy(update={"additional_context": "Otro caso"})
+        with pytest.raises(IdempotencyConflictError):
+            await coordinator.process_triage_async(other, "key-1")
+
+    async def test_idempotency_keys_are_not_evicted_with_cached_results(
+        self, monkeypatch, triage_request
+    ):
+        """Test the idempotency store is sized on its own, not by the triage result cache."""
+        monkeypatch.setenv("TRIAGE_CACHE_MAX_SIZE", "1")
+        monkeypatch.setenv("TRIAGE_IDEMPOTENCY_MAX_SIZE", "10")
+        get_settings.cache_clear()
+        store = TriageIdempotencyStore()
+        response = TriageResponse(triage_id="TRI-001", patient_id="PAT-001", **LLM_RESULT)
+
+        await store.aset("key-1", triage_request, response)
+        await store.aset("key-2", triage_request, response)
+
+        assert await store.aget("key-1", triage_request) == response
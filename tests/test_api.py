@@ -1,8 +1,11 @@
 """Tests for API endpoints."""
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
+from src.api.admission import AdmissionController, AdmissionRejected
 from src.api.main import app
+from src.models.triage import TriageResponse
 
 client = TestClient(app)
 
@@ -33,6 +36,21 @@ class TestHealthEndpoints:
         data = response.json()
         assert data["status"] == "ready"
 
+    def test_metrics(self):
+        """Test Prometheus metrics endpoint."""
+        response = client.get("/api/v1/metrics")
+        assert response.status_code == 200
+        assert "triage_result_cache_lookups_total" in response.text
+
+    def test_invalid_request_timeout_is_rejected(self):
+        """Test non-finite or non-positive X-Request-Timeout values get a 400."""
+        for value in ("nan", "inf", "-1", "0", "soon"):
+            response = client.get("/api/v1/health", headers={"X-Request-Timeout": value})
+            assert response.status_code == 400
+
+        response = client.get("/api/v1/health", headers={"X-Request-Timeout": "1e9"})
+        assert response.status_code == 200
+
 
 class TestPatientEndpoints:
     """Test patient endpoints."""
@@ -56,7 +74,7 @@ class TestPatientEndpoints:
             "updated_at": "2024-01-01T00:00:00",
             "is_active": True,
         }
-        mock_service.create_patient.return_value = mock_patient
+        mock_service.create_patient_async = AsyncMock(return_value=mock_patient)
 
         # Make request
         response = client.post(
@@ -73,6 +91,22 @@ class TestPatientEndpoints:
         # Assertions
         assert response.status_code == 201
 
+    @patch('src.api.routes.patients.patient_service')
+    def test_get_patient_not_found(self, mock_service):
+        """Test get patient endpoint awaits the async service."""
+        mock_service.get_patient_async = AsyncMock(return_value=None)
+
+        response = client.get("/api/v1/patients/PAT-404")
+
+        assert response.status_code == 404
+        mock_service.get_patient_async.assert_awaited_once_with("PAT-404")
+
+    def test_list_patients_invalid_cursor(self):
+        """Test list patients rejects an invalid cursor."""
+        response = client.get("/api/v1/patients/", params={"cursor": "not-a-cursor"})
+
+        assert response.status_code == 400
+
 
 class TestTriageEndpoints:
     """Test triage endpoints."""
@@ -84,3 +118,126 @@ class TestTriageEndpoints:
         data = response.json()
         assert "workflow" in data
         assert "description" in data
+
+    @patch("src.api.routes.triage.coordinator")
+    def test_saturated_assess_sheds_all_but_severe_requests(self, mock_coordinator):
+        """Test a saturated endpoint answers 503 with Retry-After, except for severe symptoms."""
+        mock_coordinator.process_triage_async = AsyncMock(
+            return_value=TriageResponse(
+                triage_id="TRI-001",
+                patient_id="PAT-002",
+                triage_level="critical",
+                priority_score=95,
+                assessment_summary="Dolor severo",
+                recommended_action="Atención inmediata",
+            )
+        )
+        saturated = AdmissionController("test", 0, 0, 0.01, retry_after_seconds=7)
+
+        with patch("src.api.routes.triage.admission", saturated):
+            shed = client.post(
+                "/api/v1/triage/assess",
+                json={"patient_id": "PAT-001", "symptoms": [{"name": "Tos", "severity": 3}]},
+            )
+            severe = client.post(
+                "/api/v1/triage/assess",
+                json={"patient_id": "PAT-002", "symptoms": [{"name": "Dolor", "severity": 9}]},
+            )
+
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "7"
+        assert severe.status_code == 200
+        mock_coordinator.process_triage_async.assert_awaited_once()
+        assert saturated.in_flight == 0
+
+    @patch("src.api.routes.triage.coordinator")
+    def test_saturated_batch_and_stream_are_shed(self, mock_coordinator):
+        """Test the batch and streaming endpoints go through admission control too."""
+        mock_coordinator.process_triage_batch_async = AsyncMock(return_value=[])
+        mock_coordinator.astream_triage = Mock()
+        saturated = AdmissionController("test", 0, 0, 0.01, retry_after_seconds=7)
+        request = {"patient_id": "PAT-001", "symptoms": [{"name": "Tos", "severity": 3}]}
+
+        with patch("src.api.routes.triage.admission", saturated):
+            batch = client.post("/api/v1/triage/assess/batch", json={"requests": [request]})
+            stream = client.post("/api/v1/triage/assess/stream", json=request)
+
+        assert batch.status_code == stream.status_code == 503
+        assert batch.headers["Retry-After"] == stream.headers["Retry-After"] == "7"
+        mock_coordinator.process_triage_batch_async.assert_not_awaited()
+        mock_coordinator.astream_triage.assert_not_called()
+
+    @patch("src.api.routes.triage.coordinator")
+    def test_assess_triage_stream(self, mock_coordinator):
+        """Test streamed triage is sent as Server-Sent Events."""
+
+        async def astream_triage(request):
+            yield "triage_level", "urgent"
+            yield "complete", {"result": {"patient_id": request.patient_id}, "saved": True}
+
+        mock_coordinator.astream_triage = astream_triage
+        response = client.post(
+            "/api/v1/triage/assess/stream",
+            json={"patient_id": "PAT-001", "symptoms": [{"name": "Fiebre", "severity": 5}]},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == (
+            'event: field\ndata: {"name": "triage_level", "value": "urgent"}\n\n'
+            'event: complete\ndata: {"result": {"patient_id": "PAT-001"}, "saved": true}\n\n'
+        )
+
+
+class TestAdmissionController:
+    """Test admission control."""
+
+    async def test_queued_request_takes_freed_slot_and_overflow_is_shed(self):
+        """Test a queued request is admitted when a slot frees and a full queue sheds."""
+        controller = AdmissionController("test", 1, 1, 1.0, retry_after_seconds=1)
+        release = asyncio.Event()
+        order = []
+
+        async def request(name):
+            async with controller.admit():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(request("queued"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected):
+            async with controller.admit():
+                pass
+        release.set()
+        await asyncio.gather(first, queued)
+
+        assert order == ["first", "queued"]
+        assert controller.in_flight == 0
+        assert controller.queue_depth() == 0
+
+    async def test_batch_takes_one_unit_per_patient(self):
+        """Test a multi-unit request waits until enough slots are free, capped at the limit."""
+        controller = AdmissionController("test", 3, 1, 1.0, retry_after_seconds=1)
+        release = asyncio.Event()
+        held = []
+
+        async def request(units):
+            async with controller.admit(units=units):
+                held.append(controller.in_flight)
+                await release.wait()
+
+        single = asyncio.create_task(request(1))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(request(3))
+        await asyncio.sleep(0)
+
+        assert controller.queue_depth() == 1
+        release.set()
+        await asyncio.gather(single, batch)
+        await request(50)
+
+        assert held == [1, 3, 3]
+        assert controller.in_flight == 0
@@ -1,8 +1,45 @@
 """Tests for services."""
+import asyncio
+import json
+import threading
+import time
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
+from botocore.exceptions import ClientError
+from moto import mock_aws
 from src.services.patient_service import PatientService
-from src.models.patient import PatientCreate, Gender, BloodType
+from src.services.cache import (
+    MISSING,
+    KeyValueStore,
+    SQLiteStore,
+    TTLCache,
+    TwoLevelCache,
+    get_cache,
+)
+from src.services.aws_clients import ClientRegistry
+from src.services.dynamodb_service import DynamoDBService
+from src.services.outbox import OutboxFlusher, WriteOutbox
+from src.services.pagination import encode_cursor, decode_cursor
+from src.services.rate_limiter import PriorityRateLimiter, RateLimitTimeout
+from src.services.deadline import DeadlineExceeded
+from src.services.hedging import (
+    CircuitBreaker,
+    HedgedCaller,
+    get_circuit_breaker,
+    get_hedged_caller,
+)
+from src.agents.base_agent import BaseAgent
+from src.config import get_settings
+from src.models.patient import PatientCreate, PatientUpdate, Gender, BloodType
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty process-wide caches."""
+    get_cache.cache_clear()
+    yield
+    get_cache.cache_clear()
 
 
 class TestPatientService:
@@ -70,6 +107,54 @@ class TestPatientService:
         assert patient.first_name == "Juan"
         mock_db.get_item.assert_called_once()
 
+    @patch('src.services.patient_service.DynamoDBService')
+    def test_get_patient_clinical_history_uses_projection(self, mock_db_service):
+        """Test triage history only reads the clinical fields."""
+        mock_db = Mock()
+        mock_db.get_item.return_value = {
+            "patient_id": "PAT-001",
+            "date_of_birth": "1985-05-15",
+            "blood_type": "O+",
+            "allergies": ["Penicilina"],
+        }
+        mock_db_service.return_value = mock_db
+        service = PatientService()
+
+        history = service.get_patient_clinical_history("PAT-001")
+
+        assert history["allergies"] == ["Penicilina"]
+        assert history["age"] > 0
+        projection = mock_db.get_item.call_args.kwargs["projection"]
+        assert "address" not in projection and "email" not in projection
+        assert "date_of_birth" in projection
+
+    @patch('src.services.patient_service.DynamoDBService')
+    def test_get_patient_is_cached_until_updated(self, mock_db_service):
+        """Test repeated reads hit the cache and updates refresh it."""
+        item = {
+            "patient_id": "PAT-001",
+            "first_name": "Juan",
+            "last_name": "Pérez",
+            "date_of_birth": "1985-05-15",
+            "gender": "male",
+            "phone": "+541145678900",
+        }
+        mock_db = Mock()
+        mock_db.get_item.return_value = item
+        mock_db.update_item.return_value = {**item, "first_name": "Juana"}
+        mock_db_service.return_value = mock_db
+        service = PatientService()
+
+        service.get_patient("PAT-001")
+        service.get_patient("PAT-001")
+        updated = service.update_patient("PAT-001", PatientUpdate(first_name="Juana"))
+
+        assert mock_db.get_item.call_count == 1
+        assert service.get_patient("PAT-001").first_name == "Juana"
+        assert updated.first_name == "Juana"
+        assert mock_db.get_item.call_count == 1
+        assert service.patient_cache.stats()["l1"]["hits"] == 2
+
     @patch('src.services.patient_service.DynamoDBService')
     def test_calculate_age(self, mock_db_service):
         """Test age calculation."""
@@ -77,3 +162,590 @@ class TestPatientService:
         age = service._calculate_age("1985-05-15")
         assert age > 0
         assert isinstance(age, int)
+
+    @patch('src.services.patient_service.AsyncDynamoDBService')
+    @patch('src.services.patient_service.DynamoDBService')
+    async def test_get_patient_async(self, mock_db_service, mock_async_db_service):
+        """Test async get patient does not touch the sync client."""
+        # Setup mock
+        mock_async_db = Mock()
+        mock_async_db.get_item = AsyncMock(
+            return_value={
+                "patient_id": "PAT-001",
+                "first_name": "Juan",
+                "last_name": "Pérez",
+                "date_of_birth": "1985-05-15",
+                "gender": "male",
+                "phone": "+541145678900",
+            }
+        )
+        mock_async_db_service.return_value = mock_async_db
+
+        # Create service
+        service = PatientService()
+
+        # Get patient
+        patient = await service.get_patient_async("PAT-001")
+
+        # Assertions
+        assert patient.patient_id == "PAT-001"
+        mock_async_db.get_item.assert_awaited_once()
+        mock_db_service.return_value.get_item.assert_not_called()
+
+
+class TestTTLCache:
+    """Test the in-process TTL cache."""
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    @patch('src.services.cache.time.monotonic')
+    def test_ttl_expiry(self, mock_monotonic):
+        """Test entries expire after the TTL."""
+        mock_monotonic.return_value = 100.0
+        cache = TTLCache(max_size=10, ttl_seconds=5)
+        cache.set("a", 1)
+
+        mock_monotonic.return_value = 106.0
+
+        assert cache.get("a") is MISSING
+
+    def test_negative_caching_is_configurable(self):
+        """Test None is only cached when a negative TTL is set."""
+        disabled = TTLCache(max_size=10, ttl_seconds=60)
+        enabled = TTLCache(max_size=10, ttl_seconds=60, negative_ttl_seconds=5)
+        disabled.set("unknown", None)
+        enabled.set("unknown", None)
+
+        assert disabled.get("unknown") is MISSING
+        assert enabled.get("unknown") is None
+
+
+class TestTwoLevelCache:
+    """Test the two-level cache over a shared store."""
+
+    def test_invalidation_reaches_other_workers(self, tmp_path):
+        """Test a version bump in one worker hides the value from another worker's L1."""
+        path = str(tmp_path / "cache.sqlite3")
+        worker_a = TwoLevelCache("patient", dict, TTLCache(10, 60), SQLiteStore(path))
+        worker_b = TwoLevelCache("patient", dict, TTLCache(10, 60), SQLiteStore(path))
+
+        worker_a.set("PAT-001", {"first_name": "Juan"})
+        assert worker_b.get("PAT-001") == {"first_name": "Juan"}
+        assert worker_b.stats()["l2"]["hits"] == 1
+
+        worker_a.invalidate("PAT-001")
+
+        assert worker_b.get("PAT-001") is MISSING
+        assert worker_a.get("PAT-001") is MISSING
+
+    def test_load_racing_an_invalidation_is_not_served(self, tmp_path):
+        """Test a value loaded before an invalidation is stored under the dead version."""
+        cache = TwoLevelCache(
+            "patient", dict, TTLCache(10, 60), SQLiteStore(str(tmp_path / "cache.sqlite3"))
+        )
+
+        def stale_load():
+            cache.invalidate("PAT-001")
+            return {"first_name": "Old"}
+
+        assert cache.get_or_load("PAT-001", stale_load) == {"first_name": "Old"}
+        assert cache.get("PAT-001") is MISSING
+
+    async def test_async_writes_and_invalidations_run_off_the_event_loop(self, tmp_path):
+        """Test the async paths write and bump versions in L2 on a worker thread."""
+        store = SQLiteStore(str(tmp_path / "cache.sqlite3"))
+        threads = []
+        for name in ("set", "incr"):
+            method = getattr(store, name)
+
+            def record_thread(*args, _method=method, **kwargs):
+                threads.append(threading.current_thread())
+                return _method(*args, **kwargs)
+
+            setattr(store, name, record_thread)
+        cache = TwoLevelCache("patient", dict, TTLCache(10, 60), store)
+
+        await cache.aset("PAT-001", {"first_name": "Juan"})
+        await cache.ainvalidate("PAT-001")
+
+        assert len(threads) == 2 and threading.main_thread() not in threads
+        assert await cache.aget("PAT-001") is MISSING
+
+    async def test_version_stamps_are_reused_for_their_ttl(self, tmp_path):
+        """Test lookups reuse a cached version stamp until it expires or is invalidated here."""
+        store = SQLiteStore(str(tmp_path / "cache.sqlite3"))
+        store.get = Mock(wraps=store.get)
+        cache = TwoLevelCache("patient", dict, TTLCache(10, 60), store, version_ttl_seconds=60)
+        loader = AsyncMock(return_value={"first_name": "Juan"})
+
+        for _ in range(3):
+            assert await cache.aget_or_load("PAT-001", loader) == {"first_name": "Juan"}
+        cache.invalidate("PAT-001")
+        assert cache.get("PAT-001") is MISSING
+
+        assert loader.await_count == 1
+        assert [c.args[0] for c in store.get.call_args_list] == [
+            "patient:ver:PAT-001",
+            "patient:PAT-001:v0",
+            "patient:PAT-001:v1",
+        ]
+        with pytest.raises(TypeError):
+            KeyValueStore()
+
+
+class TestClientRegistry:
+    """Test shared AWS client registry."""
+
+    def test_clients_are_shared_per_service_and_region(self):
+        """Test one pool per (service, region) is reused across services."""
+        registry = ClientRegistry()
+
+        resource = registry.resource("dynamodb", "us-east-1")
+
+        assert registry.resource("dynamodb", "us-east-1") is resource
+        assert registry.client("dynamodb", "us-east-1") is resource.meta.client
+        assert registry.client("dynamodb", "eu-west-1") is not resource.meta.client
+        config = resource.meta.client.meta.config
+        assert config.max_pool_connections == registry.settings.aws_max_pool_connections
+        assert config.retries["mode"] == registry.settings.aws_retry_mode
+
+
+class TestDynamoDBBatchOperations:
+    """Test DynamoDB batch operations."""
+
+    @mock_aws
+    def test_batch_put_and_get_round_trip(self):
+        """Test batch writes chunk by 25 and batch gets return every item."""
+        with patch(
+            'src.services.dynamodb_service.get_client_registry', return_value=ClientRegistry()
+        ):
+            service = DynamoDBService()
+        service.create_tables()
+        table_name = service.settings.dynamodb_patients_table
+        items = [{"patient_id": f"PAT-{i:03d}", "first_name": "Juan"} for i in range(60)]
+
+        failed = service.batch_put_items(table_name, items)
+        fetched, unfetched = service.batch_get_items(
+            table_name, [{"patient_id": item["patient_id"]} for item in items] * 2
+        )
+
+        assert failed == [] and unfetched == []
+        assert sorted(item["patient_id"] for item in fetched) == [
+            item["patient_id"] for item in items
+        ]
+
+    @mock_aws
+    def test_iter_scan_follows_last_evaluated_key(self):
+        """Test scans stream every page instead of stopping at the first."""
+        with patch(
+            'src.services.dynamodb_service.get_client_registry', return_value=ClientRegistry()
+        ):
+            service = DynamoDBService()
+        service.create_tables()
+        table_name = service.settings.dynamodb_patients_table
+        service.batch_put_items(table_name, [{"patient_id": f"PAT-{i:03d}"} for i in range(25)])
+
+        pages = list(service.iter_scan(table_name, page_size=10))
+
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert len(service.scan_table(table_name)) == 25
+        assert len(service.scan_table(table_name, limit=15)) == 15
+
+    @patch('src.services.dynamodb_service.time.sleep')
+    @patch('src.services.dynamodb_service.get_client_registry')
+    def test_parallel_scan_covers_every_segment(self, mock_registry, mock_sleep):
+        """Test a parallel scan returns each item once and backs off when throttled."""
+        items = [{"triage_id": f"TRI-{i:03d}"} for i in range(40)]
+        throttled = set()
+
+        def scan(Segment, TotalSegments, Limit=None, ExclusiveStartKey=None):
+            if Segment not in throttled:
+                throttled.add(Segment)
+                raise ClientError(
+                    {"Error": {"Code": "ProvisionedThroughputExceededException"}}, "Scan"
+                )
+            segment_items = items[Segment::TotalSegments]
+            start = ExclusiveStartKey["offset"] if ExclusiveStartKey else 0
+            page = segment_items[start : start + Limit]
+            response = {"Items": page}
+            if start + Limit < len(segment_items):
+                response["LastEvaluatedKey"] = {"offset": start + Limit}
+            return response
+
+        mock_registry.return_value.resource.return_value.Table.return_value.scan.side_effect = scan
+        service = DynamoDBService()
+        progress = []
+
+        pages = list(
+            service.parallel_scan(
+                "triage", segments=4, workers=2, page_size=5, on_progress=progress.append
+            )
+        )
+
+        triage_ids = sorted(item["triage_id"] for page in pages for item in page)
+        assert triage_ids == [item["triage_id"] for item in items]
+        assert {p.segment for p in progress if p.done} == {0, 1, 2, 3}
+        assert mock_sleep.call_count == 4
+
+    @mock_aws
+    def test_update_item_returns_new_attributes(self):
+        """Test updates use reserved-word-safe names and return the updated item."""
+        with patch(
+            'src.services.dynamodb_service.get_client_registry', return_value=ClientRegistry()
+        ):
+            service = DynamoDBService()
+        service.create_tables()
+        table_name = service.settings.dynamodb_consultations_table
+        service.put_item(
+            table_name, {"consultation_id": "CONS-001", "patient_id": "PAT-001", "status": "pending"}
+        )
+
+        updated = service.update_item(
+            table_name, {"consultation_id": "CONS-001"}, {"status": "completed"}
+        )
+        missing = service.update_item(
+            table_name, {"consultation_id": "CONS-404"}, {"status": "completed"}
+        )
+
+        assert updated == {
+            "consultation_id": "CONS-001",
+            "patient_id": "PAT-001",
+            "status": "completed",
+        }
+        assert missing is None
+        assert service.get_item(table_name, {"consultation_id": "CONS-404"}) is None
+
+    @mock_aws
+    def test_get_item_with_projection(self):
+        """Test projected reads only return the requested attributes."""
+        with patch(
+            'src.services.dynamodb_service.get_client_registry', return_value=ClientRegistry()
+        ):
+            service = DynamoDBService()
+        service.create_tables()
+        table_name = service.settings.dynamodb_patients_table
+        service.put_item(
+            table_name, {"patient_id": "PAT-001", "address": "Calle 1", "allergies": ["Latex"]}
+        )
+
+        item = service.get_item(table_name, {"patient_id": "PAT-001"}, projection=["allergies"])
+
+        assert item == {"allergies": ["Latex"]}
+
+    @patch('src.services.dynamodb_service.time.sleep')
+    @patch('src.services.dynamodb_service.get_client_registry')
+    def test_batch_put_retries_unprocessed_items(self, mock_registry, mock_sleep):
+        """Test unprocessed items are retried with backoff."""
+        unprocessed = {"PutRequest": {"Item": {"patient_id": "PAT-002"}}}
+        mock_resource = Mock()
+        mock_resource.batch_write_item.side_effect = [
+            {"UnprocessedItems": {"patients": [unprocessed]}},
+            {"UnprocessedItems": {}},
+        ]
+        mock_registry.return_value.resource.return_value = mock_resource
+        service = DynamoDBService()
+
+        failed = service.batch_put_items(
+            "patients", [{"patient_id": "PAT-001"}, {"patient_id": "PAT-002"}]
+        )
+
+        assert failed == []
+        assert mock_resource.batch_write_item.call_count == 2
+        retried = mock_resource.batch_write_item.call_args_list[1].kwargs["RequestItems"]
+        assert retried == {"patients": [unprocessed]}
+        mock_sleep.assert_called_once()
+
+    @patch('src.services.dynamodb_service.get_client_registry')
+    def test_iter_scan_raises_instead_of_ending_early(self, mock_registry):
+        """Test a failed page read is raised rather than treated as the last page."""
+        mock_table = Mock()
+        mock_table.scan.side_effect = [
+            {"Items": [{"patient_id": "PAT-001"}], "LastEvaluatedKey": {"patient_id": "PAT-001"}},
+            ClientError({"Error": {"Code": "InternalServerError"}}, "Scan"),
+        ]
+        mock_registry.return_value.resource.return_value.Table.return_value = mock_table
+        pages = DynamoDBService().iter_scan("patients")
+
+        assert next(pages) == [{"patient_id": "PAT-001"}]
+        with pytest.raises(ClientError):
+            next(pages)
+
+    @patch('src.services.dynamodb_service.time.sleep')
+    @patch('src.services.dynamodb_service.get_client_registry')
+    def test_batch_get_reports_keys_it_could_not_fetch(self, mock_registry, mock_sleep):
+        """Test keys left unprocessed when a retry fails are returned, not dropped."""
+        mock_resource = Mock()
+        mock_resource.batch_get_item.side_effect = [
+            {
+                "Responses": {"patients": [{"patient_id": "PAT-001"}]},
+                "UnprocessedKeys": {"patients": {"Keys": [{"patient_id": "PAT-002"}]}},
+            },
+            ClientError({"Error": {"Code": "InternalServerError"}}, "BatchGetItem"),
+        ]
+        mock_registry.return_value.resource.return_value = mock_resource
+        service = DynamoDBService()
+
+        items, unfetched = service.batch_get_items(
+            "patients", [{"patient_id": "PAT-001"}, {"patient_id": "PAT-002"}]
+        )
+
+        assert items == [{"patient_id": "PAT-001"}]
+        assert unfetched == [{"patient_id": "PAT-002"}]
+
+
+class TestWriteOutbox:
+    """Test the write-behind outbox and its flusher."""
+
+    @patch("src.services.outbox.backoff_delay", return_value=0)
+    async def test_failed_writes_are_retried_until_stored(self, mock_backoff, tmp_path):
+        """Test items a batch write fails to store stay queued and are written on a retry."""
+        outbox = WriteOutbox(str(tmp_path / "outbox.sqlite3"))
+        for i in range(3):
+            outbox.append("triage", {"triage_id": f"TRI-{i}"}, {"triage_id": f"TRI-{i}"})
+        written = []
+
+        async def awrite(table_name, items):
+            if not written:
+                written.append([])
+                return [item for item in items if item["triage_id"] != "TRI-0"]
+            written.append(items)
+            return []
+
+        flusher = OutboxFlusher(outbox, Mock(), awrite)
+
+        assert await flusher.aflush() == 3
+        assert outbox.pending() == 0
+        assert sorted(item["triage_id"] for item in written[1]) == ["TRI-1", "TRI-2"]
+
+    async def test_update_while_writing_is_written_again(self, tmp_path):
+        """Test an item changed after it was claimed is not removed by the stale write."""
+        outbox = WriteOutbox(str(tmp_path / "outbox.sqlite3"))
+        key = {"triage_id": "TRI-1"}
+        outbox.append("triage", key, {**key, "assessment_status": "preliminary"})
+        written = []
+
+        async def awrite(table_name, items):
+            if not written:
+                assert outbox.update("triage", key, {"assessment_status": "complete"})
+            written.append(items[0]["assessment_status"])
+            return []
+
+        await OutboxFlusher(outbox, Mock(), awrite).aflush()
+
+        assert written == ["preliminary", "complete"]
+        assert outbox.get("triage", key) is None
+        assert not outbox.update("triage", key, {"assessment_status": "failed"})
+
+    @mock_aws
+    def test_thread_flusher_drains_to_dynamodb(self, tmp_path):
+        """Test the flusher started outside an event loop writes queued items in a thread."""
+        with patch(
+            "src.services.dynamodb_service.get_client_registry", return_value=ClientRegistry()
+        ):
+            service = DynamoDBService()
+        service.create_tables()
+        table_name = service.settings.dynamodb_triage_table
+        outbox = WriteOutbox(str(tmp_path / "outbox.sqlite3"))
+        for i in range(30):
+            outbox.append(table_name, {"triage_id": f"TRI-{i}"}, {"triage_id": f"TRI-{i}"})
+
+        OutboxFlusher(outbox, service.batch_put_items, AsyncMock()).start()
+        deadline = time.monotonic() + 5
+        while outbox.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert outbox.pending() == 0
+        assert len(service.scan_table(table_name)) == 30
+
+
+class TestPriorityRateLimiter:
+    """Test the Bedrock rate limiter."""
+
+    async def test_saturated_limiter_serves_highest_priority_first(self):
+        """Test a later, more urgent call gets capacity before an earlier routine one."""
+        limiter = PriorityRateLimiter("model", 1200, 1_000_000, max_wait_seconds=5)
+        limiter._requests = 0
+        granted = []
+
+        async def call(name, priority):
+            await limiter.aacquire(100, priority)
+            granted.append(name)
+
+        await asyncio.gather(call("routine", 30), call("critical", 95))
+
+        assert granted == ["critical", "routine"]
+        assert limiter.queue_depth() == 0
+
+    def test_wait_beyond_maximum_times_out(self):
+        """Test a call gives up after the maximum wait and leaves the queue."""
+        limiter = PriorityRateLimiter("model", 1, 1_000_000, max_wait_seconds=0.05)
+        limiter.acquire(100)
+
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(100)
+        assert limiter.queue_depth() == 0
+
+
+def _bedrock_stub(delay: float, text: str) -> ThreadingHTTPServer:
+    """Start a local HTTP server answering Bedrock InvokeModel calls after ``delay`` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(delay)
+            body = json.dumps({"content": [{"type": "text", "text": text}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestHedgedCaller:
+    """Test hedged, deadline-bounded calls."""
+
+    @pytest.fixture(autouse=True)
+    def clear_hedging_caches(self):
+        """Start every test with fresh breakers and hedged callers."""
+        get_circuit_breaker.cache_clear()
+        get_hedged_caller.cache_clear()
+        yield
+        get_circuit_breaker.cache_clear()
+        get_hedged_caller.cache_clear()
+
+    async def test_slow_primary_is_hedged_to_secondary(self):
+        """Test the secondary's answer wins once the primary exceeds the hedge delay."""
+
+        async def call(target):
+            await asyncio.sleep(1 if target == "primary" else 0)
+            return target
+
+        caller = HedgedCaller("model", ["primary", "secondary"], initial_delay_seconds=0.05)
+
+        started = time.monotonic()
+        assert await caller.acall(call) == "secondary"
+        assert time.monotonic() - started < 0.5
+
+    def test_failing_target_opens_its_circuit(self):
+        """Test failures fail over right away and stop reaching an open circuit."""
+        calls = []
+
+        def call(target):
+            calls.append(target)
+            if target == "primary":
+                raise ConnectionError("region down")
+            return target
+
+        breakers = {
+            "primary": CircuitBreaker("primary", failure_threshold=2, reset_seconds=60),
+            "secondary": CircuitBreaker("secondary", failure_threshold=2, reset_seconds=60),
+        }
+        caller = HedgedCaller("model", ["primary", "secondary"], breakers=breakers)
+
+        assert [caller.call(call) for _ in range(3)] == ["secondary"] * 3
+        assert calls.count("primary") == 2
+        assert breakers["primary"].state == "open"
+
+    async def test_deadline_bounds_the_call(self):
+        """Test a call still running at the deadline is abandoned."""
+
+        async def call(target):
+            await asyncio.sleep(1)
+
+        caller = HedgedCaller("model", ["primary"])
+
+        with pytest.raises(DeadlineExceeded):
+            await caller.acall(call, timeout=0.05)
+
+    async def test_agent_stream_fails_over_before_its_first_chunk(self):
+        """Test a stream failing before its first chunk is retried on the secondary target."""
+
+        def broken_stream(prompt, **kwargs):
+            raise ConnectionError("region down")
+            yield
+
+        healthy = Mock()
+        healthy.stream.return_value = iter(Mock(content=text) for text in ["Ho", "la"])
+        limiter = Mock(aacquire=AsyncMock())
+        agent = BaseAgent()
+        agent._target_llm = lambda llm, target: (
+            Mock(stream=broken_stream) if target == "primary" else healthy
+        )
+        agent._hedged = lambda model_id: HedgedCaller("model", ["primary", "secondary"])
+
+        with patch("src.agents.base_agent.get_rate_limiter", return_value=limiter):
+            answer = "".join([text async for text in agent.astream("Hola", max_tokens=64)])
+
+        assert answer == "Hola"
+        assert healthy.stream.call_args.kwargs == {"max_tokens": 64}
+        assert limiter.aacquire.await_count == 2
+
+    def test_agent_hedges_across_local_stub_endpoints(self):
+        """Test a slow primary endpoint is hedged to the secondary through real Bedrock clients.
+
+        The hedged attempt is charged to the rate limiter like the first one.
+        """
+        limiter = Mock()
+        primary = _bedrock_stub(delay=2, text="primary")
+        secondary = _bedrock_stub(delay=0, text="secondary")
+        settings = get_settings().model_copy(
+            update={
+                "aws_access_key_id": "testing",
+                "aws_secret_access_key": "testing",
+                "bedrock_endpoint_url": f"http://127.0.0.1:{primary.server_port}",
+                "bedrock_secondary_region": "us-west-2",
+                "bedrock_secondary_endpoint_url": f"http://127.0.0.1:{secondary.server_port}",
+                "bedrock_hedge_initial_delay_seconds": 0.2,
+                "bedrock_rate_limit_enabled": False,
+            }
+        )
+        try:
+            with patch("src.agents.base_agent.get_settings", return_value=settings), patch(
+                "src.agents.base_agent.get_client_registry",
+                return_value=ClientRegistry(settings),
+            ), patch("src.services.hedging.get_settings", return_value=settings), patch(
+                "src.agents.base_agent.get_rate_limiter", return_value=limiter
+            ):
+                agent = BaseAgent()
+                started = time.monotonic()
+                answer = agent.invoke("Hola")
+        finally:
+            primary.shutdown()
+            secondary.shutdown()
+
+        assert answer == "secondary"
+        assert time.monotonic() - started < 1.5
+        assert limiter.acquire.call_count == 2
+
+
+class TestPagination:
+    """Test pagination cursors."""
+
+    def test_cursor_round_trip(self):
+        """Test cursors decode back to the original start key."""
+        key = {"patient_id": "PAT-001"}
+        assert decode_cursor(encode_cursor(key)) == key
+        assert encode_cursor(None) is None
+        assert decode_cursor(None) is None
+
+    def test_invalid_cursor(self):
+        """Test tampered cursors are rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")